@@ -1,12 +1,48 @@
+import os
+from typing import Optional
 from fastapi import Depends, HTTPException, status
-from app.db import get_supabase
 from app.auth.dependencies import get_current_user
+from app.utils.auth import hospital_id_from_claims, revoke_hospital_claims
+from app.utils.cache import TTLCache
+from app.utils.loaders import get_loaders
+from app.utils.metrics import register_metrics
+
+HOSPITAL_ROLES = ("hospital_administrator", "doctor", "nurse")
+
+# (user_id, role) -> hospital_id. Staff assignments change rarely, so this
+# process-wide cache saves one DB round-trip on every dashboard call.
+# Services that change an assignment must call invalidate_user_hospital(),
+# which also stops trusting the hospital claim of the user's issued tokens.
+_hospital_id_cache = TTLCache(
+    maxsize=int(os.getenv("HOSPITAL_ID_CACHE_SIZE", 4096)),
+    ttl=float(os.getenv("HOSPITAL_ID_CACHE_TTL", 600)),
+)
+
+register_metrics("hospital_id_cache", _hospital_id_cache.stats)
+
+
+def invalidate_user_hospital(user_id: str, role: Optional[str] = None) -> None:
+    """
+    Forget the cached hospital of a user (for one role, or for all roles) and
+    distrust the hospital claim of tokens issued to them so far.
+    """
+    if not user_id:
+        return
+    revoke_hospital_claims(user_id)
+    for r in ((role,) if role else HOSPITAL_ROLES):
+        _hospital_id_cache.pop((str(user_id), r))
+
+
+def remember_user_hospital(user_id: str, role: str, hospital_id) -> None:
+    """Seed the cache with an assignment resolved elsewhere (e.g. at login)."""
+    if user_id and role in HOSPITAL_ROLES and hospital_id:
+        _hospital_id_cache.set((str(user_id), role), hospital_id)
+
 
 async def get_user_hospital_id(user: dict = Depends(get_current_user)):
     """
     Get hospital ID for the current authenticated user based on their role
     """
-    supabase = get_supabase()
     user_id = user.get("sub")
     role = user.get("role")
     # print(f"User: {user}")
@@ -19,33 +55,39 @@ async def get_user_hospital_id(user: dict = Depends(get_current_user)):
         )
     
     # Check user's role and get associated hospital
-    table_name = None
-    if role == "hospital_administrator":
-        table_name = "Hospital_Administrator"
-    elif role == "doctor":
-        table_name = "Doctor"
-    elif role == "nurse":
-        table_name = "Nurse"
-    else:
+    # (Hospital_Administrator, Doctor or Nurse table)
+    loader = get_loaders().staff(role)
+    if loader is None:
         # For roles without hospital association
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"User role '{role}' is not associated with any hospital"
         )
-    # print(f"table_name: {table_name}")
-    # Get hospital ID from appropriate table
+
+    # Trusted hospital claim in the token: no lookup at all
+    hospital_id = hospital_id_from_claims(user)
+    if hospital_id:
+        return hospital_id
+
+    cache_key = (str(user_id), role)
+    hospital_id = _hospital_id_cache.get(cache_key)
+    if hospital_id is not None:
+        return hospital_id
+
+    # Get hospital ID from appropriate table (request-scoped, fetched once per request)
     try:
-        resp = supabase.table(table_name).select("hospital_id").eq("user_id", user_id).execute()
-        
-        if not resp.data or len(resp.data) == 0:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"No hospital found for this {role}"
-            )
-            
-        return resp.data[0].get("hospital_id")
+        row = await loader.aload(user_id)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving hospital: {str(e)}"
         )
+
+    if not row or not row.get("hospital_id"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No hospital found for this {role}"
+        )
+    hospital_id = row.get("hospital_id")
+    _hospital_id_cache.set(cache_key, hospital_id)
+    return hospital_id
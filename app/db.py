@@ -1,14 +1,86 @@
 import os
+import asyncio
 from functools import lru_cache
-from supabase import create_client, Client
+from typing import Dict, List, Optional
+import httpx
+from supabase import create_client, Client, acreate_client, AsyncClient, AsyncClientOptions
 from dotenv import load_dotenv
 
 load_dotenv()
 
-@lru_cache
-def get_supabase() -> Client:
+# Connection pool for the async client. The pool bounds how many PostgREST
+# requests can be in flight per instance; extra requests wait for a free slot.
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", 50))
+SUPABASE_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", 20))
+SUPABASE_POOL_TIMEOUT = float(os.getenv("SUPABASE_POOL_TIMEOUT", 10))
+SUPABASE_REQUEST_TIMEOUT = float(os.getenv("SUPABASE_REQUEST_TIMEOUT", 120))
+
+
+def _get_credentials():
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_KEY")
     if not url or not key:
         raise RuntimeError("Missing SUPABASE_URL or SUPABASE_KEY in environment.")
+    return url, key
+
+
+def fetch_table_columns() -> Dict[str, List[str]]:
+    """{table: column names} from PostgREST's OpenAPI description of the schema."""
+    url, key = _get_credentials()
+    resp = httpx.get(
+        f"{url}/rest/v1/",
+        headers={"apikey": key, "Authorization": f"Bearer {key}", "Accept": "application/openapi+json"},
+        timeout=SUPABASE_POOL_TIMEOUT,
+    )
+    resp.raise_for_status()
+    definitions = resp.json().get("definitions") or {}
+    return {table: list((definition.get("properties") or {}).keys()) for table, definition in definitions.items()}
+
+
+@lru_cache
+def get_supabase() -> Client:
+    url, key = _get_credentials()
     return create_client(url, key)
+
+
+_async_supabase: Optional[AsyncClient] = None
+_async_supabase_lock = asyncio.Lock()
+
+
+async def get_async_supabase() -> AsyncClient:
+    """
+    Return the shared async Supabase client.
+    All PostgREST calls made through it share one pooled httpx.AsyncClient,
+    so awaiting a query does not hold a threadpool worker.
+    """
+    global _async_supabase
+    if _async_supabase is not None:
+        return _async_supabase
+
+    async with _async_supabase_lock:
+        if _async_supabase is None:
+            url, key = _get_credentials()
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=SUPABASE_MAX_CONNECTIONS,
+                    max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+                ),
+                timeout=httpx.Timeout(SUPABASE_REQUEST_TIMEOUT, pool=SUPABASE_POOL_TIMEOUT),
+                follow_redirects=True,
+                http2=True,
+            )
+            _async_supabase = await acreate_client(
+                url, key, options=AsyncClientOptions(httpx_client=http_client)
+            )
+    return _async_supabase
+
+
+async def close_async_supabase() -> None:
+    """Close the pooled connections of the async client (called on shutdown)."""
+    global _async_supabase
+    if _async_supabase is None:
+        return
+    http_client = _async_supabase.options.httpx_client
+    _async_supabase = None
+    if http_client is not None:
+        await http_client.aclose()
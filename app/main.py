@@ -1,6 +1,16 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.auth.dependencies import government_personnel_required
+from app.db import close_async_supabase, fetch_table_columns
+from app.services.gov_cube import GOV_CUBE, run_cube_refresher
+from app.utils.loaders import RequestLoaderMiddleware
+from app.utils.metrics import metrics_snapshot
+from app.utils.projections import PROJECTION_SCHEMA_CHECK, check_projection_schema
+
 from app.routes.auth_routes import router as auth_router
 from app.routes.hospital_routes import router as hospital_router
 from app.routes.nurse_routes import router as nurse_router
@@ -19,7 +29,24 @@ from app.routes.hospital_stay_service_route import router as hospital_stay_servi
 # from app.routes.govDash_routes import router as gov_dash_routes
 from app.routes.govDash_routes import router as govDash_routes 
 
-app = FastAPI(title="FastAPI + Supabase", redirect_slashes=False)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Projections naming columns the tables do not have fall back to select *
+    if PROJECTION_SCHEMA_CHECK:
+        try:
+            check_projection_schema(await run_in_threadpool(fetch_table_columns))
+        except Exception as e:
+            print(f"⚠️ Projection schema check skipped: {str(e)}")
+    # Keep the government dashboard cube loaded and periodically rebuilt
+    cube_refresher = asyncio.create_task(run_cube_refresher()) if GOV_CUBE else None
+    yield
+    if cube_refresher is not None:
+        cube_refresher.cancel()
+    # Release the pooled connections of the async Supabase client
+    await close_async_supabase()
+
+
+app = FastAPI(title="FastAPI + Supabase", redirect_slashes=False, lifespan=lifespan)
 
 
 origins = [
@@ -39,6 +66,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request batching loaders for User/Nurse/Hospital lookups
+app.add_middleware(RequestLoaderMiddleware)
+
 app.include_router(auth_router, prefix="/auth", tags=["Users"])
 app.include_router(hospital_router, prefix="/hospital", tags=["Hospitals"])
 app.include_router(nurse_router, prefix="/nurse", tags=["Nurses"])
@@ -72,3 +102,7 @@ async def preflight_handler(rest_of_path: str = None):
 def _routes():
     return [{"path": r.path, "methods": list(getattr(r, "methods", []))} for r in app.routes]
 
+
+@app.get("/_metrics", dependencies=[Depends(government_personnel_required)])
+def _metrics():
+    return metrics_snapshot()
@@ -85,4 +85,10 @@ class AccidentRecordOut(AccidentRecordBase):
     injuries: List[InjuryOut] = Field(default_factory=list)
     treatments: List[TreatmentOut] = Field(default_factory=list)  # <-- NEW
 
-    # Note: created_on and managed_by_name were added for readability in record viewing.
\ No newline at end of file
+    # Note: created_on and managed_by_name were added for readability in record viewing.
+
+
+class AccidentRecordPage(BaseModel):
+    """One page of GET /accidents; pass next_cursor back as ?cursor= for the next page."""
+    items: List[AccidentRecordOut] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
@@ -82,4 +82,24 @@ class AccidentAnalyticsFilters(BaseModel):
     collision_type: Optional[str] = None
     road_category: Optional[str] = None
     discharge_outcome: Optional[str] = None
-    hospital_id: Optional[str] = None
\ No newline at end of file
+    hospital_id: Optional[str] = None
+
+
+class HospitalAnalyticsRollup(BaseModel):
+    hospital_id: str
+    name: Optional[str] = None
+    region: str
+    analytics: AccidentAnalyticsResponse
+
+class RegionAnalyticsRollup(BaseModel):
+    region: str
+    analytics: AccidentAnalyticsResponse
+    hospitals: List[HospitalAnalyticsRollup]
+
+class AnalyticsRollupResponse(BaseModel):
+    """National -> Region -> hospital analytics, computed in one scan"""
+    national: AccidentAnalyticsResponse
+    regions: List[RegionAnalyticsRollup]
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    generated_at: datetime
@@ -3,8 +3,8 @@ from typing import Optional
 from datetime import date
 from app.models.analytics import AccidentAnalyticsResponse, AccidentAnalyticsFilters
 from app.services.accident_analytics_service import (
-    get_comprehensive_analytics_service,
-    get_accident_summary_service,
+    get_comprehensive_analytics_service_async,
+    get_accident_summary_service_async,
     get_filter_options_service
 )
 from app.auth.dependencies import get_current_user
@@ -13,7 +13,7 @@ from app.auth.hospital_dependency import get_user_hospital_id
 router = APIRouter()
 
 @router.get("", response_model=AccidentAnalyticsResponse, dependencies=[Depends(get_current_user)])
-def get_accident_analytics(
+async def get_accident_analytics(
     start_date: Optional[date] = Query(None, description="Filter accidents from this date"),
     end_date: Optional[date] = Query(None, description="Filter accidents to this date"),
     gender: Optional[str] = Query(None, description="Filter by gender"),
@@ -39,15 +39,15 @@ def get_accident_analytics(
         hospital_id=hospital_id  # Use hospital_id from dependency injection
     )
     
-    return get_comprehensive_analytics_service(filters)
+    return await get_comprehensive_analytics_service_async(filters)
 
 @router.get("/summary", dependencies=[Depends(get_current_user), Depends(get_user_hospital_id)])
-def get_accident_summary(
+async def get_accident_summary(
     start_date: Optional[date] = Query(None, description="Filter accidents from this date"),
     end_date: Optional[date] = Query(None, description="Filter accidents to this date"),
     hospital_id: str = Depends(get_user_hospital_id)
 ):
-    return get_accident_summary_service(hospital_id, start_date, end_date)
+    return await get_accident_summary_service_async(hospital_id, start_date, end_date)
 
 @router.get("/filters/options", dependencies=[Depends(get_current_user), Depends(get_user_hospital_id)])
 def get_filter_options(hospital_id: str = Depends(get_user_hospital_id)):
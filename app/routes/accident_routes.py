@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, Path
-from app.models.accident import AccidentRecordCreate, AccidentRecordUpdate, AccidentRecordOut
+from datetime import date
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Path, Query
+from fastapi.responses import StreamingResponse
+from app.models.accident import AccidentRecordCreate, AccidentRecordUpdate, AccidentRecordOut, AccidentRecordPage
 from app.services.accident_service import (
+    ACCIDENT_PAGE_DEFAULT,
+    ACCIDENT_PAGE_MAX,
     create_accident_record_service,
     edit_accident_record_service,
-    get_all_accident_records_service,
-    get_accident_record_by_id_service,
-    get_accident_records_by_patient_service
+    list_accident_records_page_service_async,
+    get_accident_record_by_id_service_async,
+    get_accident_records_by_patient_service_async
 )
-from app.auth.dependencies import get_current_user
+from app.services.accident_export_service import EXPORT_FORMATS, export_accident_records_service
+from app.auth.dependencies import get_current_user, government_personnel_required
 
 router = APIRouter()
 
@@ -19,14 +25,56 @@ def create_accident_record(accident: AccidentRecordCreate, user=Depends(get_curr
 def edit_accident_record(accident_id: str, accident: AccidentRecordUpdate, user=Depends(get_current_user)):
     return edit_accident_record_service(accident_id, accident, user)
 
-@router.get("/", response_model=list[AccidentRecordOut])
-def get_all_accident_records(user=Depends(get_current_user)):
-    return get_all_accident_records_service()
+@router.get("/", response_model=AccidentRecordPage)
+async def get_all_accident_records(
+    limit: int = Query(ACCIDENT_PAGE_DEFAULT, ge=1, le=ACCIDENT_PAGE_MAX, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    start_date: Optional[date] = Query(None, description="Incident date from (inclusive)"),
+    end_date: Optional[date] = Query(None, description="Incident date to (inclusive)"),
+    severity: Optional[str] = Query(None, description="Severity code, e.g. S"),
+    hospital_id: Optional[str] = Query(None, description="Hospital currently managing the record"),
+    completed: Optional[bool] = Query(None),
+    user=Depends(get_current_user),
+):
+    return await list_accident_records_page_service_async(
+        limit=limit,
+        cursor=cursor,
+        start_date=start_date,
+        end_date=end_date,
+        severity=severity,
+        hospital_id=hospital_id,
+        completed=completed,
+    )
+
+@router.get("/export", dependencies=[Depends(government_personnel_required)])
+async def export_accident_records(
+    format: Literal["ndjson", "csv", "parquet"] = Query("ndjson"),
+    start_date: Optional[date] = Query(None, description="Incident date from (inclusive)"),
+    end_date: Optional[date] = Query(None, description="Incident date to (inclusive)"),
+    severity: Optional[str] = Query(None, description="Severity code, e.g. S"),
+    hospital_id: Optional[str] = Query(None, description="Hospital currently managing the record"),
+    completed: Optional[bool] = Query(None),
+):
+    """Full extract of accident records with injuries and treatments, streamed page by page."""
+    media_type, extension = EXPORT_FORMATS[format]
+    stream = export_accident_records_service(
+        format,
+        start_date=start_date,
+        end_date=end_date,
+        severity=severity,
+        hospital_id=hospital_id,
+        completed=completed,
+    )
+    return StreamingResponse(
+        stream,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="accident_records.{extension}"'},
+    )
 
 @router.get("/{accident_id}", response_model=AccidentRecordOut)
-def get_accident_record_by_id(accident_id: str = Path(..., description="Accident Record UUID"), user=Depends(get_current_user)):
-    return get_accident_record_by_id_service(accident_id)
+async def get_accident_record_by_id(accident_id: str = Path(..., description="Accident Record UUID"), user=Depends(get_current_user)):
+    return await get_accident_record_by_id_service_async(accident_id)
 
 @router.get("/patient/{patient_id}", response_model=list[AccidentRecordOut])
-def get_accident_records_by_patient(patient_id: str = Path(..., description="Patient UUID"), user=Depends(get_current_user)):
-    return get_accident_records_by_patient_service(patient_id, user)
\ No newline at end of file
+async def get_accident_records_by_patient(patient_id: str = Path(..., description="Patient UUID"), user=Depends(get_current_user)):
+    return await get_accident_records_by_patient_service_async(patient_id, user)
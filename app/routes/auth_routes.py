@@ -22,27 +22,27 @@ def list_users(
 
 
 @router.post("/login")
-def login_user(credentials: UserLogin):
-    return login_user_service(credentials)
+async def login_user(credentials: UserLogin):
+    return await login_user_service(credentials)
 
 
 
 # ===== Role-specific registration endpoints =====
 @router.post("/register/nurse", response_model=UserOut)
-def register_nurse(user: UserIn):
-    return register_nurse_service(user)
+async def register_nurse(user: UserIn):
+    return await register_nurse_service(user)
 
 
 @router.post("/register/doctor", response_model=UserOut)
-def register_doctor(user: UserIn):
-    return register_doctor_service(user)
+async def register_doctor(user: UserIn):
+    return await register_doctor_service(user)
 
 
 @router.post("/register/hospital-administrator", response_model=UserOut)
-def register_hospital_administrator(user: UserIn):
-    return register_hospital_administrator_service(user)
+async def register_hospital_administrator(user: UserIn):
+    return await register_hospital_administrator_service(user)
 
 
 @router.post("/register/government", response_model=UserOut)
-def register_government(user: UserIn):
-    return register_government_service(user)
\ No newline at end of file
+async def register_government(user: UserIn):
+    return await register_government_service(user)
\ No newline at end of file
@@ -3,11 +3,13 @@ from typing import Optional,Dict, Any
 from datetime import date
 from fastapi.responses import JSONResponse
 from app.models.gov_dash import AccidentAnalyticsResponse1,AccidentAnalyticsFilters1
+from app.models.analytics import AnalyticsRollupResponse
 from app.services.govDash_service import (
     get_accident_trends_service,
     get_comprehensive_analytics_service1,
     # get_accident_stats
 )
+from app.services.gov_rollup_service import get_analytics_rollup_service
 from app.auth.dependencies import government_personnel_required
 
 
@@ -45,4 +47,26 @@ def get_accident_trends():
             content={"error": str(e)},
             status_code=500
         )
-    
+
+
+
+@router.get(
+    "/rollup",
+    response_model=AnalyticsRollupResponse,
+    dependencies=[Depends(government_personnel_required)],
+    summary="Analytics per hospital and per Region, with national totals",
+)
+def get_analytics_rollup(
+    start_date: Optional[date] = Query(None, description="Only accidents on or after this date"),
+    end_date: Optional[date] = Query(None, description="Only accidents on or before this date"),
+):
+    """
+    National -> Region -> hospital analytics tree computed in one scan.
+
+    A hospital's analytics cover the same records as its /analytics; each
+    Region and the national totals count every record once.
+    """
+    try:
+        return get_analytics_rollup_service(start_date, end_date)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -3,8 +3,8 @@ from app.models.patient import PatientCreate, PatientUpdate, PatientOut, Patient
 from app.services.patient_service import (
     create_patient_service,
     edit_patient_service,
-    get_patient_by_id_service,
-    get_hospital_patients_service
+    get_patient_by_id_service_async,
+    get_hospital_patients_service_async
 )
 from app.auth.dependencies import get_current_user, nurse_required
 from app.auth.hospital_dependency import get_user_hospital_id
@@ -25,11 +25,11 @@ def edit_patient(patient_id: str, patient: PatientUpdate):
 @router.get("", response_model=list[PatientOut])
 async def get_hospital_patients(hospital_id: str = Depends(get_user_hospital_id)):
     """Get patients associated with the current user's hospital"""
-    return get_hospital_patients_service(hospital_id)
+    return await get_hospital_patients_service_async(hospital_id)
 
 @router.get("/{patient_id}", response_model=PatientOut, dependencies=[Depends(get_current_user)])
-def get_patient_by_id(patient_id: str = Path(..., description="Patient UUID")):
-    return get_patient_by_id_service(patient_id)
+async def get_patient_by_id(patient_id: str = Path(..., description="Patient UUID")):
+    return await get_patient_by_id_service_async(patient_id)
 
 # @router.get("")
 # def search_patients(search: str = Query("", description="name or NIC or hospital id"),
@@ -10,8 +10,8 @@ from app.models.transfer import (
 )
 from app.services.transfer_service import (
     create_transfer_request_service,
-    list_my_outgoing_transfers_service,
-    list_incoming_transfers_for_admin_service,
+    list_my_outgoing_transfers_service_async,
+    list_incoming_transfers_for_admin_service_async,
     approve_transfer_service,
     reject_transfer_service,
 )
@@ -38,23 +38,23 @@ def create_transfer(
 
 
 @router.get("/outgoing", summary="List my outgoing transfer requests (nurse)")
-def list_outgoing_transfers(
+async def list_outgoing_transfers(
     user: Dict[str, Any] = Depends(get_current_user),
 ) -> List[Dict[str, Any]]:
     """
     List transfers created from the nurse's hospital (based on current user).
     """
-    return list_my_outgoing_transfers_service(user=user)
+    return await list_my_outgoing_transfers_service_async(user=user)
 
 
 @router.get("/incoming", summary="List incoming transfer requests (admin)")
-def list_incoming_transfers_for_admin(
+async def list_incoming_transfers_for_admin(
     user: Dict[str, Any] = Depends(get_current_user),
 ) -> List[Dict[str, Any]]:
     """
     List pending transfers where `to_hospital` equals the admin's hospital.
     """
-    return list_incoming_transfers_for_admin_service(user=user)
+    return await list_incoming_transfers_for_admin_service_async(user=user)
 
 
 @router.post("/{transfer_id}/approve", summary="Approve a transfer (admin)")
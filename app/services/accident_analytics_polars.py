@@ -0,0 +1,262 @@
+# app/services/accident_analytics_polars.py
+"""
+Columnar analytics engine (ANALYTICS_ENGINE=polars).
+
+The RPC rows are loaded once into a Polars frame (Arrow memory) holding only
+the columns the analytics read. Every distribution is then a group-by.
+Free-text values (collision times, dates, income bands, birth dates) are
+parsed once per distinct value with the same helpers as the Python engine,
+then mapped back onto the column. Counts keep first-occurrence order and
+averages sum their terms in row order, so results match
+AnalyticsAccumulator.sections().
+"""
+import math
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+
+import polars as pl
+
+from app.models.analytics import (
+    AccidentCharacteristics,
+    DataQuality,
+    Demographics,
+    FinancialImpact,
+    MedicalFactors,
+    TemporalTrends,
+)
+from app.services.accident_analytics_service import (
+    NOT_SHARED,
+    AnalyticsAccumulator,
+    _age_group_of,
+    _collision_hour,
+    _month_weekday,
+    _parse_income_range,
+)
+
+RECORD_COLUMNS = [
+    'time of collision',
+    'Collision with',
+    'Mode of traveling during accident',
+    'Category of Road',
+    'Discharge Outcome',
+    'Family monthly income before accident',
+    'Family monthly income after accident',
+    'Family current status',
+    'vehicle insured',
+    'vehicle insured type',
+    'Bystander expenditure per day',
+    'incident at date',
+]
+PATIENT_FIELDS = ['Date of Birth', 'Gender', 'Ethnicity', 'Education Qualification', 'Occupation']
+
+# Only these keys are read from the rows; nested patient objects become structs
+FRAME_SCHEMA = {
+    **{c: pl.Utf8 for c in RECORD_COLUMNS},
+    'patient_data': pl.Struct({f: pl.Utf8 for f in PATIENT_FIELDS}),
+    'Patient': pl.Struct({'Gender': pl.Utf8}),
+}
+
+ROW = "__row"
+
+
+def _frame(accident_data: List[Dict[str, Any]]) -> pl.DataFrame:
+    df = pl.from_dicts(accident_data, schema=FRAME_SCHEMA)
+    return (
+        df.with_columns(pl.col('Patient').struct.field('Gender').alias('__patient_gender'))
+        .drop('Patient')
+        .unnest('patient_data')
+        .with_row_index(ROW)
+    )
+
+
+def _truthy(column: str) -> pl.Expr:
+    return pl.col(column).is_not_null() & (pl.col(column) != "")
+
+
+def _answered(column: str) -> pl.Expr:
+    return _truthy(column) & (pl.col(column) != NOT_SHARED)
+
+
+def _mapped(series: pl.Series, fn: Callable[[Any], Any], dtype) -> pl.Series:
+    """fn applied once per distinct non-null value, mapped back onto the column."""
+    uniques = series.drop_nulls().unique().to_list()
+    if not uniques:
+        return pl.Series(series.name, [None] * len(series), dtype=dtype)
+    return series.replace_strict(uniques, [fn(u) for u in uniques], default=None, return_dtype=dtype)
+
+
+def _count_query(frame: pl.LazyFrame, key: pl.Expr, mask: pl.Expr) -> pl.LazyFrame:
+    """Counts per key of rows matching mask, in order of first occurrence."""
+    return (
+        frame.filter(mask)
+        .group_by(key.alias("__key"))
+        .agg(pl.len().alias("__n"), pl.col(ROW).min().alias("__first"))
+        .sort("__first")
+    )
+
+
+def _collect_counts(queries: Dict[str, pl.LazyFrame]) -> Dict[str, Dict[Any, int]]:
+    """Run every count query in one parallel collect; {name: {value: count}}."""
+    frames = pl.collect_all(list(queries.values()))
+    return {
+        name: dict(zip(grouped["__key"].to_list(), grouped["__n"].to_list()))
+        for name, grouped in zip(queries, frames)
+    }
+
+
+def _mean(values: List[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def _safe_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _safe_income(value: str) -> Optional[float]:
+    try:
+        return _parse_income_range(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def polars_analytics_sections(accident_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Same result as AnalyticsAccumulator.sections(), computed column-wise."""
+    if not accident_data:
+        return AnalyticsAccumulator().sections()
+
+    today = date.today()
+    df = _frame(accident_data)
+    total = df.height
+
+    month_of = lambda v: (_month_weekday(v) or (None, None))[0]
+    weekday_of = lambda v: (_month_weekday(v) or (None, None))[1]
+    df = df.with_columns(
+        _mapped(df['time of collision'], _collision_hour, pl.Int64).alias('__hour'),
+        _mapped(df['incident at date'], month_of, pl.Int64).alias('__month'),
+        _mapped(df['incident at date'], weekday_of, pl.Int64).alias('__weekday'),
+        _mapped(df['Date of Birth'], lambda v: _age_group_of(v, today), pl.Utf8).alias('__age_group'),
+        _mapped(df['Family monthly income before accident'], _safe_income, pl.Float64).alias('__income_before'),
+        _mapped(df['Family monthly income after accident'], _safe_income, pl.Float64).alias('__income_after'),
+        _mapped(df['Bystander expenditure per day'], _safe_float, pl.Float64).alias('__bystander'),
+    )
+
+    lf = df.lazy()
+    income = df.filter(
+        _answered('Family monthly income before accident')
+        & _answered('Family monthly income after accident')
+        & pl.col('__income_before').is_not_null()
+        & pl.col('__income_after').is_not_null()
+    ).with_columns((pl.col('__income_after') - pl.col('__income_before')).alias('__change'))
+
+    counts = _collect_counts({
+        # accident characteristics
+        'hourly': _count_query(lf, pl.col('__hour'), pl.col('__hour').is_not_null()),
+        'collisions': _count_query(lf, pl.col('Collision with'), _answered('Collision with')),
+        'travel_modes': _count_query(lf, pl.col('Mode of traveling during accident'), _truthy('Mode of traveling during accident')),
+        'road_categories': _count_query(lf, pl.col('Category of Road'), _answered('Category of Road')),
+        # demographics
+        'age_groups': _count_query(lf, pl.col('__age_group'), _truthy('Date of Birth') & pl.col('__age_group').is_not_null()),
+        'genders': _count_query(lf, pl.col('Gender'), _truthy('Gender')),
+        'ethnicities': _count_query(lf, pl.col('Ethnicity'), _truthy('Ethnicity')),
+        'education': _count_query(lf, pl.col('Education Qualification'), _truthy('Education Qualification')),
+        'occupations': _count_query(lf, pl.col('Occupation'), _truthy('Occupation')),
+        # medical / financial
+        'outcomes': _count_query(lf, pl.col('Discharge Outcome'), _truthy('Discharge Outcome')),
+        'income_comparison': _count_query(
+            income.lazy(),
+            pl.when(pl.col('__change') > 0).then(pl.lit('improved'))
+            .when(pl.col('__change') == 0).then(pl.lit('same'))
+            .otherwise(pl.lit('decreased')),
+            pl.lit(True),
+        ),
+        'family_status': _count_query(lf, pl.col('Family current status'), _answered('Family current status')),
+        'insurance': _count_query(
+            lf,
+            pl.when(_answered('vehicle insured type'))
+            .then(pl.concat_str([pl.col('vehicle insured'), pl.lit(' - '), pl.col('vehicle insured type')]))
+            .otherwise(pl.col('vehicle insured')),
+            _answered('vehicle insured'),
+        ),
+        # temporal trends
+        'monthly': _count_query(lf, pl.col('__month'), _truthy('incident at date') & pl.col('__month').is_not_null()),
+        'daily': _count_query(lf, pl.col('__weekday'), _truthy('incident at date') & pl.col('__weekday').is_not_null()),
+    })
+    hourly, collisions = counts['hourly'], counts['collisions']
+
+    income_changes = income['__change'].to_list()
+    bystander = df.filter(_truthy('Bystander expenditure per day') & (pl.col('Bystander expenditure per day') != '0'))['__bystander'].drop_nulls().to_list()
+    dates = df.filter(_truthy('incident at date'))['incident at date']
+
+    # ---- data quality ----
+    complete = df.filter(
+        pl.col('incident at date').is_not_null() & pl.col('__patient_gender').is_not_null()
+    ).height
+
+    avg_income_change = _mean(income_changes)
+    avg_bystander = _mean(bystander)
+    return {
+        'accident_characteristics': AccidentCharacteristics(
+            hourly_distribution=hourly,
+            collision_types=collisions,
+            travel_modes=counts['travel_modes'],
+            road_categories=counts['road_categories'],
+        ),
+        'demographics': Demographics(
+            age_groups=counts['age_groups'],
+            gender_dist=counts['genders'],
+            ethnicity_dist=counts['ethnicities'],
+            education_dist=counts['education'],
+            occupation_dist=counts['occupations'],
+        ),
+        'medical_factors': MedicalFactors(
+            outcomes_dist=counts['outcomes'],
+            wash_room_access={},
+            toilet_modification={},
+            avg_hospital_expenditure=avg_bystander,
+        ),
+        'financial_impact': FinancialImpact(
+            income_comparison=counts['income_comparison'],
+            avg_income_change=avg_income_change,
+            family_status_dist=counts['family_status'],
+            insurance_claim_dist=counts['insurance'],
+            avg_bystander_exp=avg_bystander,
+            avg_travel_exp=0.0,
+        ),
+        'temporal_trends': TemporalTrends(monthly_trends=counts['monthly'], daily_trends=counts['daily']),
+        'data_quality': DataQuality(
+            quality_dist={'Complete': complete, 'Missing/Incomplete': total - complete},
+            total_records=total,
+            completion_rate=(complete / total * 100) if total > 0 else 0,
+        ),
+        'summary_stats': {
+            'peak_hour': max(hourly.items(), key=lambda x: x[1])[0] if hourly else 0,
+            'common_collision': max(collisions.items(), key=lambda x: x[1])[0] if collisions else "Unknown",
+            'avg_income_change': avg_income_change,
+            'total_records': total,
+        },
+        'data_period': {
+            'start_date': dates.min(),
+            'end_date': dates.max(),
+            'total_records': total,
+        } if len(dates) else None,
+    }
+
+
+def _same(a: Any, b: Any) -> bool:
+    if hasattr(a, 'model_dump'):
+        a = a.model_dump()
+    if hasattr(b, 'model_dump'):
+        b = b.model_dump()
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, float) or isinstance(b, float):
+        return isinstance(a, (int, float)) and isinstance(b, (int, float)) and math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+    return a == b
+
+
+def sections_mismatch(expected: Dict[str, Any], actual: Dict[str, Any]) -> List[str]:
+    """Names of the sections whose values differ between two engines."""
+    return [name for name in expected if not _same(expected[name], actual.get(name))]
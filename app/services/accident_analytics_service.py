@@ -1,6 +1,7 @@
 from typing import Dict, Any, List, Optional
 from datetime import datetime, date
 from collections import defaultdict
+from fastapi.concurrency import run_in_threadpool
 from app.models.analytics import (
     AccidentAnalyticsResponse,
     AccidentCharacteristics,
@@ -11,503 +12,728 @@ from app.models.analytics import (
     DataQuality,
     AccidentAnalyticsFilters
 )
-from app.db import get_supabase
+from app.db import get_supabase, get_async_supabase
+from app.utils.projections import Projection
+from app.utils.cache import TTLCache
+from app.utils.metrics import register_metrics
+from app.utils.singleflight import SingleFlight
+from postgrest.exceptions import APIError
+import os
+import threading
 
-def get_comprehensive_analytics_with_summary_service(filters: AccidentAnalyticsFilters) -> Dict[str, Any]:
+# "python" (single-pass accumulator) or "polars" (columnar group-bys)
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "python").lower()
+# Also run the Python engine and log any difference (for rolling out "polars")
+ANALYTICS_ENGINE_VALIDATE = os.getenv("ANALYTICS_ENGINE_VALIDATE", "false").lower() in ("1", "true", "yes")
+
+# Serve unfiltered hospital analytics from incrementally maintained counters
+# (app/services/analytics_counters.py) instead of a full scan per request
+ANALYTICS_COUNTERS = os.getenv("ANALYTICS_COUNTERS", "false").lower() in ("1", "true", "yes")
+# Serve filter options from per-hospital value counts kept by the same writes
+# instead of querying the hospital's records on every request
+FILTER_OPTIONS_COUNTERS = os.getenv("FILTER_OPTIONS_COUNTERS", "false").lower() in ("1", "true", "yes")
+
+# (hospital_id, generation, kind, normalized filters) -> result, where kind is
+# "full" (analytics with summary) or "summary" (the KPI numbers only).
+# Writes that touch a hospital's accidents call invalidate_analytics_cache(),
+# which bumps the hospital's generation: results computed before the write
+# can no longer be stored under (or read from) a current key.
+_analytics_cache = TTLCache(
+    maxsize=int(os.getenv("ANALYTICS_CACHE_SIZE", 256)),
+    ttl=float(os.getenv("ANALYTICS_CACHE_TTL", 300)),
+)
+_generations: Dict[Optional[str], int] = defaultdict(int)  # per hospital; None = unscoped results
+_epoch = 0  # bumped when the whole cache is invalidated
+_generations_lock = threading.Lock()
+
+register_metrics("analytics_cache", _analytics_cache.stats)
+
+# Identical concurrent misses (same cache key) share one computation
+_analytics_flights = SingleFlight("analytics")
+
+
+def _normalized_filters(filters: AccidentAnalyticsFilters) -> tuple:
+    """Hashable form of the filters: blank strings count as no filter."""
+    items = []
+    for name, value in sorted(filters.model_dump(exclude={"hospital_id"}).items()):
+        if isinstance(value, str):
+            value = value.strip() or None
+        items.append((name, value))
+    return tuple(items)
+
+
+def _analytics_cache_key(filters: AccidentAnalyticsFilters, kind: str = "full") -> tuple:
+    hospital_id = str(filters.hospital_id) if filters.hospital_id else None
+    with _generations_lock:
+        generation = (_epoch, _generations[hospital_id])
+    return hospital_id, generation, kind, _normalized_filters(filters)
+
+
+def _from_counters(filters: AccidentAnalyticsFilters) -> bool:
+    """Unfiltered analytics of one hospital can come from the counter store."""
+    return ANALYTICS_COUNTERS and bool(filters.hospital_id) and all(
+        value is None for _, value in _normalized_filters(filters)
+    )
+
+
+def invalidate_analytics_cache(*hospital_ids) -> int:
     """
-    OPTIMIZED: Get both comprehensive analytics AND summary with single data fetch
-    This avoids duplicate expensive database calls
+    Drop cached analytics of the given hospitals and the unscoped (all-hospital)
+    results. With no hospital ids every entry is dropped. Returns how many
+    entries were dropped.
     """
-    supabase = get_supabase()
-    
-    # SINGLE DATABASE CALL - fetch data once and reuse
-    accident_data = _get_filtered_accident_data(supabase, filters)
-    
-    # Generate all analytics using the same data
-    accident_chars = _get_accident_characteristics(accident_data)
-    demographics = _get_demographics(accident_data)
-    medical_factors = _get_medical_factors(accident_data)
-    financial_impact = _get_financial_impact(accident_data)
-    temporal_trends = _get_temporal_trends(accident_data)
-    data_quality = _get_data_quality(accident_data)
-    summary_stats = _get_summary_statistics(accident_data)
+    global _epoch
+    targets = {str(h) for h in hospital_ids if h}
+    with _generations_lock:
+        if targets:
+            for hospital_id in targets:
+                _generations[hospital_id] += 1
+            _generations[None] += 1
+        else:
+            _epoch += 1
+    if not targets:
+        dropped = len(_analytics_cache)
+        _analytics_cache.clear()
+        return dropped
+    return _analytics_cache.invalidate_where(lambda k: k[0] is None or k[0] in targets)
+
+
+def _patient_hospital_ids(supabase, patient_id) -> List[str]:
+    resp = supabase.table("Hospital_Patient").select("hospital_id").eq("patient_id", patient_id).execute()
+    return [str(r["hospital_id"]) for r in (resp.data or []) if r.get("hospital_id")]
+
+
+async def get_comprehensive_analytics_with_summary_service_async(filters: AccidentAnalyticsFilters) -> Dict[str, Any]:
+    """
+    Comprehensive analytics AND summary from a single data fetch. The RPC is
+    awaited on the pooled async client and the CPU-bound aggregation runs in
+    the threadpool so the event loop stays free.
+    """
+    key = _analytics_cache_key(filters, "full")
+    cached = _analytics_cache.get(key)
+    if cached is not None:
+        return cached
+    return await _analytics_flights.ado(key, _compute_analytics_with_summary_async, key, filters)
+
+async def _compute_analytics_with_summary_async(key: tuple, filters: AccidentAnalyticsFilters) -> Dict[str, Any]:
+    supabase = await get_async_supabase()
+    if _from_counters(filters):
+        from app.services.analytics_counters import hospital_sections_async
+        result = _analytics_result(await hospital_sections_async(supabase, str(filters.hospital_id)))
+        _analytics_cache.set(key, result)
+        return result
+
+    accident_data = await _get_filtered_accident_data_async(supabase, filters)
+    result = await run_in_threadpool(_build_analytics_with_summary, accident_data)
+    _analytics_cache.set(key, result)
+    return result
+
+def _build_analytics_with_summary(accident_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Generate all analytics and the summary from one fetched data array"""
+    # One pass over the records (or one columnar frame) feeds every section
+    return _analytics_result(_analytics_sections(accident_data))
+
+def _analytics_result(sections: Dict[str, Any]) -> Dict[str, Any]:
+    """Response model and summary from the analytics sections"""
+    summary_stats = sections['summary_stats']
     
     # Build comprehensive analytics response
     comprehensive_analytics = AccidentAnalyticsResponse(
-        accident_characteristics=accident_chars,
-        demographics=demographics,
-        medical_factors=medical_factors,
-        financial_impact=financial_impact,
-        temporal_trends=temporal_trends,
-        data_quality=data_quality,
+        accident_characteristics=sections['accident_characteristics'],
+        demographics=sections['demographics'],
+        medical_factors=sections['medical_factors'],
+        financial_impact=sections['financial_impact'],
+        temporal_trends=sections['temporal_trends'],
+        data_quality=sections['data_quality'],
         total_records=summary_stats['total_records'],
         peak_accident_hour=summary_stats['peak_hour'],
         most_common_collision=summary_stats['common_collision'],
         avg_income_impact=summary_stats['avg_income_change'],
         generated_at=datetime.now(),
-        data_period=_get_data_period(accident_data)
+        data_period=sections['data_period']
     )
     
-    # Build summary using the same data
-    summary = {
-        "total_accidents": summary_stats['total_records'],
-        "peak_accident_hour": summary_stats['peak_hour'],
-        "most_common_collision": summary_stats['common_collision'],
-        "avg_income_impact": summary_stats['avg_income_change'],
-        "generated_at": datetime.now().isoformat()
-    }
-    
     return {
         "comprehensive_analytics": comprehensive_analytics,
-        "summary": summary,
+        "summary": _summary_from_stats(summary_stats),
         "data_fetch_timestamp": datetime.now().isoformat(),
-        "total_records_processed": len(accident_data)
+        "total_records_processed": summary_stats['total_records']
     }
 
-def get_comprehensive_analytics_service(filters: AccidentAnalyticsFilters) -> AccidentAnalyticsResponse:
+async def get_comprehensive_analytics_service_async(filters: AccidentAnalyticsFilters) -> AccidentAnalyticsResponse:
     """Get comprehensive accident analytics - calls optimized function"""
-    result = get_comprehensive_analytics_with_summary_service(filters)
+    result = await get_comprehensive_analytics_with_summary_service_async(filters)
     return result["comprehensive_analytics"]
 
-def get_accident_summary_service(hospital_id: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict[str, Any]:
-    """Get accident summary - calls optimized function"""
+async def get_accident_summary_service_async(hospital_id: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict[str, Any]:
+    """Get accident summary (KPI numbers) from the summary-only pipeline"""
     filters = AccidentAnalyticsFilters(
         hospital_id=hospital_id,
         start_date=start_date,
         end_date=end_date
     )
-    result = get_comprehensive_analytics_with_summary_service(filters)
-    return result["summary"]
+    key = _analytics_cache_key(filters, "summary")
+    cached = _analytics_cache.get(key)
+    if cached is not None:
+        return cached
+    return await _analytics_flights.ado(key, _compute_summary_async, key, filters)
 
+async def _compute_summary_async(key: tuple, filters: AccidentAnalyticsFilters) -> Dict[str, Any]:
+    supabase = await get_async_supabase()
+    if _from_counters(filters):
+        from app.services.analytics_counters import hospital_sections_async
+        sections = await hospital_sections_async(supabase, str(filters.hospital_id))
+        summary = _summary_from_stats(sections['summary_stats'])
+    else:
+        accident_data = await _get_summary_data_async(supabase, filters)
+        summary = await run_in_threadpool(_build_summary, accident_data)
+    _analytics_cache.set(key, summary)
+    return summary
+
+
+# ---------------------------
+# Summary-only pipeline (KPI tiles)
+# ---------------------------
+
+# Columns the four summary numbers need
+SUMMARY_COLUMNS = Projection(
+    "analytics.summary",
+    [
+        "time of collision",
+        "Collision with",
+        "Family monthly income before accident",
+        "Family monthly income after accident",
+    ],
+)
+
+# Cleared the first time the RPC rejects a column selection on its result
+_rpc_projection_supported = True
+# PostgREST errors that mean the selection itself is unsupported: a column the
+# RPC result does not have (42703 undefined_column) or an unparsable select
+# parameter (PGRST100). Any other error is raised to the caller as is.
+SELECTION_REJECTED_CODES = {"42703", "PGRST100"}
 
-def get_filter_options_service(hospital_id: str) -> Dict[str, Any]:
-    """Get available filter options for a specific hospital - follows existing service pattern"""
-    supabase = get_supabase()
-    
-    # Step 1: Get all patient_ids for this hospital (with pagination)
-    all_patient_ids = []
-    offset = 0
-    page_size = 1000
-    
-    print(f"🏥 Getting filter options for hospital: {hospital_id}")
-    
-    while True:
-        hospital_patients_resp = (
-            supabase.table("Hospital_Patient")
-            .select("patient_id")
-            .eq("hospital_id", hospital_id)
-            .range(offset, offset + page_size - 1)
-            .execute()
-        )
-        
-        if not hospital_patients_resp.data or len(hospital_patients_resp.data) == 0:
-            break
-            
-        batch_patient_ids = [p["patient_id"] for p in hospital_patients_resp.data]
-        all_patient_ids.extend(batch_patient_ids)
-        
-        if len(hospital_patients_resp.data) < page_size:
-            break
-            
-        offset += page_size
-    
-    patient_ids = all_patient_ids
-    print(f"🎯 Filter options: Found {len(patient_ids)} patients for hospital")
 
-    if not patient_ids:
+async def _get_summary_data_async(supabase, filters: AccidentAnalyticsFilters) -> List[Dict[str, Any]]:
+    return await _get_projected_data_async(supabase, filters, SUMMARY_COLUMNS)
+
+
+def _selection_rejected(e: APIError, projection: Projection) -> bool:
+    """Whether the RPC rejected the column selection; if so, stop asking for one."""
+    global _rpc_projection_supported
+    if e.code not in SELECTION_REJECTED_CODES:
+        return False
+    _rpc_projection_supported = False
+    print(f"⚠️ Analytics RPC does not accept a column selection, {projection.name} reads all columns: {str(e)}")
+    return True
+
+
+def _get_projected_data(supabase, filters: AccidentAnalyticsFilters, projection: Projection) -> List[Dict[str, Any]]:
+    """Analytics RPC rows restricted to the projection's columns (all columns if unsupported)."""
+    params = _analytics_rpc_params(filters)
+    if _rpc_projection_supported:
+        try:
+            response = supabase.rpc("get_accident_analytics_data", params).select(projection.select).execute()
+            return projection.track(response.data or [])
+        except APIError as e:
+            if not _selection_rejected(e, projection):
+                raise
+    return _get_filtered_accident_data(supabase, filters)
+
+
+async def _get_projected_data_async(supabase, filters: AccidentAnalyticsFilters, projection: Projection) -> List[Dict[str, Any]]:
+    """Async variant of _get_projected_data"""
+    params = _analytics_rpc_params(filters)
+    if _rpc_projection_supported:
+        try:
+            response = await supabase.rpc("get_accident_analytics_data", params).select(projection.select).execute()
+            return projection.track(response.data or [])
+        except APIError as e:
+            if not _selection_rejected(e, projection):
+                raise
+    return await _get_filtered_accident_data_async(supabase, filters)
+
+
+class SummaryAccumulator:
+    """
+    Single pass over the rows for the summary numbers only: total, hourly
+    and collision counts, and the income changes. Same rules (and memoized
+    parsing) as AnalyticsAccumulator, so summary_statistics() agrees with it.
+    """
+
+    def __init__(self):
+        self._hours: Dict[Any, Optional[int]] = {}
+        self._income_changes: Dict[tuple, Optional[float]] = {}
+        self.total_records = 0
+        self.hourly_distribution = defaultdict(int)
+        self.collision_types = defaultdict(int)
+        self.income_changes: List[float] = []
+
+    def add(self, record: Dict[str, Any]) -> None:
+        self.total_records += 1
+
+        time_str = record.get('time of collision')
+        hour = self._hours.get(time_str, _MISSING)
+        if hour is _MISSING:
+            hour = self._hours[time_str] = _collision_hour(time_str)
+        if hour is not None:
+            self.hourly_distribution[hour] += 1
+
+        collision = record.get('Collision with')
+        if collision and collision != NOT_SHARED:
+            self.collision_types[collision] += 1
+
+        income_before = record.get('Family monthly income before accident')
+        income_after = record.get('Family monthly income after accident')
+        if (income_before and income_before != NOT_SHARED and
+            income_after and income_after != NOT_SHARED):
+            key = (income_before, income_after)
+            change = self._income_changes.get(key, _MISSING)
+            if change is _MISSING:
+                change = self._income_changes[key] = _income_change(income_before, income_after)
+            if change is not None:
+                self.income_changes.append(change)
+
+    def summary_statistics(self) -> Dict[str, Any]:
+        hourly = self.hourly_distribution
+        collisions = self.collision_types
         return {
-            "genders": [],
-            "ethnicities": [],
-            "collision_types": [],
-            "road_categories": [],
-            "discharge_outcomes": [],
-            "age_range": {"min": 0, "max": 100},
-            "date_range": {"min": None, "max": None}
+            'peak_hour': max(hourly.items(), key=lambda x: x[1])[0] if hourly else 0,
+            'common_collision': max(collisions.items(), key=lambda x: x[1])[0] if collisions else "Unknown",
+            'avg_income_change': sum(self.income_changes) / len(self.income_changes) if self.income_changes else 0.0,
+            'total_records': self.total_records
         }
 
-    # Step 2: Get accident data in batches
-    all_accident_data = []
-    batch_size = 100
-    
-    for i in range(0, len(patient_ids), batch_size):
-        batch_patient_ids = patient_ids[i:i + batch_size]
-        
-        try:
-            response = (
-                supabase.table("Accident Record")
-                .select("*")
-                .in_("patient_id", batch_patient_ids)
-                .execute()
-            )
-            
-            if response.data:
-                all_accident_data.extend(response.data)
-                
-        except Exception as e:
-            print(f"Error fetching filter options batch {i//batch_size + 1}: {str(e)}")
-            continue
-
-    # Step 3: Get patient data for demographics
-    patient_data_map = {}
-    if all_accident_data:
-        accident_patient_ids = list(set([acc["patient_id"] for acc in all_accident_data if acc.get("patient_id")]))
-        
-        for i in range(0, len(accident_patient_ids), 100):
-            batch_patient_ids = accident_patient_ids[i:i + 100]
-            
-            try:
-                patient_response = (
-                    supabase.table("Patient")
-                    .select('"Date of Birth","Ethnicity","Gender",patient_id')
-                    .in_("patient_id", batch_patient_ids)
-                    .execute()
-                )
-                
-                if patient_response.data:
-                    for patient in patient_response.data:
-                        patient_data_map[patient["patient_id"]] = patient
-                        
-            except Exception as e:
-                print(f"Error fetching patient data for filters: {str(e)}")
-                continue
-
-    accident_data = all_accident_data
-    
-    # Extract unique values for each filter field
-    genders = set()
-    ethnicities = set()
-    collision_types = set()
-    road_categories = set()
-    discharge_outcomes = set()
-    ages = []
-    dates = []
-    
+
+def _build_summary(accident_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    acc = SummaryAccumulator()
     for record in accident_data:
-        patient_id = record.get('patient_id')
-        patient_data = patient_data_map.get(patient_id) if patient_id else None
-        
-        if patient_data:
-            # Gender
-            gender = patient_data.get('Gender')
-            if gender:
-                genders.add(gender)
-            
-            # Ethnicity
-            ethnicity = patient_data.get('Ethnicity')
-            if ethnicity:
-                ethnicities.add(ethnicity)
-            
-            # Calculate age
-            dob = patient_data.get('Date of Birth')
-            if dob:
-                try:
-                    from datetime import datetime, date
-                    if isinstance(dob, str):
-                        birth_date = datetime.fromisoformat(dob.replace('Z', '+00:00')).date()
-                    else:
-                        birth_date = dob
-                    
-                    today = date.today()
-                    age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-                    ages.append(age)
-                except (ValueError, TypeError, AttributeError):
-                    pass
-        
-        # Collision types
-        collision = record.get('Collision with')
-        if collision and collision != 'Victim not willing to share/ Unable to respond/  Early Discharge':
-            collision_types.add(collision)
-        
-        # Road categories
-        road_category = record.get('Category of Road')
-        if road_category and road_category != 'Victim not willing to share/ Unable to respond/  Early Discharge':
-            road_categories.add(road_category)
-        
-        # Discharge outcomes
-        discharge_outcome = record.get('Discharge Outcome')
-        if discharge_outcome:
-            discharge_outcomes.add(discharge_outcome)
-        
-        # Dates
-        incident_date = record.get('incident at date')
-        if incident_date:
-            dates.append(incident_date)
-    
-    age_range = {
-        "min": min(ages) if ages else 0,
-        "max": max(ages) if ages else 100
-    }
-    
-    date_range = {
-        "min": min(dates) if dates else None,
-        "max": max(dates) if dates else None
-    }
-    
+        acc.add(record)
+    return _summary_from_stats(acc.summary_statistics())
+
+
+def _summary_from_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
     return {
-        "genders": sorted(list(genders)),
-        "ethnicities": sorted(list(ethnicities)),
-        "collision_types": sorted(list(collision_types)),
-        "road_categories": sorted(list(road_categories)),
-        "discharge_outcomes": sorted(list(discharge_outcomes)),
-        "age_range": age_range,
-        "date_range": date_range
+        "total_accidents": stats['total_records'],
+        "peak_accident_hour": stats['peak_hour'],
+        "most_common_collision": stats['common_collision'],
+        "avg_income_impact": stats['avg_income_change'],
+        "generated_at": datetime.now().isoformat()
     }
 
+
+def get_filter_options_service(hospital_id: str) -> Dict[str, Any]:
+    """
+    Filter dropdown options of a hospital: distinct genders, ethnicities,
+    collision types, road categories and discharge outcomes, and the age and
+    incident date ranges of the hospital's patients' accident records.
+    With FILTER_OPTIONS_COUNTERS they come from per-hospital value counts
+    kept current by accident/transfer writes (app/services/analytics_counters.py).
+    """
+    supabase = get_supabase()
+
+    print(f"🏥 Getting filter options for hospital: {hospital_id}")
+    if FILTER_OPTIONS_COUNTERS:
+        from app.services.analytics_counters import hospital_filter_options
+        return hospital_filter_options(supabase, hospital_id)
+    return _filter_options_from_records(supabase, hospital_id)
+
+
+def _filter_options_from_records(supabase, hospital_id: str) -> Dict[str, Any]:
+    """
+    Filter options from one analytics RPC read of just the filterable columns
+    of the hospital's records (the value counts are not kept).
+    """
+    from app.services.analytics_counters import FILTER_OPTION_ROWS, FilterOptionCounters
+    rows = _get_projected_data(supabase, AccidentAnalyticsFilters(hospital_id=hospital_id), FILTER_OPTION_ROWS)
+    return FilterOptionCounters.from_rows(rows).options()
+
 from typing import List, Dict, Any
 
+def _analytics_rpc_params(filters: AccidentAnalyticsFilters) -> Dict[str, Any]:
+    return {
+        "p_hospital_id": filters.hospital_id,
+        "p_start_date": filters.start_date.isoformat() if filters.start_date else None,
+        "p_end_date": filters.end_date.isoformat() if filters.end_date else None,
+        "p_gender": filters.gender,
+        "p_age_min": filters.age_min,
+        "p_age_max": filters.age_max,
+        "p_ethnicity": filters.ethnicity,
+        "p_collision_type": filters.collision_type,
+        "p_road_category": filters.road_category,
+        "p_discharge_outcome": filters.discharge_outcome
+    }
+
 def _get_filtered_accident_data(supabase, filters: AccidentAnalyticsFilters):
     print(f"Hospital Id: {filters.hospital_id}")
     response = supabase.rpc(
         "get_accident_analytics_data",
-        {
-            "p_hospital_id": filters.hospital_id,
-            "p_start_date": filters.start_date.isoformat() if filters.start_date else None,
-            "p_end_date": filters.end_date.isoformat() if filters.end_date else None,
-            "p_gender": filters.gender,
-            "p_age_min": filters.age_min,
-            "p_age_max": filters.age_max,
-            "p_ethnicity": filters.ethnicity,
-            "p_collision_type": filters.collision_type,
-            "p_road_category": filters.road_category,
-            "p_discharge_outcome": filters.discharge_outcome
-        }
+        _analytics_rpc_params(filters)
     ).execute()
     print(f"Hospital Id: {filters.hospital_id}")
     return response.data or []
 
-def _get_accident_characteristics(accident_data: List[Dict[str, Any]]) -> AccidentCharacteristics:
-    """Get accident characteristics analysis from data array"""
-    
-    # Initialize counters
-    hourly_distribution = defaultdict(int)
-    collision_types = defaultdict(int)
-    travel_modes = defaultdict(int)
-    road_categories = defaultdict(int)
-    
-    # Process each accident record
-    for record in accident_data:
-        # Hourly distribution - extract hour from "time of collision"
+async def _get_filtered_accident_data_async(supabase, filters: AccidentAnalyticsFilters):
+    response = await supabase.rpc(
+        "get_accident_analytics_data",
+        _analytics_rpc_params(filters)
+    ).execute()
+    return response.data or []
+
+_MISSING = object()
+NOT_SHARED = 'Victim not willing to share/ Unable to respond/  Early Discharge'
+TIME_NOT_RECALLED = 'Victim Unable to recall the Time or Early Discharge'
+
+
+def _collision_hour(time_str) -> Optional[int]:
+    """Hour (0-23) of a "time of collision" value like "14:30" or "2:30 PM"."""
+    if not time_str or time_str == TIME_NOT_RECALLED:
+        return None
+    try:
+        if ':' in time_str:
+            hour = int(time_str.split(':')[0])
+            if 'PM' in time_str.upper() and hour != 12:
+                hour += 12
+            elif 'AM' in time_str.upper() and hour == 12:
+                hour = 0
+            return hour
+    except (ValueError, IndexError):
+        pass
+    return None
+
+
+def _age_of(dob, today: date) -> Optional[int]:
+    """Age on `today` of a Date of Birth value, None if unparsable."""
+    try:
+        if isinstance(dob, str):
+            birth_date = datetime.fromisoformat(dob.replace('Z', '+00:00')).date()
+        else:
+            birth_date = dob
+        return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def _age_group_of(dob, today: date) -> Optional[str]:
+    """Age group of a Date of Birth value on `today`, None if unparsable."""
+    age = _age_of(dob, today)
+    return _age_group(age) if age is not None else None
+
+
+def _month_weekday(incident_date) -> Optional[tuple]:
+    """(month 1-12, weekday 0=Monday) of an incident date, None if unparsable."""
+    try:
+        if isinstance(incident_date, str):
+            date_obj = datetime.fromisoformat(incident_date.replace('Z', '+00:00'))
+        else:
+            date_obj = incident_date
+        return date_obj.month, date_obj.weekday()
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def _income_change(income_before: str, income_after: str) -> Optional[float]:
+    """after - before of two income answers, None if either cannot be parsed."""
+    try:
+        before_val = _parse_income_range(income_before)
+        after_val = _parse_income_range(income_after)
+    except (ValueError, TypeError):
+        return None
+    if before_val is None or after_val is None:
+        return None
+    return after_val - before_val
+
+
+def _age_group(age: int) -> str:
+    if 18 <= age <= 25:
+        return '18-25'
+    if 26 <= age <= 35:
+        return '26-35'
+    if 36 <= age <= 45:
+        return '36-45'
+    if 46 <= age <= 55:
+        return '46-55'
+    if age > 55:
+        return '56+'
+    return 'Under 18'
+
+
+class AnalyticsAccumulator:
+    """
+    Single-pass aggregation of the analytics RPC rows.
+
+    add() folds one record into every distribution, average and quality
+    counter at once; the build_* methods turn the totals into the response
+    models. Averages keep their terms in row order so the results match a
+    plain sum() over the same values. Column values repeat a lot (time
+    strings, dates, income bands), so their parsed forms are memoized.
+    """
+
+    def __init__(self):
+        self.today = date.today()
+        self._hours: Dict[Any, Optional[int]] = {}
+        self._dates: Dict[Any, Optional[tuple]] = {}
+        self._age_groups: Dict[Any, Optional[str]] = {}
+        self._income_changes: Dict[tuple, Optional[float]] = {}
+        self.total_records = 0
+        # Accident characteristics
+        self.hourly_distribution = defaultdict(int)
+        self.collision_types = defaultdict(int)
+        self.travel_modes = defaultdict(int)
+        self.road_categories = defaultdict(int)
+        # Demographics
+        self.age_groups = defaultdict(int)
+        self.gender_dist = defaultdict(int)
+        self.ethnicity_dist = defaultdict(int)
+        self.education_dist = defaultdict(int)
+        self.occupation_dist = defaultdict(int)
+        # Medical / financial
+        self.outcomes_dist = defaultdict(int)
+        self.income_comparison = defaultdict(int)
+        self.family_status_dist = defaultdict(int)
+        self.insurance_claim_dist = defaultdict(int)
+        self.bystander_expenses: List[float] = []
+        self.income_changes: List[float] = []
+        # Temporal trends / data period
+        self.monthly_trends = defaultdict(int)
+        self.daily_trends = defaultdict(int)
+        self.first_date = None
+        self.last_date = None
+        # Data quality
+        self.complete_records = 0
+
+    def add(self, record: Dict[str, Any]) -> None:
+        self.total_records += 1
+
         time_str = record.get('time of collision')
-        if time_str and time_str != 'Victim Unable to recall the Time or Early Discharge':
-            try:
-                # Try to extract hour from time string (assuming format like "14:30" or "2:30 PM")
-                if ':' in time_str:
-                    hour = int(time_str.split(':')[0])
-                    if 'PM' in time_str.upper() and hour != 12:
-                        hour += 12
-                    elif 'AM' in time_str.upper() and hour == 12:
-                        hour = 0
-                    hourly_distribution[hour] += 1
-            except (ValueError, IndexError):
-                pass
-        
-        # Collision types
+        hour = self._hours.get(time_str, _MISSING)
+        if hour is _MISSING:
+            hour = self._hours[time_str] = _collision_hour(time_str)
+        if hour is not None:
+            self.hourly_distribution[hour] += 1
+
         collision = record.get('Collision with')
-        if collision and collision != 'Victim not willing to share/ Unable to respond/  Early Discharge':
-            collision_types[collision] += 1
-        
-        # Travel modes
+        if collision and collision != NOT_SHARED:
+            self.collision_types[collision] += 1
+
         travel_mode = record.get('Mode of traveling during accident')
-        if travel_mode and travel_mode not in [None, '']:
-            travel_modes[travel_mode] += 1
-        
-        # Road categories
+        if travel_mode:
+            self.travel_modes[travel_mode] += 1
+
         road_category = record.get('Category of Road')
-        if road_category and road_category != 'Victim not willing to share/ Unable to respond/  Early Discharge':
-            road_categories[road_category] += 1
-    
-    return AccidentCharacteristics(
-        hourly_distribution=dict(hourly_distribution),
-        collision_types=dict(collision_types),
-        travel_modes=dict(travel_modes),
-        road_categories=dict(road_categories)
-    )
+        if road_category and road_category != NOT_SHARED:
+            self.road_categories[road_category] += 1
 
-def _get_demographics(accident_data: List[Dict[str, Any]]) -> Demographics:
-    """Get demographic analysis from data array"""
-    
-    # Initialize counters
-    age_groups = defaultdict(int)
-    gender_dist = defaultdict(int)
-    ethnicity_dist = defaultdict(int)
-    education_dist = defaultdict(int)
-    occupation_dist = defaultdict(int)
-    
-    # Process each accident record
-    for record in accident_data:
         patient_data = record.get('patient_data')
-        #print("Patient 11")
         if patient_data:
-            # print("Patient 11")
-            # Calculate age from Date of Birth
-            dob = patient_data.get('Date of Birth')
-            if dob:
-                try:
-                    from datetime import datetime, date
-                    if isinstance(dob, str):
-                        birth_date = datetime.fromisoformat(dob.replace('Z', '+00:00')).date()
-                    else:
-                        birth_date = dob
-                    
-                    today = date.today()
-                    age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-                    
-                    # Age groups
-                    if 18 <= age <= 25:
-                        age_groups['18-25'] += 1
-                    elif 26 <= age <= 35:
-                        age_groups['26-35'] += 1
-                    elif 36 <= age <= 45:
-                        age_groups['36-45'] += 1
-                    elif 46 <= age <= 55:
-                        age_groups['46-55'] += 1
-                    elif age > 55:
-                        age_groups['56+'] += 1
-                    else:
-                        age_groups['Under 18'] += 1
-                        
-                except (ValueError, TypeError, AttributeError):
-                    pass
-            
-            # Gender distribution
-            gender = patient_data.get('Gender')
-            if gender:
-                # print("Gender:", gender)
-                gender_dist[gender] += 1
-            
-            # Ethnicity distribution
-            ethnicity = patient_data.get('Ethnicity')
-            if ethnicity:
-                ethnicity_dist[ethnicity] += 1
-            
-            # Education distribution
-            education = patient_data.get('Education Qualification')
-            if education:
-                education_dist[education] += 1
-            
-            # Occupation distribution
-            occupation = patient_data.get('Occupation')
-            if occupation:
-                occupation_dist[occupation] += 1
-    
-    # print("Age Groups:", age_groups)
-    # print("Gender Distribution:", gender_dist)
-
-    return Demographics(
-        age_groups=dict(age_groups),
-        gender_dist=dict(gender_dist),
-        ethnicity_dist=dict(ethnicity_dist),
-        education_dist=dict(education_dist),
-        occupation_dist=dict(occupation_dist)
-    )
+            self._add_patient(patient_data)
 
-def _get_medical_factors(accident_data: List[Dict[str, Any]]) -> MedicalFactors:
-    """Get medical factors analysis from data array"""
-    
-    # Initialize counters
-    outcomes_dist = defaultdict(int)
-    wash_room_access = defaultdict(int)
-    toilet_modification = defaultdict(int)
-    expenditures = []
-    
-    # Process each accident record
-    for record in accident_data:
-        # Discharge outcomes
         discharge_outcome = record.get('Discharge Outcome')
         if discharge_outcome:
-            outcomes_dist[discharge_outcome] += 1
-        
-        # Note: These fields don't exist in your schema, but keeping structure for future use
-        # You might need to add these fields or get this data from related tables
-        
-        # For now, using bystander expenditure as hospital expenditure proxy
-        bystander_exp = record.get('Bystander expenditure per day')
-        if bystander_exp and bystander_exp != '0':
-            try:
-                expenditures.append(float(bystander_exp))
-            except (ValueError, TypeError):
-                pass
-    
-    avg_hospital_expenditure = sum(expenditures) / len(expenditures) if expenditures else 0.0
-    
-    return MedicalFactors(
-        outcomes_dist=dict(outcomes_dist),
-        wash_room_access=dict(wash_room_access),
-        toilet_modification=dict(toilet_modification),
-        avg_hospital_expenditure=avg_hospital_expenditure
-    )
+            self.outcomes_dist[discharge_outcome] += 1
 
-def _get_financial_impact(accident_data: List[Dict[str, Any]]) -> FinancialImpact:
-    """Get financial impact analysis from data array"""
-    
-    # Initialize counters
-    income_comparison = defaultdict(int)
-    family_status_dist = defaultdict(int)
-    insurance_claim_dist = defaultdict(int)
-    bystander_expenses = []
-    travel_expenses = []
-    income_changes = []
-    
-    # Process each accident record
-    for record in accident_data:
-        # Income comparison
         income_before = record.get('Family monthly income before accident')
         income_after = record.get('Family monthly income after accident')
-        
-        if (income_before and income_before != 'Victim not willing to share/ Unable to respond/  Early Discharge' and
-            income_after and income_after != 'Victim not willing to share/ Unable to respond/  Early Discharge'):
-            try:
-                # Handle string values like "10000-15000" or "Above 50000"
-                before_val = _parse_income_range(income_before)
-                after_val = _parse_income_range(income_after)
-                
-                if before_val is not None and after_val is not None:
-                    change = after_val - before_val
-                    income_changes.append(change)
-                    
-                    if change > 0:
-                        income_comparison['improved'] += 1
-                    elif change == 0:
-                        income_comparison['same'] += 1
-                    else:
-                        income_comparison['decreased'] += 1
-            except (ValueError, TypeError):
-                pass
-        
-        # Family status
+        if (income_before and income_before != NOT_SHARED and
+            income_after and income_after != NOT_SHARED):
+            key = (income_before, income_after)
+            change = self._income_changes.get(key, _MISSING)
+            if change is _MISSING:
+                change = self._income_changes[key] = _income_change(income_before, income_after)
+            if change is not None:
+                self.income_changes.append(change)
+                if change > 0:
+                    self.income_comparison['improved'] += 1
+                elif change == 0:
+                    self.income_comparison['same'] += 1
+                else:
+                    self.income_comparison['decreased'] += 1
+
         family_status = record.get('Family current status')
-        if family_status and family_status != 'Victim not willing to share/ Unable to respond/  Early Discharge':
-            family_status_dist[family_status] += 1
-        
-        # Insurance
+        if family_status and family_status != NOT_SHARED:
+            self.family_status_dist[family_status] += 1
+
         vehicle_insured = record.get('vehicle insured')
-        insurance_type = record.get('vehicle insured type')
-        if vehicle_insured and vehicle_insured != 'Victim not willing to share/ Unable to respond/  Early Discharge':
-            if insurance_type and insurance_type != 'Victim not willing to share/ Unable to respond/  Early Discharge':
-                insurance_claim_dist[f"{vehicle_insured} - {insurance_type}"] += 1
+        if vehicle_insured and vehicle_insured != NOT_SHARED:
+            insurance_type = record.get('vehicle insured type')
+            if insurance_type and insurance_type != NOT_SHARED:
+                self.insurance_claim_dist[f"{vehicle_insured} - {insurance_type}"] += 1
             else:
-                insurance_claim_dist[vehicle_insured] += 1
-        
-        # Bystander expenditure
+                self.insurance_claim_dist[vehicle_insured] += 1
+
+        # Bystander expenditure (also the hospital expenditure proxy)
         bystander_exp = record.get('Bystander expenditure per day')
         if bystander_exp and bystander_exp != '0':
             try:
-                bystander_expenses.append(float(bystander_exp))
+                self.bystander_expenses.append(float(bystander_exp))
             except (ValueError, TypeError):
                 pass
-    
-    avg_income_change = sum(income_changes) / len(income_changes) if income_changes else 0.0
-    avg_bystander_exp = sum(bystander_expenses) / len(bystander_expenses) if bystander_expenses else 0.0
-    avg_travel_exp = 0.0  # No travel expense field in schema
-    
-    return FinancialImpact(
-        income_comparison=dict(income_comparison),
-        avg_income_change=avg_income_change,
-        family_status_dist=dict(family_status_dist),
-        insurance_claim_dist=dict(insurance_claim_dist),
-        avg_bystander_exp=avg_bystander_exp,
-        avg_travel_exp=avg_travel_exp
-    )
+
+        incident_date = record.get('incident at date')
+        if incident_date:
+            if self.first_date is None or incident_date < self.first_date:
+                self.first_date = incident_date
+            if self.last_date is None or incident_date > self.last_date:
+                self.last_date = incident_date
+            month_weekday = self._dates.get(incident_date, _MISSING)
+            if month_weekday is _MISSING:
+                month_weekday = self._dates[incident_date] = _month_weekday(incident_date)
+            if month_weekday is not None:
+                self.monthly_trends[month_weekday[0]] += 1
+                self.daily_trends[month_weekday[1]] += 1
+
+        # Complete = incident date, patient and patient gender present
+        patient = record.get('Patient')
+        if incident_date is not None and patient is not None and patient and patient.get('Gender') is not None:
+            self.complete_records += 1
+
+    def _add_patient(self, patient_data: Dict[str, Any]) -> None:
+        dob = patient_data.get('Date of Birth')
+        if dob:
+            group = self._age_groups.get(dob, _MISSING)
+            if group is _MISSING:
+                group = self._age_groups[dob] = _age_group_of(dob, self.today)
+            if group is not None:
+                self.age_groups[group] += 1
+
+        gender = patient_data.get('Gender')
+        if gender:
+            self.gender_dist[gender] += 1
+        ethnicity = patient_data.get('Ethnicity')
+        if ethnicity:
+            self.ethnicity_dist[ethnicity] += 1
+        education = patient_data.get('Education Qualification')
+        if education:
+            self.education_dist[education] += 1
+        occupation = patient_data.get('Occupation')
+        if occupation:
+            self.occupation_dist[occupation] += 1
+
+    # ---- results ----
+    def avg_income_change(self) -> float:
+        return sum(self.income_changes) / len(self.income_changes) if self.income_changes else 0.0
+
+    def avg_bystander_exp(self) -> float:
+        return sum(self.bystander_expenses) / len(self.bystander_expenses) if self.bystander_expenses else 0.0
+
+    def build_accident_characteristics(self) -> AccidentCharacteristics:
+        return AccidentCharacteristics(
+            hourly_distribution=dict(self.hourly_distribution),
+            collision_types=dict(self.collision_types),
+            travel_modes=dict(self.travel_modes),
+            road_categories=dict(self.road_categories)
+        )
+
+    def build_demographics(self) -> Demographics:
+        return Demographics(
+            age_groups=dict(self.age_groups),
+            gender_dist=dict(self.gender_dist),
+            ethnicity_dist=dict(self.ethnicity_dist),
+            education_dist=dict(self.education_dist),
+            occupation_dist=dict(self.occupation_dist)
+        )
+
+    def build_medical_factors(self) -> MedicalFactors:
+        # wash room / toilet fields do not exist in the schema yet
+        return MedicalFactors(
+            outcomes_dist=dict(self.outcomes_dist),
+            wash_room_access={},
+            toilet_modification={},
+            avg_hospital_expenditure=self.avg_bystander_exp()
+        )
+
+    def build_financial_impact(self) -> FinancialImpact:
+        return FinancialImpact(
+            income_comparison=dict(self.income_comparison),
+            avg_income_change=self.avg_income_change(),
+            family_status_dist=dict(self.family_status_dist),
+            insurance_claim_dist=dict(self.insurance_claim_dist),
+            avg_bystander_exp=self.avg_bystander_exp(),
+            avg_travel_exp=0.0  # No travel expense field in schema
+        )
+
+    def build_temporal_trends(self) -> TemporalTrends:
+        return TemporalTrends(
+            monthly_trends=dict(self.monthly_trends),
+            daily_trends=dict(self.daily_trends)
+        )
+
+    def build_data_quality(self) -> DataQuality:
+        total = self.total_records
+        return DataQuality(
+            quality_dist={
+                'Complete': self.complete_records,
+                'Missing/Incomplete': total - self.complete_records
+            },
+            total_records=total,
+            completion_rate=(self.complete_records / total * 100) if total > 0 else 0
+        )
+
+    def summary_statistics(self) -> Dict[str, Any]:
+        hourly = self.hourly_distribution
+        collisions = self.collision_types
+        return {
+            'peak_hour': max(hourly.items(), key=lambda x: x[1])[0] if hourly else 0,
+            'common_collision': max(collisions.items(), key=lambda x: x[1])[0] if collisions else "Unknown",
+            'avg_income_change': self.avg_income_change(),
+            'total_records': self.total_records
+        }
+
+    def data_period(self) -> Optional[Dict[str, Any]]:
+        if self.first_date is None:
+            return None
+        return {
+            'start_date': self.first_date,
+            'end_date': self.last_date,
+            'total_records': self.total_records
+        }
+
+    def sections(self) -> Dict[str, Any]:
+        """Every analytics section, keyed like the engines' shared result."""
+        return {
+            'accident_characteristics': self.build_accident_characteristics(),
+            'demographics': self.build_demographics(),
+            'medical_factors': self.build_medical_factors(),
+            'financial_impact': self.build_financial_impact(),
+            'temporal_trends': self.build_temporal_trends(),
+            'data_quality': self.build_data_quality(),
+            'summary_stats': self.summary_statistics(),
+            'data_period': self.data_period(),
+        }
+
+
+def _aggregate(accident_data) -> AnalyticsAccumulator:
+    acc = AnalyticsAccumulator()
+    for record in accident_data:
+        acc.add(record)
+    return acc
+
+
+def _analytics_sections(accident_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Analytics sections from the configured engine (ANALYTICS_ENGINE).
+    With ANALYTICS_ENGINE_VALIDATE the columnar result is compared with the
+    pure-Python one; differences are logged and the Python result is used.
+    """
+    if ANALYTICS_ENGINE != "polars":
+        return _aggregate(accident_data).sections()
+
+    from app.services.accident_analytics_polars import polars_analytics_sections, sections_mismatch
+
+    try:
+        sections = polars_analytics_sections(accident_data)
+    except Exception as e:
+        print(f"⚠️ Polars analytics failed, using Python engine: {str(e)}")
+        return _aggregate(accident_data).sections()
+
+    if ANALYTICS_ENGINE_VALIDATE:
+        expected = _aggregate(accident_data).sections()
+        mismatch = sections_mismatch(expected, sections)
+        if mismatch:
+            print(f"⚠️ Polars analytics differ from Python engine in: {mismatch}")
+            return expected
+    return sections
+
 
 def _parse_income_range(income_str: str) -> Optional[float]:
     """Parse income range strings like '10000-15000' or 'Above 50000' to average values"""
@@ -552,145 +778,3 @@ def _parse_income_range(income_str: str) -> Optional[float]:
         return float(income_str)
     except ValueError:
         return None
-
-def _get_temporal_trends(accident_data: List[Dict[str, Any]]) -> TemporalTrends:
-    """Get temporal trends analysis from data array"""
-    
-    # Initialize counters
-    monthly_trends = defaultdict(int)
-    daily_trends = defaultdict(int)
-    
-    # Process each accident record
-    for record in accident_data:
-        incident_date = record.get('incident at date')
-        if incident_date:
-            try:
-                # Parse date - handle different formats
-                if isinstance(incident_date, str):
-                    from datetime import datetime
-                    date_obj = datetime.fromisoformat(incident_date.replace('Z', '+00:00'))
-                else:
-                    date_obj = incident_date
-                
-                # Monthly trends (1-12)
-                monthly_trends[date_obj.month] += 1
-                
-                # Daily trends (0=Monday, 6=Sunday)
-                daily_trends[date_obj.weekday()] += 1
-                
-            except (ValueError, TypeError, AttributeError):
-                pass
-    
-    return TemporalTrends(
-        monthly_trends=dict(monthly_trends),
-        daily_trends=dict(daily_trends)
-    )
-
-def _get_data_quality(accident_data: List[Dict[str, Any]]) -> DataQuality:
-    """Get data quality metrics from data array"""
-    
-    total_records = len(accident_data)
-    complete_records = 0
-    
-    # Check completeness of key fields
-    for record in accident_data:
-        patient_data = record.get('Patient')
-        
-        # Check if key fields exist and are not default values
-        has_date = record.get('incident at date') is not None
-        has_patient = patient_data is not None
-        has_gender = patient_data and patient_data.get('Gender') is not None if patient_data else False
-        
-        # Count as complete if we have basic required data
-        if has_date and has_patient and has_gender:
-            complete_records += 1
-    
-    completion_rate = (complete_records / total_records * 100) if total_records > 0 else 0
-    
-    quality_dist = {
-        'Complete': complete_records,
-        'Missing/Incomplete': total_records - complete_records
-    }
-    
-    return DataQuality(
-        quality_dist=quality_dist,
-        total_records=total_records,
-        completion_rate=completion_rate
-    )
-
-def _get_summary_statistics(accident_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Get summary statistics from data array"""
-    
-    total_records = len(accident_data)
-    
-    # Peak accident hour
-    hourly_counts = defaultdict(int)
-    for record in accident_data:
-        time_str = record.get('time of collision')
-        if time_str and time_str != 'Victim Unable to recall the Time or Early Discharge':
-            try:
-                if ':' in time_str:
-                    hour = int(time_str.split(':')[0])
-                    if 'PM' in time_str.upper() and hour != 12:
-                        hour += 12
-                    elif 'AM' in time_str.upper() and hour == 12:
-                        hour = 0
-                    hourly_counts[hour] += 1
-            except (ValueError, IndexError):
-                pass
-    
-    peak_hour = max(hourly_counts.items(), key=lambda x: x[1])[0] if hourly_counts else 0
-    
-    # Most common collision type
-    collision_counts = defaultdict(int)
-    for record in accident_data:
-        collision = record.get('Collision with')
-        if collision and collision != 'Victim not willing to share/ Unable to respond/  Early Discharge':
-            collision_counts[collision] += 1
-    
-    common_collision = max(collision_counts.items(), key=lambda x: x[1])[0] if collision_counts else "Unknown"
-    
-    # Average income change
-    income_changes = []
-    for record in accident_data:
-        income_before = record.get('Family monthly income before accident')
-        income_after = record.get('Family monthly income after accident')
-        
-        if (income_before and income_before != 'Victim not willing to share/ Unable to respond/  Early Discharge' and
-            income_after and income_after != 'Victim not willing to share/ Unable to respond/  Early Discharge'):
-            try:
-                before_val = _parse_income_range(income_before)
-                after_val = _parse_income_range(income_after)
-                
-                if before_val is not None and after_val is not None:
-                    change = after_val - before_val
-                    income_changes.append(change)
-            except (ValueError, TypeError):
-                pass
-    
-    avg_income_change = sum(income_changes) / len(income_changes) if income_changes else 0.0
-    
-    return {
-        'peak_hour': peak_hour,
-        'common_collision': common_collision,
-        'avg_income_change': avg_income_change,
-        'total_records': total_records
-    }
-
-def _get_data_period(accident_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Get the data period information from data array"""
-    
-    dates = []
-    for record in accident_data:
-        incident_date = record.get('incident at date')
-        if incident_date:
-            dates.append(incident_date)
-    
-    if dates:
-        return {
-            'start_date': min(dates),
-            'end_date': max(dates),
-            'total_records': len(accident_data)
-        }
-    
-    return None
\ No newline at end of file
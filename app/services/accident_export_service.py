@@ -0,0 +1,245 @@
+# app/services/accident_export_service.py
+"""
+Streaming export of Accident Record (with injuries and treatments).
+
+Records are read with keyset pages; each page gets its children attached and
+is serialized into one chunk (NDJSON lines, CSV rows or one Parquet row
+group) before the next page is requested. The response body is an async
+generator, so the next page is only fetched once the client has taken the
+previous chunk: server memory stays at about one page whatever the size of
+the extract.
+
+The extract has every column of the table, as the startup schema check read
+them (or as read on the first export); when the schema cannot be read the
+records are selected with "*" and the columns of the first page are used.
+"""
+import asyncio
+import csv
+import io
+import json
+import os
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.db import fetch_table_columns, get_async_supabase
+from app.services.accident_service import (
+    ACCIDENT_RECORD_LIST,
+    TABLE,
+    _accident_list_query,
+    _attach_children,
+    _load_injuries_async,
+    _load_treatments_async,
+    _managing_nurse_ids_async,
+)
+from app.utils.pagination import akeyset_pages, quote_column
+from app.utils.projections import record_schema, schema_columns
+
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Flat (CSV / Parquet) layout: record columns, then children as JSON arrays
+CHILD_COLUMNS = ["injuries", "treatments"]
+
+Rows = List[Dict[str, Any]]
+
+
+async def _record_columns() -> Optional[List[str]]:
+    """Every Accident Record column, or None when the schema cannot be read."""
+    columns = schema_columns(TABLE)
+    if columns is None:
+        try:
+            record_schema(await asyncio.to_thread(fetch_table_columns))
+        except Exception as e:
+            print(f"⚠️ Export: table columns unavailable, selecting *: {str(e)}")
+            return None
+        columns = schema_columns(TABLE)
+    return columns
+
+
+async def _iter_record_pages(
+    columns: Optional[List[str]],
+    *,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    severity: Optional[str] = None,
+    hospital_id: Optional[str] = None,
+    completed: Optional[bool] = None,
+) -> AsyncIterator[Rows]:
+    """Keyset pages of accident records with injuries and treatments attached."""
+    supabase = await get_async_supabase()
+    nurse_ids = await _managing_nurse_ids_async(supabase, hospital_id)
+    if nurse_ids == []:
+        return
+
+    def build_query():
+        return _accident_list_query(
+            supabase,
+            start_date=start_date,
+            end_date=end_date,
+            severity=severity,
+            completed=completed,
+            nurse_ids=nurse_ids,
+            columns=", ".join(quote_column(c) for c in columns) if columns else "*",
+        )
+
+    async for records in akeyset_pages(build_query, "accident_id", page_size=EXPORT_PAGE_SIZE):
+        accident_ids = [r["accident_id"] for r in records if r.get("accident_id")]
+        injuries, treatments = await asyncio.gather(
+            _load_injuries_async(supabase, accident_ids),
+            _load_treatments_async(supabase, accident_ids),
+        )
+        _attach_children(records, injuries, treatments)
+        yield records
+
+
+def _json(value: Any) -> str:
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+def _flat_row(record: Dict[str, Any], columns: List[str]) -> List[Any]:
+    row = [record.get(c) for c in columns]
+    row.append(_json(record.get("injuries") or []))
+    row.append(_json(record.get("treatments") or []))
+    return row
+
+
+# ---------------------------
+# Serializers (one chunk per page)
+# ---------------------------
+
+async def _ndjson_chunks(pages: AsyncIterator[Rows], columns: List[str]) -> AsyncIterator[bytes]:
+    async for records in pages:
+        yield "".join(_json(r) + "\n" for r in records).encode("utf-8")
+
+
+async def _csv_chunks(pages: AsyncIterator[Rows], columns: List[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns + CHILD_COLUMNS)
+    async for records in pages:
+        for record in records:
+            writer.writerow(["" if v is None else v for v in _flat_row(record, columns)])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file for ParquetWriter whose bytes are handed out with drain()."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        chunk = b"".join(self._chunks)
+        self._chunks.clear()
+        return chunk
+
+
+async def _parquet_chunks(pages: AsyncIterator[Rows], columns: List[str]) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Fixed schema so every row group matches: text columns, Completed as bool
+    flat_columns = columns + CHILD_COLUMNS
+    schema = pa.schema([
+        pa.field(c, pa.bool_() if c == "Completed" else pa.string())
+        for c in flat_columns
+    ])
+    bool_columns = {i for i, c in enumerate(flat_columns) if c == "Completed"}
+
+    def cell(i, v):
+        if v is None:
+            return None
+        if i in bool_columns:
+            return bool(v)
+        return v if isinstance(v, str) else str(v)
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        async for records in pages:
+            rows = [_flat_row(r, columns) for r in records]
+            arrays = [[cell(i, row[i]) for row in rows] for i in range(len(flat_columns))]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    # Footer
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+_SERIALIZERS = {
+    "ndjson": _ndjson_chunks,
+    "csv": _csv_chunks,
+    "parquet": _parquet_chunks,
+}
+
+
+async def _prepend(first: Optional[Rows], pages: AsyncIterator[Rows]) -> AsyncIterator[Rows]:
+    if first is not None:
+        yield first
+    async for records in pages:
+        yield records
+
+
+async def _export_chunks(export_format: str, filters: Dict[str, Any]) -> AsyncIterator[bytes]:
+    columns = await _record_columns()
+    pages = _iter_record_pages(columns, **filters)
+    if columns is None:
+        # select *: the first page tells the columns
+        first = await anext(pages, None)
+        columns = (
+            [c for c in first[0] if c not in CHILD_COLUMNS] if first else list(ACCIDENT_RECORD_LIST.columns)
+        )
+        pages = _prepend(first, pages)
+    async for chunk in _SERIALIZERS[export_format](pages, columns):
+        yield chunk
+
+
+def export_accident_records_service(
+    export_format: str = "ndjson",
+    *,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    severity: Optional[str] = None,
+    hospital_id: Optional[str] = None,
+    completed: Optional[bool] = None,
+) -> AsyncIterator[bytes]:
+    """Async byte stream of the filtered accident records in the given format."""
+    return _export_chunks(
+        export_format,
+        {
+            "start_date": start_date,
+            "end_date": end_date,
+            "severity": severity,
+            "hospital_id": hospital_id,
+            "completed": completed,
+        },
+    )
@@ -1,13 +1,19 @@
+import asyncio
 from fastapi import HTTPException
 from fastapi.encoders import jsonable_encoder
-from app.db import get_supabase
-from app.models.accident import AccidentRecordCreate, AccidentRecordUpdate
-from typing import Dict, Any, List, Set
+from app.db import get_supabase, get_async_supabase
+from app.models.accident import AccidentRecordCreate, AccidentRecordUpdate, AccidentRecordOut
+from app.utils.loaders import get_loaders
+from app.utils.projections import Projection, model_columns
+from app.utils.pagination import akeyset_page, encode_cursor, decode_cursor
+from typing import Dict, Any, List, Optional, Set
+from datetime import date
 from app.services.injuries_service import (
     bulk_upsert as injuries_bulk_upsert,
     list_injuries as injuries_list,
     delete_injury as injuries_delete,
 )
+from app.services.analytics_counters import AccidentChange
 from app.services.treatments_service import (
     bulk_upsert as treatments_bulk_upsert,
     delete_treatment as treatments_delete,
@@ -52,6 +58,9 @@ def create_accident_record_service(accident: AccidentRecordCreate, user):
     injuries = payload.pop("injuries", None)
     treatments = payload.pop("treatments", None)
 
+    # Analytics of the patient's hospitals are updated once the record exists
+    analytics_change = AccidentChange(supabase, payload.get("patient_id"))
+
     # Create the base accident record (let DB defaults fill Created_on/Completed/Severity)
     resp = supabase.table(TABLE).insert(payload).execute()
     if not resp.data:
@@ -83,6 +92,7 @@ def create_accident_record_service(accident: AccidentRecordCreate, user):
         else:
             rec["treatments"] = []
 
+        analytics_change.commit(accident_id)
         return rec
 
     except Exception as e:
@@ -141,6 +151,9 @@ def edit_accident_record_service(accident_id: str, accident: AccidentRecordUpdat
 
     payload = _empty_strings_to_unknown(payload)
 
+    # Analytics row of the record before the update (for counter deltas)
+    analytics_change = AccidentChange(supabase, rec.get("patient_id"), accident_id)
+
     # 3) Update the accident record if needed
     if payload:
         resp = (
@@ -229,16 +242,115 @@ def edit_accident_record_service(accident_id: str, accident: AccidentRecordUpdat
 
         rec["treatments"] = treatments_list(accident_id)
 
+    analytics_change.commit(accident_id)
     return rec
 
-def get_all_accident_records_service():
-    supabase = get_supabase()
-    resp = supabase.table(TABLE).select("*").execute()
-    return resp.data or []
+# Columns of AccidentRecordOut (children and managed_by_name are not columns)
+ACCIDENT_RECORD_LIST = Projection(
+    "accident_records.list",
+    model_columns(AccidentRecordOut, exclude=("injuries", "treatments", "managed_by_name")),
+    table=TABLE,
+)
 
-def get_accident_record_by_id_service(accident_id: str):
-    supabase = get_supabase()
-    resp = supabase.table(TABLE).select("*").eq("accident_id", accident_id).single().execute()
+# GET /accidents page size bounds
+ACCIDENT_PAGE_DEFAULT = 50
+ACCIDENT_PAGE_MAX = 500
+
+async def _managing_nurse_ids_async(supabase, hospital_id: Optional[str]) -> Optional[List[str]]:
+    """user_ids of a hospital's nurses (records are managed by nurses); None when not filtering."""
+    if not hospital_id:
+        return None
+    nurses = await supabase.table("Nurse").select("user_id").eq("hospital_id", hospital_id).execute()
+    return [n["user_id"] for n in (nurses.data or []) if n.get("user_id")]
+
+def _accident_list_query(
+    supabase,
+    *,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    severity: Optional[str] = None,
+    completed: Optional[bool] = None,
+    nurse_ids: Optional[List[str]] = None,
+    columns: Optional[str] = None,
+):
+    """
+    Filtered accident record query shared by the paged list and the export;
+    selects ACCIDENT_RECORD_LIST unless `columns` is given.
+    """
+    query = supabase.table(TABLE).select(columns or ACCIDENT_RECORD_LIST.select)
+    if start_date:
+        query = query.gte('"incident at date"', start_date.isoformat())
+    if end_date:
+        query = query.lte('"incident at date"', end_date.isoformat())
+    if severity:
+        query = query.eq("Severity", severity)
+    if completed is not None:
+        query = query.eq("Completed", "true" if completed else "false")
+    if nurse_ids is not None:
+        query = query.in_("managed_by", nurse_ids)
+    return query
+
+async def list_accident_records_page_service_async(
+    *,
+    limit: int = ACCIDENT_PAGE_DEFAULT,
+    cursor: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    severity: Optional[str] = None,
+    hospital_id: Optional[str] = None,
+    completed: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """
+    One keyset page of accident records, newest first (created_on desc, then
+    accident_id desc; records without created_on come last).
+    Filters: incident date range, Severity, managing hospital (the hospital of
+    the managed_by nurse) and Completed. Returns {"items", "next_cursor"}.
+    """
+    limit = max(1, min(int(limit), ACCIDENT_PAGE_MAX))
+    after = after_id = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            after, after_id = position["after"], position["id"]
+        except (ValueError, KeyError):
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    supabase = await get_async_supabase()
+
+    nurse_ids = await _managing_nurse_ids_async(supabase, hospital_id)
+    if nurse_ids == []:
+        return {"items": [], "next_cursor": None}
+
+    def build_query():
+        return _accident_list_query(
+            supabase,
+            start_date=start_date,
+            end_date=end_date,
+            severity=severity,
+            completed=completed,
+            nurse_ids=nurse_ids,
+        )
+
+    # One extra row tells whether another page exists
+    rows = await akeyset_page(
+        build_query,
+        "created_on",
+        after=after,
+        after_tiebreak=after_id,
+        tiebreak_column="accident_id",
+        descending=True,
+        nullable=True,
+        page_size=limit + 1,
+    )
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor({"after": items[-1].get("created_on"), "id": items[-1]["accident_id"]})
+    return {"items": items, "next_cursor": next_cursor}
+
+async def get_accident_record_by_id_service_async(accident_id: str):
+    supabase = await get_async_supabase()
+    resp = await supabase.table(TABLE).select("*").eq("accident_id", accident_id).single().execute()
     if not resp.data:
         raise HTTPException(status_code=404, detail="Accident record not found.")
     return resp.data
@@ -256,87 +368,10 @@ def _get_value(obj, *keys, default=None):
                 return v
     return default
 
-def get_accident_records_by_patient_service(patient_id: str, user):
-    supabase = get_supabase()
-    INJURIES_TABLE = "Injury"
-    TREATMENTS_TABLE = "Treatment"
-
-    # ---- existing user/role/hospital lookup (unchanged) ----
-    current_user_id = user.get("sub")
-    if not current_user_id:
-        current_user_id = None
-
-    current_user_row = None
-    current_role = None
-    current_nurse_hospital_id = None
-
-    if current_user_id:
-        user_resp = (
-            supabase.table("User")
-            .select("user_id, role")
-            .eq("user_id", current_user_id)
-            .single()
-            .execute()
-        )
-        current_user_row = user_resp.data
-        current_role = (current_user_row or {}).get("role")
-
-        if current_role == "nurse":
-            nurse_resp = (
-                supabase.table("Nurse")
-                .select("user_id, hospital_id")
-                .eq("user_id", current_user_id)
-                .single()
-                .execute()
-            )
-            if nurse_resp.data:
-                current_nurse_hospital_id = nurse_resp.data.get("hospital_id")
-
-    # ---- fetch accident records ----
-    resp = (
-        supabase.table(TABLE)
-        .select("*")
-        .eq("patient_id", patient_id)
-        .order("created_on", desc=True)
-        .execute()
-    )
-    records = resp.data or []
-    if not records:
-        return []
-
-    # prefill children arrays
-    for rec in records:
-        rec["injuries"] = []
-        rec["treatments"] = []
-
-    # ---- fetch all injuries in one call ----
-    accident_ids = [r.get("accident_id") for r in records if r.get("accident_id")]
-    if accident_ids:
-        inj_resp = (
-            supabase.table(INJURIES_TABLE)
-            .select("accident_id, injury_no, site_of_injury, type_of_injury, side, investigation_done, severity, investigation_done")
-            .in_("accident_id", accident_ids)
-            .order("injury_no", desc=False)
-            .execute()
-        )
-        injuries = inj_resp.data or []
-
-        by_acc_inj = {}
-        for row in injuries:
-            aid = row.get("accident_id")
-            by_acc_inj.setdefault(aid, []).append(row)
-
-        for rec in records:
-            aid = rec.get("accident_id")
-            if aid in by_acc_inj:
-                rec["injuries"] = by_acc_inj[aid]
-
-    # ---- fetch all treatments in one call ----
-    if accident_ids:
-        tr_resp = (
-            supabase.table(TREATMENTS_TABLE)
-            .select(
-                """
+INJURIES_TABLE = "Injury"
+TREATMENTS_TABLE = "Treatment"
+PATIENT_INJURY_COLUMNS = "accident_id, injury_no, site_of_injury, type_of_injury, side, investigation_done, severity, investigation_done"
+PATIENT_TREATMENT_COLUMNS = """
                 accident_id,
                 treatment_no,
                 treatment_type,
@@ -347,60 +382,64 @@ def get_accident_records_by_patient_service(patient_id: str, user):
                 reason,
                 Hospital(name)         -- 👈 pull related hospital name
                 """
-            )
-            .in_("accident_id", accident_ids)
-            .order("treatment_no", desc=False)
-            .execute()
-        )
-        treatments = tr_resp.data or []
-
-        # Flatten Hospital(name) → hospital_name for the frontend
-        for row in treatments:
-            row["hospital_name"] = (row.get("Hospital") or {}).get("name")
-            row.pop("Hospital", None)
-
-        by_acc_tr = {}
-        for row in treatments:
-            aid = row.get("accident_id")
-            by_acc_tr.setdefault(aid, []).append(row)
-
-        for rec in records:
-            aid = rec.get("accident_id")
-            if aid in by_acc_tr:
-                rec["treatments"] = by_acc_tr[aid]
-
-    # ---- existing managed_by_name enrichment (unchanged) ----
-    managed_ids = list({rec.get("managed_by") for rec in records if rec.get("managed_by")})
-    if not managed_ids:
-        return records
-
-    users_resp = (
-        supabase.table("User")
-        .select("user_id, name")
-        .in_("user_id", managed_ids)
+
+async def _load_injuries_async(supabase, accident_ids):
+    if not accident_ids:
+        return []
+    resp = await (
+        supabase.table(INJURIES_TABLE)
+        .select(PATIENT_INJURY_COLUMNS)
+        .in_("accident_id", accident_ids)
+        .order("injury_no", desc=False)
         .execute()
     )
-    users = {u["user_id"]: u.get("name") for u in (users_resp.data or [])}
+    return resp.data or []
 
-    nurses_resp = (
-        supabase.table("Nurse")
-        .select("user_id, hospital_id")
-        .in_("user_id", managed_ids)
+async def _load_treatments_async(supabase, accident_ids):
+    if not accident_ids:
+        return []
+    resp = await (
+        supabase.table(TREATMENTS_TABLE)
+        .select(PATIENT_TREATMENT_COLUMNS)
+        .in_("accident_id", accident_ids)
+        .order("treatment_no", desc=False)
         .execute()
     )
-    manager_user_to_hospital = {n["user_id"]: n.get("hospital_id") for n in (nurses_resp.data or [])}
-
-    manager_hospital_ids = list({hid for hid in manager_user_to_hospital.values() if hid})
-    hospitals = {}
-    if manager_hospital_ids:
-        hospitals_resp = (
-            supabase.table("Hospital")
-            .select("hospital_id, name")
-            .in_("hospital_id", manager_hospital_ids)
-            .execute()
-        )
-        hospitals = {h["hospital_id"]: h.get("name") for h in (hospitals_resp.data or [])}
+    return resp.data or []
+
+def _attach_children(records, injuries, treatments):
+    """Group injury/treatment rows by accident_id and attach them to their records."""
+    by_acc_inj = {}
+    for row in injuries:
+        aid = row.get("accident_id")
+        by_acc_inj.setdefault(aid, []).append(row)
+
+    # Flatten Hospital(name) → hospital_name for the frontend
+    for row in treatments:
+        row["hospital_name"] = (row.get("Hospital") or {}).get("name")
+        row.pop("Hospital", None)
+
+    by_acc_tr = {}
+    for row in treatments:
+        aid = row.get("accident_id")
+        by_acc_tr.setdefault(aid, []).append(row)
 
+    for rec in records:
+        aid = rec.get("accident_id")
+        rec["injuries"] = by_acc_inj.get(aid, [])
+        rec["treatments"] = by_acc_tr.get(aid, [])
+
+def _names_by_id(rows):
+    return {key: row.get("name") for key, row in rows.items() if row}
+
+def _hospital_ids_by_user(rows):
+    return {key: row.get("hospital_id") for key, row in rows.items() if row}
+
+def _apply_managed_by_names(records, users, manager_user_to_hospital, hospitals, current_role, current_nurse_hospital_id):
+    """
+    Fill managed_by_name. Nurses see the manager's hospital name for records
+    managed from another hospital, everybody else sees the manager's name.
+    """
     for rec in records:
         manager_id = rec.get("managed_by")
         manager_name = users.get(manager_id)
@@ -414,4 +453,71 @@ def get_accident_records_by_patient_service(patient_id: str, user):
         else:
             rec["managed_by_name"] = manager_name
 
-    return records
\ No newline at end of file
+async def get_accident_records_by_patient_service_async(patient_id: str, user):
+    """
+    Accident records of a patient with their injuries, treatments and
+    managed_by names. Lookups that do not depend on each other run concurrently:
+
+        current user role -> nurse hospital
+        accident records  -> injuries
+                          -> treatments
+                          -> manager names
+                          -> manager nurses -> manager hospitals
+
+    so the call costs roughly the longest chain instead of the sum of all queries.
+    """
+    supabase = await get_async_supabase()
+    loaders = get_loaders()
+    current_user_id = user.get("sub") or None
+
+    async def load_current_role_and_hospital():
+        if not current_user_id:
+            return None, None
+        role = ((await loaders.users.aload(current_user_id)) or {}).get("role")
+        if role != "nurse":
+            return role, None
+        return role, ((await loaders.nurses.aload(current_user_id)) or {}).get("hospital_id")
+
+    async def load_manager_names(managed_ids):
+        return _names_by_id(await loaders.users.aload_many(managed_ids))
+
+    async def load_manager_hospitals(managed_ids):
+        manager_user_to_hospital = _hospital_ids_by_user(await loaders.nurses.aload_many(managed_ids))
+        manager_hospital_ids = list({hid for hid in manager_user_to_hospital.values() if hid})
+        hospitals = _names_by_id(await loaders.hospitals.aload_many(manager_hospital_ids))
+        return manager_user_to_hospital, hospitals
+
+    async def load_records():
+        resp = await (
+            supabase.table(TABLE)
+            .select("*")
+            .eq("patient_id", patient_id)
+            .order("created_on", desc=True)
+            .execute()
+        )
+        records = resp.data or []
+        if not records:
+            return records, None
+
+        accident_ids = [r.get("accident_id") for r in records if r.get("accident_id")]
+        managed_ids = list({rec.get("managed_by") for rec in records if rec.get("managed_by")})
+        injuries, treatments, users, (manager_user_to_hospital, hospitals) = await asyncio.gather(
+            _load_injuries_async(supabase, accident_ids),
+            _load_treatments_async(supabase, accident_ids),
+            load_manager_names(managed_ids),
+            load_manager_hospitals(managed_ids),
+        )
+        _attach_children(records, injuries, treatments)
+        if not managed_ids:
+            return records, None
+        return records, (users, manager_user_to_hospital, hospitals)
+
+    (current_role, current_nurse_hospital_id), (records, managers) = await asyncio.gather(
+        load_current_role_and_hospital(),
+        load_records(),
+    )
+
+    if managers is not None:
+        users, manager_user_to_hospital, hospitals = managers
+        _apply_managed_by_names(records, users, manager_user_to_hospital, hospitals, current_role, current_nurse_hospital_id)
+    return records
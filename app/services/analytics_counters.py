@@ -0,0 +1,491 @@
+# app/services/analytics_counters.py
+"""
+Incrementally maintained analytics counters per hospital (ANALYTICS_COUNTERS=1).
+
+Every unfiltered analytics output is a counter (hourly distribution,
+collision types, age groups, ...), so a hospital's counters are built once
+from a full RPC scan and then kept current with deltas:
+
+- AccidentChange wraps create/edit of an accident record: the record's
+  analytics row is subtracted before the write and added back after it.
+- TransferChange wraps a transfer approval: when the patient becomes linked
+  to the destination hospital, their accident rows are added there.
+
+Unfiltered dashboard reads are then answered in O(categories). Counters are
+rebuilt from a full scan (reconciliation) once they are older than
+ANALYTICS_COUNTERS_RECONCILE seconds, when a delta could not be applied, or
+when a rebuild raced with a write (counters that changed between the read
+before a write and its commit are dropped); any drift found is logged.
+
+With FILTER_OPTIONS_COUNTERS=1 the filter dropdown options of a hospital
+(FilterOptionCounters: value counts of the filterable columns) are kept the
+same way, from a scan of just those columns.
+"""
+import os
+import threading
+import time
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.models.analytics import AccidentAnalyticsFilters
+from app.services.accident_analytics_service import (
+    NOT_SHARED,
+    AnalyticsAccumulator,
+    _age_of,
+    _get_filtered_accident_data_async,
+    _get_projected_data,
+    _patient_hospital_ids,
+    invalidate_analytics_cache,
+)
+from app.utils.metrics import register_metrics
+from app.utils.pagination import quote_column
+from app.utils.projections import Projection
+from app.utils.singleflight import SingleFlight
+
+ANALYTICS_COUNTERS_RECONCILE = float(os.getenv("ANALYTICS_COUNTERS_RECONCILE", 900))
+
+# Distributions of AnalyticsAccumulator that deltas add to / subtract from
+DISTRIBUTIONS = (
+    'hourly_distribution', 'collision_types', 'travel_modes', 'road_categories',
+    'age_groups', 'gender_dist', 'ethnicity_dist', 'education_dist', 'occupation_dist',
+    'outcomes_dist', 'income_comparison', 'family_status_dist', 'insurance_claim_dist',
+    'monthly_trends', 'daily_trends',
+)
+
+PATIENT_FIELDS = ['Date of Birth', 'Gender', 'Ethnicity', 'Education Qualification', 'Occupation']
+
+# One accident in the shape of a get_accident_analytics_data row
+ANALYTICS_ROW = Projection(
+    "analytics.counters",
+    [
+        'time of collision',
+        'Collision with',
+        'Mode of traveling during accident',
+        'Category of Road',
+        'Discharge Outcome',
+        'Family monthly income before accident',
+        'Family monthly income after accident',
+        'Family current status',
+        'vehicle insured',
+        'vehicle insured type',
+        'Bystander expenditure per day',
+        'incident at date',
+    ],
+    embeds=["Patient(" + ", ".join(quote_column(f) for f in PATIENT_FIELDS) + ")"],
+    key_columns=['accident_id'],
+    table="Accident Record",
+)
+
+
+class HospitalCounters(AnalyticsAccumulator):
+    """
+    AnalyticsAccumulator that can also subtract records. Averages and the data
+    period are kept as {value: count} so removing a record is exact.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.income_change_counts: Counter = Counter()
+        self.bystander_counts: Counter = Counter()
+        self.date_counts: Counter = Counter()
+        self.built_at = time.monotonic()
+        self.stale = False
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "HospitalCounters":
+        counters = cls()
+        for record in rows:
+            counters.add(record)
+            incident_date = record.get('incident at date')
+            if incident_date:
+                counters.date_counts[incident_date] += 1
+        counters.income_change_counts.update(counters.income_changes)
+        counters.bystander_counts.update(counters.bystander_expenses)
+        counters.income_changes, counters.bystander_expenses = [], []
+        return counters
+
+    def apply(self, record: Dict[str, Any], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one analytics row."""
+        one = HospitalCounters.from_rows([record])
+        for name in DISTRIBUTIONS:
+            _merge(getattr(self, name), getattr(one, name), sign, self)
+        _merge(self.income_change_counts, one.income_change_counts, sign, self)
+        _merge(self.bystander_counts, one.bystander_counts, sign, self)
+        _merge(self.date_counts, one.date_counts, sign, self)
+        self.total_records += sign * one.total_records
+        self.complete_records += sign * one.complete_records
+        if self.total_records < 0 or self.complete_records < 0:
+            self.stale = True
+
+    # ---- results (O(categories)) ----
+    def avg_income_change(self) -> float:
+        return _counted_mean(self.income_change_counts)
+
+    def avg_bystander_exp(self) -> float:
+        return _counted_mean(self.bystander_counts)
+
+    def data_period(self) -> Optional[Dict[str, Any]]:
+        if not self.date_counts:
+            return None
+        return {
+            'start_date': min(self.date_counts),
+            'end_date': max(self.date_counts),
+            'total_records': self.total_records
+        }
+
+    def drift(self, other: "HospitalCounters") -> List[str]:
+        """Names of the counters that differ from `other` (e.g. a fresh scan)."""
+        names = [n for n in DISTRIBUTIONS if dict(getattr(self, n)) != dict(getattr(other, n))]
+        for name in ('income_change_counts', 'bystander_counts', 'date_counts', 'total_records', 'complete_records'):
+            if getattr(self, name) != getattr(other, name):
+                names.append(name)
+        return names
+
+
+def _merge(target, delta, sign: int, counters: HospitalCounters) -> None:
+    for key, count in delta.items():
+        value = target[key] + sign * count
+        if value:
+            target[key] = value
+            if value < 0:
+                # Removed more than was counted (e.g. an age group moved on a birthday)
+                counters.stale = True
+        else:
+            del target[key]
+
+
+def _counted_mean(counts: Counter) -> float:
+    n = sum(counts.values())
+    return sum(value * count for value, count in counts.items()) / n if n else 0.0
+
+
+# Analytics RPC columns the filter options are computed from
+FILTER_OPTION_ROWS = Projection(
+    "analytics.filter_options",
+    ['Collision with', 'Category of Road', 'Discharge Outcome', 'incident at date', 'patient_data'],
+)
+
+
+class FilterOptionCounters:
+    """
+    How many of a hospital's records have each filter option value. Counting
+    (instead of keeping sets) lets a removed record take a value out of the
+    options once no other record has it. Ages are derived from the Date of
+    Birth values when read, so they stay right across birthdays.
+    """
+
+    FIELDS = (
+        'genders', 'ethnicities', 'birth_dates', 'collision_types',
+        'road_categories', 'discharge_outcomes', 'incident_dates',
+    )
+
+    def __init__(self):
+        for name in self.FIELDS:
+            setattr(self, name, Counter())
+        self.built_at = time.monotonic()
+        self.stale = False
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "FilterOptionCounters":
+        counters = cls()
+        for record in rows:
+            counters.apply(record, 1)
+        return counters
+
+    def apply(self, record: Dict[str, Any], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one analytics row."""
+        patient = record.get('patient_data') or {}
+        values = (
+            ('genders', patient.get('Gender')),
+            ('ethnicities', patient.get('Ethnicity')),
+            ('birth_dates', patient.get('Date of Birth')),
+            ('collision_types', record.get('Collision with')),
+            ('road_categories', record.get('Category of Road')),
+            ('discharge_outcomes', record.get('Discharge Outcome')),
+            ('incident_dates', record.get('incident at date')),
+        )
+        for name, value in values:
+            if not value or (value == NOT_SHARED and name in ('collision_types', 'road_categories')):
+                continue
+            counts = getattr(self, name)
+            count = counts[value] + sign
+            if count:
+                counts[value] = count
+                if count < 0:
+                    self.stale = True
+            else:
+                del counts[value]
+
+    def options(self) -> Dict[str, Any]:
+        today = date.today()
+        ages = [age for age in (_age_of(dob, today) for dob in self.birth_dates) if age is not None]
+        return {
+            "genders": sorted(self.genders),
+            "ethnicities": sorted(self.ethnicities),
+            "collision_types": sorted(self.collision_types),
+            "road_categories": sorted(self.road_categories),
+            "discharge_outcomes": sorted(self.discharge_outcomes),
+            "age_range": {
+                "min": min(ages) if ages else 0,
+                "max": max(ages) if ages else 100
+            },
+            "date_range": {
+                "min": min(self.incident_dates) if self.incident_dates else None,
+                "max": max(self.incident_dates) if self.incident_dates else None
+            }
+        }
+
+    def drift(self, other: "FilterOptionCounters") -> List[str]:
+        return [name for name in self.FIELDS if getattr(self, name) != getattr(other, name)]
+
+
+# ---------------------------
+# Store
+# ---------------------------
+
+_counters: Dict[str, HospitalCounters] = {}
+_filter_options: Dict[str, FilterOptionCounters] = {}
+_stores = (_counters, _filter_options)
+_deltas: Counter = Counter()  # deltas applied per hospital, to detect races with a rebuild
+_resets = 0  # bumped when every hospital's counters are dropped
+_lock = threading.Lock()
+_stats = {"reads": 0, "rebuilds": 0, "deltas": 0, "drifts": 0}
+
+
+def counters_report() -> dict:
+    with _lock:
+        return {**_stats, "hospitals": len(_counters), "filter_option_hospitals": len(_filter_options)}
+
+
+register_metrics("analytics_counters", counters_report)
+
+_filter_option_flights = SingleFlight("filter_options")
+
+
+def _current(store: Dict[str, Any], hospital_id: str):
+    with _lock:
+        _stats["reads"] += 1
+        counters = store.get(hospital_id)
+    if counters is None or counters.stale or time.monotonic() - counters.built_at > ANALYTICS_COUNTERS_RECONCILE:
+        return None
+    return counters
+
+
+def _version(hospital_id: str) -> tuple:
+    """Changes whenever a delta or drop touches the hospital (call under _lock)."""
+    return _resets, _deltas[hospital_id]
+
+
+def _install(store: Dict[str, Any], hospital_id: str, fresh, version_before: tuple):
+    with _lock:
+        _stats["rebuilds"] += 1
+        raced = _version(hospital_id) != version_before
+        previous = store.get(hospital_id)
+        if previous is not None and not previous.stale and not raced:
+            drift = previous.drift(fresh)
+            if drift:
+                _stats["drifts"] += 1
+                print(f"⚠️ {type(fresh).__name__} of hospital {hospital_id} drifted from the full scan in: {drift}")
+        if raced:
+            # A delta landed while scanning; the scan may or may not include it
+            fresh.stale = True
+        store[hospital_id] = fresh
+        return fresh
+
+
+async def hospital_sections_async(supabase, hospital_id: str) -> Dict[str, Any]:
+    """Unfiltered analytics sections of a hospital from its counters."""
+    counters = _current(_counters, hospital_id)
+    if counters is None:
+        with _lock:
+            version_before = _version(hospital_id)
+        rows = await _get_filtered_accident_data_async(supabase, AccidentAnalyticsFilters(hospital_id=hospital_id))
+        fresh = await run_in_threadpool(HospitalCounters.from_rows, rows)
+        counters = _install(_counters, hospital_id, fresh, version_before)
+    with _lock:
+        return counters.sections()
+
+
+def hospital_filter_options(supabase, hospital_id: str) -> Dict[str, Any]:
+    """Filter options of a hospital from its value counts (scanned on first use)."""
+    options = _current(_filter_options, hospital_id)
+    if options is None:
+        options = _filter_option_flights.do(hospital_id, _scan_filter_options, supabase, hospital_id)
+    with _lock:
+        return options.options()
+
+
+def _scan_filter_options(supabase, hospital_id: str) -> FilterOptionCounters:
+    with _lock:
+        version_before = _version(hospital_id)
+    rows = _get_projected_data(supabase, AccidentAnalyticsFilters(hospital_id=hospital_id), FILTER_OPTION_ROWS)
+    return _install(_filter_options, hospital_id, FilterOptionCounters.from_rows(rows), version_before)
+
+
+def _held(hospital_ids: Iterable[str]) -> Dict[str, tuple]:
+    """The counter objects (one per store, None if absent) of the hospitals that have any."""
+    with _lock:
+        return {
+            h: tuple(store.get(h) for store in _stores)
+            for h in hospital_ids if any(h in store for store in _stores)
+        }
+
+
+def _drop(hospital_ids: Optional[Iterable[str]] = None) -> None:
+    """Forget counters (all when hospital_ids is None); they are rebuilt on next read."""
+    global _resets
+    with _lock:
+        if hospital_ids is None:
+            for store in _stores:
+                store.clear()
+            _resets += 1
+            return
+        for hospital_id in hospital_ids:
+            for store in _stores:
+                store.pop(hospital_id, None)
+            _deltas[hospital_id] += 1
+
+
+def _apply_change(hospital_ids: Iterable[str], held: Dict[str, tuple],
+                  before: List[Dict[str, Any]], after: List[Dict[str, Any]]) -> None:
+    """
+    Replace the `before` rows by the `after` rows in the counters `held` from
+    before the write. Counters built or rebuilt since then may or may not
+    include the write, so those are dropped (and rebuilt on next read).
+    """
+    with _lock:
+        for hospital_id in hospital_ids:
+            expected = held.get(hospital_id) or (None,) * len(_stores)
+            touched = applied = False
+            for store, counters in zip(_stores, expected):
+                current = store.get(hospital_id)
+                if current is None:
+                    continue
+                touched = True
+                if current is not counters:
+                    del store[hospital_id]
+                    continue
+                for record in before:
+                    current.apply(record, -1)
+                for record in after:
+                    current.apply(record, 1)
+                applied = True
+            if touched:
+                _deltas[hospital_id] += 1
+            if applied:
+                _stats["deltas"] += len(before) + len(after)
+
+
+def _analytics_rows(supabase, column: str, value) -> List[Dict[str, Any]]:
+    """Accident rows (by `column` = value) shaped like the analytics RPC rows."""
+    resp = supabase.table("Accident Record").select(ANALYTICS_ROW.select).eq(column, value).execute()
+    return [_as_analytics_row(row) for row in resp.data or []]
+
+
+def _as_analytics_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A copy of an Accident Record row with the Patient embed turned into the
+    RPC's patient fields. The row itself is left alone (it may be a tracked
+    projection row or shared with other consumers).
+    """
+    patient = row.get('Patient')
+    if isinstance(patient, list):
+        patient = patient[0] if patient else None
+    record = row.copy()
+    record['patient_data'] = patient
+    record['Patient'] = {'Gender': patient.get('Gender')} if patient else None
+    return record
+
+
+class AccidentChange:
+    """
+    Keeps analytics current across a create/edit/delete of one accident record:
+
+        change = AccidentChange(supabase, patient_id, accident_id)  # before the write
+        ...write...
+        change.commit(accident_id)                                  # after it
+
+    commit() invalidates the cached analytics of the patient's hospitals and,
+    in the counters held before the write, replaces the record's old row by
+    its new one (none after a delete).
+    """
+
+    def __init__(self, supabase, patient_id, accident_id: Optional[str] = None):
+        self.supabase = supabase
+        self.hospital_ids: Optional[List[str]] = None
+        self.held: Dict[str, tuple] = {}
+        self.before: List[Dict[str, Any]] = []
+        try:
+            self.hospital_ids = _patient_hospital_ids(supabase, patient_id) if patient_id else None
+            self.held = _held(self.hospital_ids or [])
+            if accident_id and self.held:
+                self.before = _analytics_rows(supabase, "accident_id", accident_id)
+        except Exception as e:
+            print(f"⚠️ Could not read analytics state of patient {patient_id}: {str(e)}")
+            self.hospital_ids = None
+
+    def commit(self, accident_id: Optional[str] = None) -> None:
+        if self.hospital_ids is None:
+            # Hospitals unknown: forget everything rather than serve stale numbers
+            invalidate_analytics_cache()
+            _drop()
+            return
+        invalidate_analytics_cache(*self.hospital_ids)
+        after: List[Dict[str, Any]] = []
+        if self.held and accident_id:
+            try:
+                after = _analytics_rows(self.supabase, "accident_id", accident_id)
+            except Exception as e:
+                print(f"⚠️ Could not read accident {accident_id} for analytics counters: {str(e)}")
+                _drop(self.hospital_ids)
+                return
+        _apply_change(self.hospital_ids, self.held, self.before, after)
+
+
+class TransferChange:
+    """
+    Keeps analytics current across a transfer approval. Approval links the
+    patient to the destination hospital, whose analytics then include every
+    accident of the patient; the source hospital keeps its link.
+    """
+
+    def __init__(self, supabase, accident_id: Optional[str], from_hospital, to_hospital):
+        self.supabase = supabase
+        self.hospital_ids = [str(h) for h in (from_hospital, to_hospital) if h]
+        self.to_hospital = str(to_hospital) if to_hospital else None
+        self.held = _held([self.to_hospital]) if self.to_hospital else {}
+        self.patient_id = None
+        self.newly_linked = False
+        self.failed = False
+        if not self.held:
+            return
+        try:
+            accident = (
+                supabase.table("Accident Record").select("patient_id")
+                .eq("accident_id", accident_id).limit(1).execute()
+            )
+            self.patient_id = (accident.data or [{}])[0].get("patient_id")
+            self.newly_linked = bool(self.patient_id) and self.to_hospital not in _patient_hospital_ids(supabase, self.patient_id)
+        except Exception as e:
+            print(f"⚠️ Could not read analytics state of transfer: {str(e)}")
+            self.failed = True
+
+    def commit(self) -> None:
+        invalidate_analytics_cache(*self.hospital_ids)
+        if not self.to_hospital:
+            return
+        if self.failed:
+            _drop([self.to_hospital])
+            return
+        rows: List[Dict[str, Any]] = []
+        if self.newly_linked:
+            try:
+                rows = _analytics_rows(self.supabase, "patient_id", self.patient_id)
+            except Exception as e:
+                print(f"⚠️ Could not read accidents of patient {self.patient_id} for analytics counters: {str(e)}")
+                _drop([self.to_hospital])
+                return
+        _apply_change([self.to_hospital], self.held, [], rows)
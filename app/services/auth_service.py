@@ -1,30 +1,53 @@
 from fastapi import HTTPException
-from app.db import get_supabase
+from app.db import get_supabase, get_async_supabase
 from postgrest.exceptions import APIError
 from app.models.user import UserIn, UserLogin
-from app.utils.auth import hash_password, verify_password, create_access_token, create_refresh_token
+from app.auth.hospital_dependency import remember_user_hospital
+from app.utils.auth import hash_password_async, verify_password_async, create_access_token, create_refresh_token, hospital_claims
 
 
 
 
 # Role-specific registration functions
-def register_nurse_service(user: UserIn):
-    return register_user_service(user, "nurse")
+async def register_nurse_service(user: UserIn):
+    return await register_user_service(user, "nurse")
 
-def register_doctor_service(user: UserIn):
-    return register_user_service(user, "doctor")
+async def register_doctor_service(user: UserIn):
+    return await register_user_service(user, "doctor")
 
-def register_hospital_administrator_service(user: UserIn):
-    return register_user_service(user, "hospital_administrator")
+async def register_hospital_administrator_service(user: UserIn):
+    return await register_user_service(user, "hospital_administrator")
 
-def register_government_service(user: UserIn):
-    return register_user_service(user, "government_personnel")
+async def register_government_service(user: UserIn):
+    return await register_user_service(user, "government_personnel")
+
+
+# Role -> staff table that holds the user's hospital assignment
+STAFF_TABLES = {
+    "nurse": "Nurse",
+    "doctor": "Doctor",
+    "hospital_administrator": "Hospital_Administrator",
+}
+
+# One round-trip: the user row plus every possible hospital assignment,
+# embedded through the staff tables' FKs to User and Hospital
+LOGIN_SELECT = "user_id, email, name, role, password, " + ", ".join(
+    f"{table}(hospital_id, Hospital(name))" for table in STAFF_TABLES.values()
+)
+
+
+def _staff_assignment(user: dict):
+    """The embedded staff row of the user's role ({hospital_id, Hospital}) or None."""
+    embedded = user.get(STAFF_TABLES.get(user.get("role"), ""))
+    if isinstance(embedded, list):
+        embedded = embedded[0] if embedded else None
+    return embedded or None
 
 
 # Login function
-def login_user_service(credentials: UserLogin):
-    supabase = get_supabase()
-    resp = supabase.table("User").select("*").eq("email", credentials.email).execute()
+async def login_user_service(credentials: UserLogin):
+    supabase = await get_async_supabase()
+    resp = await supabase.table("User").select(LOGIN_SELECT).eq("email", credentials.email).execute()
     data = handle_response(resp)
 
     if not data:
@@ -33,35 +56,24 @@ def login_user_service(credentials: UserLogin):
     user = data[0]
 
     # Check hashed password
-    if not verify_password(credentials.password, user["password"]):
+    # bcrypt runs on its own bounded executor, not in the request path
+    if not await verify_password_async(credentials.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     flag = False
-    # Check role-specific tables for hosputal information
-    try:
-        if user["role"] not in ["government_personnel"]:
-            STAFF_TABLE = ""
-            flag = True
-            if user["role"] in ["nurse"]:
-                STAFF_TABLE = "Nurse"
-            elif user["role"] in ["doctor"]:
-                STAFF_TABLE = "Doctor"
-            elif user["role"] in ["hospital_administrator"]:
-                STAFF_TABLE = "Hospital_Administrator"
-            resp = (
-                supabase.table(STAFF_TABLE)
-                .select("hospital_id, Hospital(name)")   # join to Hospital via FK
-                .eq("user_id", user["user_id"])
-                .single()
-                .execute()
-            )
-            data = handle_response(resp)
-            if not data:
-                raise HTTPException(status_code=401, detail="You are not assigned to any hospital. Please contact an Administrator.")
-    except APIError as e:
-        raise HTTPException(status_code=401, detail="You are not assigned to any hospital. Please contact an Administrator.")
+    # Check role-specific assignment for hospital information (already embedded)
+    if user["role"] not in ["government_personnel"]:
+        flag = True
+        data = _staff_assignment(user)
+        if not data:
+            raise HTTPException(status_code=401, detail="You are not assigned to any hospital. Please contact an Administrator.")
+        # Warm the user -> hospital cache used by get_user_hospital_id
+        remember_user_hospital(user["user_id"], user["role"], data.get("hospital_id"))
     # Create tokens
     token_data = {"sub": str(user["user_id"]), "email": user["email"], "role": user["role"], "name": user["name"]   }
+    if flag:
+        # Signed hospital claim (only when JWT_HOSPITAL_CLAIMS is enabled)
+        token_data.update(hospital_claims(data.get("hospital_id"), (data.get("Hospital") or {}).get("name")))
     access_token = create_access_token(token_data)
     refresh_token = create_refresh_token(token_data)
     if flag:
@@ -100,14 +112,14 @@ def list_users_service(limit: int, offset: int):
     data = handle_response(resp)
     return data or []
 
-def register_user_service(user: UserIn, role: str | None = None):
-    supabase = get_supabase()
-    hashed_pw = hash_password(user.password)
+async def register_user_service(user: UserIn, role: str | None = None):
+    supabase = await get_async_supabase()
+    hashed_pw = await hash_password_async(user.password)
 
     user_role = role if role else user.role
 
     try:
-        resp = supabase.table("User").insert({
+        resp = await supabase.table("User").insert({
             "email": user.email,
             "password": hashed_pw,
             "name": user.name,
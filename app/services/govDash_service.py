@@ -7,41 +7,90 @@ from app.models.gov_dash import (
     AccidentAnalyticsResponse1
 )
 from app.db import get_supabase
+from app.utils.pagination import prefetch_keyset_pages
+from app.utils.projections import Projection
+from app.utils.singleflight import SingleFlight
 from supabase import Client
+import os
+
+# "python": page through the rows and count here; "rpc": group in SQL with
+# get_accident_trend_buckets (falls back to "python" if the call fails)
+TRENDS_MODE = os.getenv("TRENDS_MODE", "python").lower()
+
+
+TREND_COLUMNS = Projection(
+    "trends.accidents", ["incident at date", "Severity"], key_columns=["accident_id"], table="Accident Record"
+)
+
+
+# Dashboards opened at the same moment share one scan per key
+_trend_flights = SingleFlight("gov_trends")
+_comprehensive_flights = SingleFlight("gov_comprehensive")
 
 
 def get_accident_trends_service():
+    from app.services.gov_cube import current_cube
+    cube = current_cube()
+    if cube is not None:
+        return cube.trends()
+    return _trend_flights.do("all", _accident_trends)
+
+
+def _accident_trends():
+    if TRENDS_MODE == "rpc":
+        try:
+            return _accident_trends_rpc()
+        except Exception as e:
+            print(f"⚠️ Trend buckets RPC failed, scanning accident records instead: {str(e)}")
+    return _accident_trends_scan()
+
+
+def _accident_trends_rpc():
+    """Month / year / weekday buckets grouped in SQL (sql/get_accident_trend_buckets.sql)."""
     supabase = get_supabase()
-    
-    # Fetch all data using pagination
-    all_data = []
-    offset = 0
-    limit = 1000  # Supabase max limit per page
-    
-    while True:
-        resp = supabase.table("Accident Record").select('"incident at date","Severity"').range(offset, offset + limit - 1).execute()
-        
-        if not resp.data:
-            break
-            
-        all_data.extend(resp.data)
-        offset += limit
-
-    if not all_data:
-        return {
-            "monthly_counts": {},
-            "yearly_counts": {},
-            "day_of_week_counts": {}
+    response = supabase.rpc("get_accident_trend_buckets", {}).execute()
+    return _trends_from_buckets(response.data or [])
+
+
+# RPC bucket_type -> response key
+TREND_BUCKETS = {
+    "month": "monthly_counts",
+    "year": "yearly_counts",
+    "weekday": "day_of_week_counts",
+}
+
+
+def _trends_from_buckets(buckets: List[Dict[str, Any]]) -> Dict[str, Any]:
+    trends = {name: {} for name in TREND_BUCKETS.values()}
+    for b in buckets:
+        trends[TREND_BUCKETS[b["bucket_type"]]][b["bucket"]] = {
+            "total": int(b["total"]),
+            "serious": int(b["serious"]),
         }
+    return trends
 
-    from collections import defaultdict
+
+def _accident_trends_scan():
+    supabase = get_supabase()
+
+    # Scan with keyset pagination (by accident_id), several pages at a time;
+    # each row is folded into the counters and the page is dropped afterwards
+    pages = prefetch_keyset_pages(
+        lambda: supabase.table("Accident Record").select(TREND_COLUMNS.select),
+        "accident_id",
+    )
+    return _trend_counts(row for page in pages for row in TREND_COLUMNS.track(page))
+
+
+def _trend_counts(rows) -> Dict[str, Any]:
+    """Totals and serious (Severity = 'S') counts per month, year and weekday."""
     import datetime
 
     monthly_counts = defaultdict(lambda: {"total": 0, "serious": 0})
     yearly_counts = defaultdict(lambda: {"total": 0, "serious": 0})
     day_of_week_counts = defaultdict(lambda: {"total": 0, "serious": 0})
 
-    for row in all_data:
+    for row in rows:
         date_str = row.get("incident at date")
         severity = row.get("Severity")
 
@@ -153,10 +202,20 @@ import traceback
 
 def get_comprehensive_analytics_service1(filters: AccidentAnalyticsFilters1) -> AccidentAnalyticsResponse1:
     """Get comprehensive accident analytics filtered by date and severity"""
-
-    supabase: Client = get_supabase()
-
-    columns = [
+    from app.services.gov_cube import current_cube
+    cube = current_cube()
+    if cube is not None:
+        return AccidentAnalyticsResponse1(
+            results=cube.breakdown(str(filters.start_date), str(filters.end_date), filters.severity)
+        )
+    key = (str(filters.start_date), str(filters.end_date), filters.severity)
+    return _comprehensive_flights.do(key, _comprehensive_analytics1, filters)
+
+
+# Columns broken down by get_comprehensive_analytics_service1
+COMPREHENSIVE_COLUMNS = Projection(
+    "gov.comprehensive",
+    [
         "time of collision",
         "Collision with",
         "Road Condition",
@@ -169,42 +228,38 @@ def get_comprehensive_analytics_service1(filters: AccidentAnalyticsFilters1) ->
         "Discharge Outcome",
         "First aid given at seen",
         "Mode of traveling during accident",
+    ],
+    key_columns=["accident_id"],
+    table="Accident Record",
+)
 
-    ]
-
-    results = {}
-
-    for col in columns:
-        try:
-            print(f"Querying {col}...")
-            
-            # Properly quote column names with spaces for SQL
-            quoted_col = f'"{col}"'
-            
-            # Fetch filtered records  
-            response = supabase.table("Accident Record")\
-                .select(quoted_col)\
-                .gte('"incident at date"', str(filters.start_date))\
-                .lte('"incident at date"', str(filters.end_date))\
-                .eq('"Severity"', filters.severity)\
-                .execute()
-
-            # Count categories manually
-            from collections import Counter
-            categories = [row.get(col) or "Unknown" for row in response.data]
-            counts = Counter(categories)
-            
-            results[col] = dict(counts)
-            
-            if not results[col]:
-                results[col] = {"No Data": 0}
-
-            print(f"✓ {col}: {len(results[col])} categories")
-
-        except Exception as e:
-            print(f"❌ Error for {col}: {str(e)}")
-            print(traceback.format_exc())
-            results[col] = {"Error": 0}
 
+def _comprehensive_analytics1(filters: AccidentAnalyticsFilters1) -> AccidentAnalyticsResponse1:
+    supabase: Client = get_supabase()
+    columns = [c for c in COMPREHENSIVE_COLUMNS.columns if c not in COMPREHENSIVE_COLUMNS.key_columns]
+
+    def build_query():
+        return (
+            supabase.table("Accident Record")
+            .select(COMPREHENSIVE_COLUMNS.select)
+            .gte('"incident at date"', str(filters.start_date))
+            .lte('"incident at date"', str(filters.end_date))
+            .eq('"Severity"', filters.severity)
+        )
+
+    # One filtered keyset scan of all columns (pages fetched concurrently,
+    # see SCAN_PREFETCH_WORKERS); every row is counted into every column
+    counts = {col: defaultdict(int) for col in columns}
+    try:
+        for page in prefetch_keyset_pages(build_query, "accident_id"):
+            for row in COMPREHENSIVE_COLUMNS.track(page):
+                for col in columns:
+                    counts[col][row.get(col) or "Unknown"] += 1
+    except Exception as e:
+        print(f"❌ Error scanning accident records: {str(e)}")
+        print(traceback.format_exc())
+        return AccidentAnalyticsResponse1(results={col: {"Error": 0} for col in columns})
+
+    results = {col: dict(counts[col]) or {"No Data": 0} for col in columns}
+    print(f"✓ Comprehensive analytics: {sum(counts[columns[0]].values())} records, {len(columns)} columns")
     return AccidentAnalyticsResponse1(results=results)
-
@@ -0,0 +1,263 @@
+# app/services/gov_cube.py
+"""
+Precomputed count cube for the government dashboard (GOV_CUBE=1).
+
+Cells are counts of accident records at
+(day, severity, region, column, category) granularity, where column is one
+of the comprehensive-analytics columns and region is the Region of the
+hospital of the managing nurse. A pseudo column RECORDS holds one count per
+record, for the trends. Date-range / severity breakdowns and the
+month/year/weekday trends are answered by summing cells instead of scanning
+"Accident Record".
+
+The cube is rebuilt by a background task every GOV_CUBE_REFRESH seconds
+(one keyset scan, aggregated page by page) and persisted to GOV_CUBE_PATH
+as Parquet, so a restarted process serves the last cube right away. Answers
+lag writes by at most the refresh interval. A cube older than
+GOV_CUBE_MAX_AGE (rebuilds failing, or an old file after a restart) is not
+served: the dashboard queries the table directly until a rebuild succeeds.
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import polars as pl
+from fastapi.concurrency import run_in_threadpool
+
+from app.db import get_supabase
+from app.services.govDash_service import COMPREHENSIVE_COLUMNS
+from app.utils.metrics import register_metrics
+from app.utils.pagination import keyset_pages, prefetch_keyset_pages
+from app.utils.projections import Projection
+
+GOV_CUBE = os.getenv("GOV_CUBE", "false").lower() in ("1", "true", "yes")
+GOV_CUBE_PATH = os.getenv("GOV_CUBE_PATH", "data/gov_cube.parquet")
+GOV_CUBE_REFRESH = float(os.getenv("GOV_CUBE_REFRESH", 900))
+GOV_CUBE_MAX_AGE = float(os.getenv("GOV_CUBE_MAX_AGE", 2 * GOV_CUBE_REFRESH))
+
+RECORDS = "__records"
+UNKNOWN_REGION = "Unknown"
+
+BREAKDOWN_COLUMNS = [c for c in COMPREHENSIVE_COLUMNS.columns if c not in COMPREHENSIVE_COLUMNS.key_columns]
+
+CUBE_ROWS = Projection(
+    "gov.cube",
+    ["incident at date", "Severity", "managed_by", *BREAKDOWN_COLUMNS],
+    key_columns=["accident_id"],
+    table="Accident Record",
+)
+
+CELL_SCHEMA = {
+    "day": pl.Utf8,
+    "severity": pl.Utf8,
+    "region": pl.Utf8,
+    "column": pl.Utf8,
+    "category": pl.Utf8,
+    "count": pl.Int64,
+}
+DIMENSIONS = ["day", "severity", "region", "column", "category"]
+
+
+class GovCube:
+    """An immutable set of cells plus the queries the dashboard needs."""
+
+    def __init__(self, cells: pl.DataFrame, built_at: float, source: str):
+        self.cells = cells
+        self.built_at = built_at  # time.time() of the scan
+        self.source = source      # "scan" or "parquet"
+
+    def breakdown(self, start_date: str, end_date: str, severity: str) -> Dict[str, Dict[str, int]]:
+        """{column: {category: count}} like get_comprehensive_analytics_service1."""
+        grouped = (
+            self.cells.lazy()
+            .filter(
+                (pl.col("column") != RECORDS)
+                & (pl.col("day") >= start_date)
+                & (pl.col("day") <= end_date)
+                & (pl.col("severity") == severity)
+            )
+            .group_by("column", "category")
+            .agg(pl.col("count").sum())
+            .sort("column", "count", descending=[False, True])
+            .collect()
+        )
+        results: Dict[str, Dict[str, int]] = {col: {} for col in BREAKDOWN_COLUMNS}
+        for column, category, count in grouped.iter_rows():
+            results[column][category] = count
+        return {col: counts or {"No Data": 0} for col, counts in results.items()}
+
+    def trends(self) -> Dict[str, Any]:
+        """Monthly / yearly / weekday totals like get_accident_trends_service."""
+        days = (
+            self.cells.lazy()
+            .filter(pl.col("column") == RECORDS)
+            .with_columns(pl.col("day").str.to_date("%Y-%m-%d", strict=False).alias("date"))
+            .filter(pl.col("date").is_not_null())
+            .with_columns(
+                pl.col("count").alias("total"),
+                pl.when(pl.col("severity") == "S").then(pl.col("count")).otherwise(0).alias("serious"),
+            )
+        )
+        keys = {
+            "monthly_counts": pl.col("date").dt.strftime("%Y-%m"),
+            "yearly_counts": pl.col("date").dt.year().cast(pl.Utf8),
+            "day_of_week_counts": pl.col("date").dt.strftime("%A"),
+        }
+        frames = pl.collect_all([
+            days.group_by(key.alias("key")).agg(pl.col("total").sum(), pl.col("serious").sum()).sort("key")
+            for key in keys.values()
+        ])
+        return {
+            name: {key: {"total": total, "serious": serious} for key, total, serious in frame.iter_rows()}
+            for name, frame in zip(keys, frames)
+        }
+
+
+_cube: Optional[GovCube] = None
+_build_lock = threading.Lock()
+_stats = {"builds": 0, "build_seconds": 0.0, "records": 0, "queries": 0, "too_old": 0, "errors": 0}
+
+
+def cube_report() -> dict:
+    cube = _cube
+    return {
+        **_stats,
+        "cells": cube.cells.height if cube is not None else 0,
+        "age_seconds": round(time.time() - cube.built_at, 1) if cube is not None else None,
+        "source": cube.source if cube is not None else None,
+    }
+
+
+register_metrics("gov_cube", cube_report)
+
+
+def current_cube() -> Optional[GovCube]:
+    """
+    The last built (or loaded) cube; None when disabled, until there is one
+    and while it is older than GOV_CUBE_MAX_AGE.
+    """
+    cube = _cube
+    if not GOV_CUBE or cube is None:
+        return None
+    if time.time() - cube.built_at > GOV_CUBE_MAX_AGE:
+        _stats["too_old"] += 1
+        return None
+    _stats["queries"] += 1
+    return cube
+
+
+# ---------------------------
+# Build / persist
+# ---------------------------
+
+def _regions_by_nurse(supabase) -> Dict[str, str]:
+    """Nurse user_id -> Region of their hospital."""
+    regions = {}
+    for page in keyset_pages(lambda: supabase.table("Hospital").select("hospital_id, Region"), "hospital_id"):
+        for h in page:
+            regions[str(h["hospital_id"])] = h.get("Region") or UNKNOWN_REGION
+    by_nurse = {}
+    for page in keyset_pages(lambda: supabase.table("Nurse").select("user_id, hospital_id"), "user_id"):
+        for n in page:
+            by_nurse[str(n["user_id"])] = regions.get(str(n.get("hospital_id")), UNKNOWN_REGION)
+    return by_nurse
+
+
+def _page_cells(page, regions: Dict[str, str]) -> pl.DataFrame:
+    """Cells of one page of records (aggregated, so memory stays O(cells))."""
+    frame = pl.DataFrame(
+        {
+            "day": [r.get("incident at date") for r in page],
+            "severity": [r.get("Severity") for r in page],
+            "region": [regions.get(str(r.get("managed_by")), UNKNOWN_REGION) for r in page],
+            RECORDS: [RECORDS] * len(page),
+            **{col: [r.get(col) or "Unknown" for r in page] for col in BREAKDOWN_COLUMNS},
+        },
+        schema={"day": pl.Utf8, "severity": pl.Utf8, "region": pl.Utf8, RECORDS: pl.Utf8,
+                **{col: pl.Utf8 for col in BREAKDOWN_COLUMNS}},
+        strict=False,
+    )
+    return (
+        frame.unpivot(index=["day", "severity", "region"], on=[RECORDS, *BREAKDOWN_COLUMNS],
+                      variable_name="column", value_name="category")
+        .group_by(DIMENSIONS)
+        .agg(pl.len().cast(pl.Int64).alias("count"))
+    )
+
+
+def build_cube() -> GovCube:
+    """Scan every accident record into a new cube, persist it and make it current."""
+    global _cube
+    with _build_lock:
+        started = time.time()
+        supabase = get_supabase()
+        regions = _regions_by_nurse(supabase)
+        parts, records = [], 0
+        pages = prefetch_keyset_pages(
+            lambda: supabase.table("Accident Record").select(CUBE_ROWS.select),
+            "accident_id",
+        )
+        for page in pages:
+            records += len(page)
+            parts.append(_page_cells(page, regions))
+        if parts:
+            cells = pl.concat(parts).group_by(DIMENSIONS).agg(pl.col("count").sum())
+        else:
+            cells = pl.DataFrame(schema=CELL_SCHEMA)
+        cube = GovCube(cells.sort(DIMENSIONS, nulls_last=True), started, "scan")
+        _save(cube)
+        _cube = cube
+        _stats["builds"] += 1
+        _stats["records"] = records
+        _stats["build_seconds"] = round(time.time() - started, 3)
+        print(f"🧊 Gov cube built: {records} records -> {cube.cells.height} cells in {_stats['build_seconds']}s")
+        return cube
+
+
+def _save(cube: GovCube) -> None:
+    directory = os.path.dirname(GOV_CUBE_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # A unique temp file per save, so processes sharing GOV_CUBE_PATH never
+    # write into each other's file; os.replace() swaps it in atomically
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=os.path.basename(GOV_CUBE_PATH) + ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        cube.cells.write_parquet(tmp_path)
+        os.replace(tmp_path, GOV_CUBE_PATH)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def load_cube() -> Optional[GovCube]:
+    """Make the persisted cube current (if there is one); built_at is the file's mtime."""
+    global _cube
+    if not os.path.exists(GOV_CUBE_PATH):
+        return None
+    cells = pl.read_parquet(GOV_CUBE_PATH)
+    _cube = GovCube(cells, os.path.getmtime(GOV_CUBE_PATH), "parquet")
+    print(f"🧊 Gov cube loaded from {GOV_CUBE_PATH}: {cells.height} cells")
+    return _cube
+
+
+async def run_cube_refresher() -> None:
+    """Lifespan task: load the persisted cube, then rebuild it every GOV_CUBE_REFRESH seconds."""
+    try:
+        await run_in_threadpool(load_cube)
+    except Exception as e:
+        print(f"⚠️ Could not load gov cube from {GOV_CUBE_PATH}: {str(e)}")
+    while True:
+        age = time.time() - _cube.built_at if _cube is not None else GOV_CUBE_REFRESH
+        if age >= GOV_CUBE_REFRESH:
+            try:
+                await run_in_threadpool(build_cube)
+                age = 0
+            except Exception as e:
+                _stats["errors"] += 1
+                print(f"❌ Gov cube build failed: {str(e)}")
+                age = GOV_CUBE_REFRESH - min(GOV_CUBE_REFRESH, 60)  # retry within a minute
+        await asyncio.sleep(GOV_CUBE_REFRESH - age)
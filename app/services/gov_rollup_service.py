@@ -0,0 +1,176 @@
+# app/services/gov_rollup_service.py
+"""
+National -> Region -> hospital analytics rollup for government users.
+
+One scan of "Accident Record" (with the patient embed) feeds one
+AnalyticsAccumulator per hospital, per Region and for the whole country.
+A record counts for every hospital its patient is linked to through
+Hospital_Patient (as in the hospital-scoped /analytics), once for each of
+those hospitals' Regions, and once nationally.
+"""
+import os
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set
+
+from app.db import get_supabase
+from app.models.analytics import (
+    AccidentAnalyticsFilters,
+    AnalyticsRollupResponse,
+    HospitalAnalyticsRollup,
+    RegionAnalyticsRollup,
+)
+from app.services.accident_analytics_service import (
+    AnalyticsAccumulator,
+    _analytics_cache_key,
+    _analytics_result,
+)
+from app.services.analytics_counters import ANALYTICS_ROW, _as_analytics_row
+from app.utils.cache import TTLCache
+from app.utils.metrics import register_metrics
+from app.utils.pagination import keyset_pages, prefetch_keyset_pages
+from app.utils.projections import Projection
+from app.utils.singleflight import SingleFlight
+
+UNKNOWN_REGION = "Unknown"
+
+ROLLUP_ROWS = Projection(
+    "gov.rollup",
+    ["patient_id", *(c for c in ANALYTICS_ROW.columns if c not in ANALYTICS_ROW.key_columns)],
+    embeds=ANALYTICS_ROW.embeds,
+    key_columns=["accident_id"],
+    table="Accident Record",
+)
+
+# A rollup holds every hospital's analytics, so it gets its own small cache
+# (by default just the latest date range) instead of crowding out hospital
+# entries in the analytics cache. Keys carry the analytics generation, so
+# writes that invalidate any hospital's analytics also retire the rollup.
+_rollup_cache = TTLCache(
+    maxsize=int(os.getenv("GOV_ROLLUP_CACHE_SIZE", 1)),
+    ttl=float(os.getenv("ANALYTICS_CACHE_TTL", 300)),
+)
+register_metrics("gov_rollup_cache", _rollup_cache.stats)
+
+_rollup_flights = SingleFlight("gov_rollup")
+
+
+class GroupedAnalyticsAccumulator:
+    """
+    One AnalyticsAccumulator per group key. The groups share their parse
+    memos, so each distinct time/date/income value is parsed once overall.
+    """
+
+    def __init__(self):
+        self._memo = AnalyticsAccumulator()
+        self.groups: Dict[Hashable, AnalyticsAccumulator] = {}
+
+    def group(self, key: Hashable) -> AnalyticsAccumulator:
+        acc = self.groups.get(key)
+        if acc is None:
+            acc = self.groups[key] = AnalyticsAccumulator()
+            acc._hours = self._memo._hours
+            acc._dates = self._memo._dates
+            acc._age_groups = self._memo._age_groups
+            acc._income_changes = self._memo._income_changes
+        return acc
+
+    def add(self, record: Dict[str, Any], keys: Iterable[Hashable]) -> None:
+        for key in keys:
+            self.group(key).add(record)
+
+
+def _hospitals(supabase) -> Dict[str, Dict[str, Any]]:
+    hospitals = {}
+    for page in keyset_pages(lambda: supabase.table("Hospital").select("hospital_id, name, Region"), "hospital_id"):
+        for h in page:
+            hospitals[str(h["hospital_id"])] = {"name": h.get("name"), "region": h.get("Region") or UNKNOWN_REGION}
+    return hospitals
+
+
+def _patient_hospitals(supabase) -> Dict[str, List[str]]:
+    """patient_id -> hospital_ids of every Hospital_Patient link (each hospital once)."""
+    links = defaultdict(dict)  # insertion-ordered set
+    pages = keyset_pages(
+        lambda: supabase.table("Hospital_Patient").select("patient_id, hospital_id"),
+        "patient_id",
+        tiebreak_column="hospital_id",
+    )
+    for page in pages:
+        for link in page:
+            links[str(link["patient_id"])][str(link["hospital_id"])] = None
+    return {patient_id: list(hospital_ids) for patient_id, hospital_ids in links.items()}
+
+
+def _build_rollup(start_date: Optional[date], end_date: Optional[date]) -> AnalyticsRollupResponse:
+    supabase = get_supabase()
+    hospitals = _hospitals(supabase)
+    patient_hospitals = _patient_hospitals(supabase)
+
+    def build_query():
+        query = supabase.table("Accident Record").select(ROLLUP_ROWS.select)
+        if start_date:
+            query = query.gte('"incident at date"', start_date.isoformat())
+        if end_date:
+            query = query.lte('"incident at date"', end_date.isoformat())
+        return query
+
+    by_hospital = GroupedAnalyticsAccumulator()
+    by_region = GroupedAnalyticsAccumulator()
+    national = AnalyticsAccumulator()
+    for page in prefetch_keyset_pages(build_query, "accident_id"):
+        for row in ROLLUP_ROWS.track(page):
+            hospital_ids = patient_hospitals.get(str(row.get("patient_id")), ())
+            record = _as_analytics_row(row)
+            national.add(record)
+            by_hospital.add(record, hospital_ids)
+            regions: Set[str] = {hospitals.get(h, {}).get("region", UNKNOWN_REGION) for h in hospital_ids}
+            by_region.add(record, regions)
+
+    # Every hospital appears, with empty analytics if it has no records
+    hospital_rollups = defaultdict(list)
+    for hospital_id in sorted(set(hospitals) | set(by_hospital.groups), key=lambda h: (hospitals.get(h, {}).get("name") or "", h)):
+        info = hospitals.get(hospital_id, {"name": None, "region": UNKNOWN_REGION})
+        acc = by_hospital.groups.get(hospital_id) or AnalyticsAccumulator()
+        hospital_rollups[info["region"]].append(HospitalAnalyticsRollup(
+            hospital_id=hospital_id,
+            name=info["name"],
+            region=info["region"],
+            analytics=_analytics_result(acc.sections())["comprehensive_analytics"],
+        ))
+
+    regions = [
+        RegionAnalyticsRollup(
+            region=region,
+            analytics=_analytics_result((by_region.groups.get(region) or AnalyticsAccumulator()).sections())["comprehensive_analytics"],
+            hospitals=hospital_rollups.get(region, []),
+        )
+        for region in sorted(set(hospital_rollups) | set(by_region.groups))
+    ]
+    print(f"🗺️ Analytics rollup: {national.total_records} records, {len(regions)} regions, {len(by_hospital.groups)} hospitals with records")
+    return AnalyticsRollupResponse(
+        national=_analytics_result(national.sections())["comprehensive_analytics"],
+        regions=regions,
+        start_date=start_date,
+        end_date=end_date,
+        generated_at=datetime.now(),
+    )
+
+
+def get_analytics_rollup_service(start_date: Optional[date] = None, end_date: Optional[date] = None) -> AnalyticsRollupResponse:
+    """
+    Analytics of every hospital, Region and the whole country in one scan.
+    Any write that invalidates one hospital's analytics also drops the
+    cached rollup.
+    """
+    key = _analytics_cache_key(AccidentAnalyticsFilters(start_date=start_date, end_date=end_date), "rollup")
+    cached = _rollup_cache.get(key)
+    if cached is not None:
+        return cached
+
+    def compute():
+        rollup = _build_rollup(start_date, end_date)
+        _rollup_cache.set(key, rollup)
+        return rollup
+
+    return _rollup_flights.do(key, compute)
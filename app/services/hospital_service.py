@@ -2,8 +2,11 @@ from app.models.hospital import HospitalCreate, HospitalUpdate
 from fastapi import HTTPException
 from app.db import get_supabase
 from app.models.hospital import Hospital
+from app.utils.projections import Projection, model_columns
 from typing import List, Optional
 
+HOSPITAL_LIST = Projection("hospitals.list", model_columns(Hospital), table="Hospital")
+
 # Service: Create hospital
 def create_hospital_service(hospital: HospitalCreate):
     supabase = get_supabase()
@@ -25,7 +28,7 @@ def create_hospital_service(hospital: HospitalCreate):
 # Service: Get all hospitals
 def get_all_hospitals_service():
     supabase = get_supabase()
-    resp = supabase.table("Hospital").select("*").execute()
+    resp = supabase.table("Hospital").select(HOSPITAL_LIST.select).execute()
     return resp.data or []
 
 def list_hospitals ():
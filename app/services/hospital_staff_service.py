@@ -2,6 +2,7 @@ from fastapi import HTTPException
 from app.db import get_supabase
 from app.models.hospital_staff import AssignStaffToHospital
 from typing import List, Dict, Optional
+from app.auth.hospital_dependency import invalidate_user_hospital
 
 def get_doctors_count_service(hospital_id: str):
     """
@@ -91,6 +92,7 @@ def add_doctor_to_hospital_service(data: AssignStaffToHospital):
     }).execute()
     if not resp.data:
         raise HTTPException(status_code=500, detail="Failed to assign doctor.")
+    invalidate_user_hospital(data.user_id, "doctor")
     return {"message": "Doctor assigned successfully."}
 
 def add_nurse_to_hospital_service(data: AssignStaffToHospital):
@@ -105,4 +107,5 @@ def add_nurse_to_hospital_service(data: AssignStaffToHospital):
     }).execute()
     if not resp.data:
         raise HTTPException(status_code=500, detail="Failed to assign nurse.")
+    invalidate_user_hospital(data.user_id, "nurse")
     return {"message": "Nurse assigned successfully."}
@@ -6,8 +6,21 @@ from app.models.medical import (
     InjuryCreate, InjuryUpdate,
     ManagementCreate, ManagementUpdate
 )
+from app.models.medical import TreatmentOut, TransferOut, ManagementOut
+from app.utils.projections import Projection, model_columns
 from app.utils.serializers import serialize_payload
 
+# Columns returned by the get_all_* list endpoints (their response models)
+TREATMENT_LIST = Projection("medical.treatments", model_columns(TreatmentOut), table="Treatment")
+TRANSFER_LIST = Projection("medical.transfers", model_columns(TransferOut), table="Transfer")
+# InjuryOut aliases "Investigation Done", but the Injury column is investigation_done
+INJURY_LIST = Projection(
+    "medical.injuries",
+    ["accident_id", "injury_no", "site_of_injury", "type_of_injury", "side", "investigation_done"],
+    table="Injury",
+)
+MANAGEMENT_LIST = Projection("medical.managements", model_columns(ManagementOut), table="managemeny")
+
 # Treatment Services
 def create_treatment_service(treatment: TreatmentCreate, hospital_id: str):
     supabase = get_supabase()
@@ -41,7 +54,7 @@ def edit_treatment_service(treatment_id: str, treatment: TreatmentUpdate):
 
 def get_all_treatments_service():
     supabase = get_supabase()
-    resp = supabase.table("Treatment").select("*").execute()
+    resp = supabase.table("Treatment").select(TREATMENT_LIST.select).execute()
     return resp.data or []
 
 def get_treatment_by_id_service(treatment_id: str):
@@ -89,7 +102,7 @@ def edit_transfer_service(transfer_id: str, transfer: TransferUpdate):
 
 def get_all_transfers_service():
     supabase = get_supabase()
-    resp = supabase.table("Transfer").select("*").execute()
+    resp = supabase.table("Transfer").select(TRANSFER_LIST.select).execute()
     return resp.data or []
 
 def get_transfer_by_id_service(transfer_id: str):
@@ -125,7 +138,7 @@ def edit_injury_service(injury_no: str, injury: InjuryUpdate):
 
 def get_all_injuries_service():
     supabase = get_supabase()
-    resp = supabase.table("Injury").select("*").execute()
+    resp = supabase.table("Injury").select(INJURY_LIST.select).execute()
     return resp.data or []
 
 def get_injury_by_id_service(injury_no: str):
@@ -163,7 +176,7 @@ def edit_management_service(management_id: str, management: ManagementUpdate):
 
 def get_all_managements_service():
     supabase = get_supabase()
-    resp = supabase.table("managemeny").select("*").execute()
+    resp = supabase.table("managemeny").select(MANAGEMENT_LIST.select).execute()
     return resp.data or []
 
 def get_management_by_id_service(management_id: str):
@@ -1,7 +1,8 @@
 from fastapi import HTTPException
 from fastapi.encoders import jsonable_encoder
-from app.db import get_supabase
+from app.db import get_supabase, get_async_supabase
 from app.models.patient import PatientCreate, PatientUpdate
+from app.utils.pagination import aprefetch_keyset_pages
 
 def create_patient_service(patient: PatientCreate, hospital_id: str):
     supabase = get_supabase()
@@ -75,45 +76,28 @@ def edit_patient_service(patient_id: str, patient: PatientUpdate):
 #     resp = supabase.table("Patient").select("*").execute()
 #     return resp.data or []
 
-def get_hospital_patients_service(hospital_id: str):
-    supabase = get_supabase()
+async def get_hospital_patients_service_async(hospital_id: str):
+    supabase = await get_async_supabase()
 
     all_patients = []
-    batch_size = 1000
-    offset = 0
-
-    while True:
-        # Fetch records in batches of 1000
-        resp = (
-            supabase.table("Hospital_Patient")
-            .select("patient_id, Patient(*)")
-            .eq("hospital_id", hospital_id)
-            .range(offset, offset + batch_size - 1)
-            .execute()
-        )
-
-        data = resp.data or []
-
-        print(f"Fetched batch: {len(data)} records (offset {offset})")
-
-        if not data:
-            break  # Stop when no more data returned
 
+    async for data in aprefetch_keyset_pages(
+        lambda: supabase.table("Hospital_Patient")
+        .select("patient_id, Patient(*)")
+        .eq("hospital_id", hospital_id),
+        "patient_id",
+    ):
         for item in data:
             patient_data = item.get("Patient")
             if patient_data:
                 patient_data["Hospital ID"] = hospital_id
                 all_patients.append(patient_data)
 
-        # Move to next batch
-        offset += batch_size
-
-    print(f"✅ Total patients fetched for hospital {hospital_id}: {len(all_patients)}")
     return all_patients
 
-def get_patient_by_id_service(patient_id: str):
-    supabase = get_supabase()
-    resp = supabase.table("Patient").select("*").eq("patient_id", patient_id).single().execute()
+async def get_patient_by_id_service_async(patient_id: str):
+    supabase = await get_async_supabase()
+    resp = await supabase.table("Patient").select("*").eq("patient_id", patient_id).single().execute()
     if not resp.data:
         raise HTTPException(status_code=404, detail="Patient not found.")
     return resp.data
@@ -1,9 +1,14 @@
 # app/services/transfer_service.py
 from __future__ import annotations
 
+import asyncio
 from typing import Any, Dict, List, Optional, Tuple
 from fastapi import HTTPException
-from app.db import get_supabase
+from app.db import get_supabase, get_async_supabase
+from app.auth.hospital_dependency import invalidate_user_hospital
+from app.services.analytics_counters import TransferChange
+from app.utils.auth import hospital_id_from_claims
+from app.utils.loaders import get_loaders
 
 ACCIDENT_TABLE = "Accident Record"       # exact name with space
 TRANSFER_TABLE = "Transfer"              # exact name
@@ -20,67 +25,65 @@ def _db_error(resp, default_msg: str = "Database error"):
     raise HTTPException(status_code=500, detail=detail)
 
 
-def _get_user_role_and_hospital(user_id: str) -> Tuple[Optional[str], Optional[str]]:
+def _role_and_hospital_from_claims(claims: Optional[Dict[str, Any]]) -> Optional[Tuple[str, str]]:
+    """(role, hospital_id) from a trusted token hospital claim, if there is one."""
+    if not claims or claims.get("role") not in ("hospital_administrator", "nurse"):
+        return None
+    hospital_id = hospital_id_from_claims(claims)
+    if not hospital_id:
+        return None
+    return claims["role"], str(hospital_id)
+
+
+def _get_user_role_and_hospital(user_id: str, claims: Optional[Dict[str, Any]] = None) -> Tuple[Optional[str], Optional[str]]:
     """
     Return (role, hospital_id) for the given user_id.
     - Prefer Admin hospital if present; otherwise Nurse hospital.
     - Role is read from User.role (falls back to 'admin'/'nurse' when inferred).
+    - A trusted hospital claim in the token (`claims`) skips the DB entirely.
+    Rows come from the request-scoped loaders, so repeated calls are free.
     """
-    supabase = get_supabase()
+    from_claims = _role_and_hospital_from_claims(claims)
+    if from_claims:
+        return from_claims
 
-    # Try Admin
-    admin_r = (
-        supabase.table(ADMIN_TABLE)
-        .select("user_id, hospital_id")
-        .eq("user_id", user_id)
-        .limit(1)
-        .execute()
-    )
-    if admin_r.data and len(admin_r.data) > 0:
-        role_r = (
-            supabase.table(USER_TABLE)
-            .select("role")
-            .eq("user_id", user_id)
-            .single()
-            .execute()
-        )
-        if role_r.data is None and getattr(role_r, "error", None):
-            _db_error(role_r, "Failed to load user role")
-        role = (role_r.data or {}).get("role") or "hospital_administrator"
-        return role, str(admin_r.data[0]["hospital_id"])
-
-    # Try Nurse
-    nurse_r = (
-        supabase.table(NURSE_TABLE)
-        .select("user_id, hospital_id")
-        .eq("user_id", user_id)
-        .limit(1)
-        .execute()
-    )
-    if nurse_r.data and len(nurse_r.data) > 0:
-        role_r = (
-            supabase.table(USER_TABLE)
-            .select("role")
-            .eq("user_id", user_id)
-            .single()
-            .execute()
-        )
-        if role_r.data is None and getattr(role_r, "error", None):
-            _db_error(role_r, "Failed to load user role")
-        role = (role_r.data or {}).get("role") or "nurse"
-        return role, str(nurse_r.data[0]["hospital_id"])
-
-    # Not found in either — still try to read role from User for clarity
-    role_r = (
-        supabase.table(USER_TABLE)
-        .select("role")
-        .eq("user_id", user_id)
-        .single()
-        .execute()
+    loaders = get_loaders()
+
+    def role_of() -> Optional[str]:
+        return (loaders.users.load(user_id) or {}).get("role")
+
+    # Stop at the first staff row found, as admins never need the Nurse lookup
+    admin_row = loaders.admins.load(user_id)
+    if admin_row:
+        return role_of() or "hospital_administrator", str(admin_row["hospital_id"])
+
+    nurse_row = loaders.nurses.load(user_id)
+    if nurse_row:
+        return role_of() or "nurse", str(nurse_row["hospital_id"])
+
+    return role_of(), None
+
+
+async def _get_user_role_and_hospital_async(user_id: str, claims: Optional[Dict[str, Any]] = None) -> Tuple[Optional[str], Optional[str]]:
+    """Async variant of _get_user_role_and_hospital (same lookup order)."""
+    from_claims = _role_and_hospital_from_claims(claims)
+    if from_claims:
+        return from_claims
+
+    loaders = get_loaders()
+    # The role is needed in every case, so it is read alongside the Admin row;
+    # the Nurse row only when the user is not an admin
+    user_row, admin_row = await asyncio.gather(
+        loaders.users.aload(user_id),
+        loaders.admins.aload(user_id),
     )
-    if role_r.data is None and getattr(role_r, "error", None):
-        _db_error(role_r, "Failed to load user role")
-    role = (role_r.data or {}).get("role")
+    role = (user_row or {}).get("role")
+
+    if admin_row:
+        return role or "hospital_administrator", str(admin_row["hospital_id"])
+    nurse_row = await loaders.nurses.aload(user_id)
+    if nurse_row:
+        return role or "nurse", str(nurse_row["hospital_id"])
     return role, None
 
 
@@ -133,7 +136,7 @@ def create_transfer_request_service(
     if not user_id:
         raise HTTPException(status_code=403, detail="Invalid user")
 
-    role, nurse_hospital_id = _get_user_role_and_hospital(user_id)
+    role, nurse_hospital_id = _get_user_role_and_hospital(user_id, user)
     if role != "nurse":
         raise HTTPException(status_code=403, detail="Only nurses can request transfers.")
     if not nurse_hospital_id:
@@ -161,20 +164,20 @@ def create_transfer_request_service(
 # Lists
 # ---------------------------
 
-def list_my_outgoing_transfers_service(user: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def list_my_outgoing_transfers_service_async(user: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Nurse: list transfers created from their hospital (outgoing).
     """
-    supabase = get_supabase()
+    supabase = await get_async_supabase()
     user_id = user.get("sub")
     if not user_id:
         return []
 
-    role, nurse_hospital_id = _get_user_role_and_hospital(user_id)
+    role, nurse_hospital_id = await _get_user_role_and_hospital_async(user_id, user)
     if role != "nurse" or not nurse_hospital_id:
         return []
 
-    r = (
+    r = await (
         supabase.table(TRANSFER_TABLE)
         .select("*")
         .eq("from_hospital", nurse_hospital_id)
@@ -186,20 +189,20 @@ def list_my_outgoing_transfers_service(user: Dict[str, Any]) -> List[Dict[str, A
     return r.data or []
 
 
-def list_incoming_transfers_for_admin_service(user: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def list_incoming_transfers_for_admin_service_async(user: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Admin: list pending transfers where to_hospital = admin's hospital and approved_by IS NULL.
     """
-    supabase = get_supabase()
+    supabase = await get_async_supabase()
     user_id = user.get("sub")
     if not user_id:
         return []
 
-    role, admin_hospital_id = _get_user_role_and_hospital(user_id)
+    role, admin_hospital_id = await _get_user_role_and_hospital_async(user_id, user)
     if role != "hospital_administrator" or not admin_hospital_id:
         return []
 
-    r = (
+    r = await (
         supabase.table(TRANSFER_TABLE)
         .select("*")
         .eq("to_hospital", admin_hospital_id)
@@ -240,14 +243,14 @@ def approve_transfer_service(
     if not admin_id:
         raise HTTPException(status_code=403, detail="Invalid user")
 
-    role, admin_hospital_id = _get_user_role_and_hospital(admin_id)
+    role, admin_hospital_id = _get_user_role_and_hospital(admin_id, user)
     if role != "hospital_administrator":
         raise HTTPException(status_code=403, detail="Only admins can approve transfers.")
 
     # Optional: verify transfer belongs to this admin's hospital before RPC
     t = (
         supabase.table(TRANSFER_TABLE)
-        .select("transfer_id, to_hospital, approved_by")
+        .select("transfer_id, accident_id, from_hospital, to_hospital, approved_by")
         .eq("transfer_id", transfer_id)
         .single()
         .execute()
@@ -261,6 +264,9 @@ def approve_transfer_service(
         raise HTTPException(status_code=400, detail="Transfer already approved.")
     _ensure_same_hospital(admin_hospital_id, tr.get("to_hospital"), "You can only approve transfers to your hospital.")
 
+    # Whether the patient is new to the destination hospital (for analytics counters)
+    analytics_change = TransferChange(supabase, tr.get("accident_id"), tr.get("from_hospital"), tr.get("to_hospital"))
+
     # Atomic RPC
     params = {
         "p_transfer_id": transfer_id,
@@ -273,6 +279,11 @@ def approve_transfer_service(
         detail = getattr(rpc.error, "message", "Approval failed.")
         raise HTTPException(status_code=500, detail=detail)
 
+    # The new manager's cached user -> hospital resolution may be stale now
+    invalidate_user_hospital(new_nurse_user_id, "nurse")
+    # The patient now counts for the destination hospital (and changed manager)
+    analytics_change.commit()
+
     if not rpc.data:
         # Reload if RPC doesn't return the row
         refreshed = (
@@ -307,7 +318,7 @@ def reject_transfer_service(
     if not admin_id:
         raise HTTPException(status_code=403, detail="Invalid user")
 
-    role, admin_hospital_id = _get_user_role_and_hospital(admin_id)
+    role, admin_hospital_id = _get_user_role_and_hospital(admin_id, user)
     if role != "hospital_administrator" and role != "nurse":
         raise HTTPException(status_code=403, detail="Only admins/nurses can reject transfers.")
 
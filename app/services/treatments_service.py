@@ -2,9 +2,20 @@
 from typing import List, Dict, Any, Optional
 from fastapi import HTTPException
 from app.db import get_supabase
+from app.utils.auth import hospital_id_from_claims
+from app.utils.loaders import get_loaders
+from app.utils.projections import Projection
 
 TABLE = "Treatment"  # exact table name
 
+# Columns of TreatmentOut as returned with an accident record
+TREATMENT_LIST = Projection(
+    "treatments.list",
+    ["accident_id", "treatment_no", "treatment_type", "description", "hospital_id",
+     "ward_number", "number_of_days_stay", "reason"],
+    table=TABLE,
+)
+
 # --------- helpers ---------
 def _db_or_500(resp, msg="Database error"):
     # Supabase client sometimes lacks `.error` attr in certain versions
@@ -15,19 +26,18 @@ def _db_or_500(resp, msg="Database error"):
     return resp.data
 
 def _get_current_nurse_hospital_id(user) -> str:
-    supabase = get_supabase()
     user_id = (user.get("sub") or user.get("user_id") or user.get("id"))
     if not user_id:
         raise HTTPException(status_code=403, detail="Invalid user")
 
-    nurse = (
-        supabase.table("Nurse")
-        .select("hospital_id")
-        .eq("user_id", user_id)
-        .single()
-        .execute()
-    )
-    data = _db_or_500(nurse, "Failed to read nurse record")
+    if user.get("role") == "nurse":
+        hid = hospital_id_from_claims(user)
+        if hid:
+            return str(hid)
+
+    data = get_loaders().nurses.load(user_id)
+    if data is None:
+        raise HTTPException(status_code=500, detail="Failed to read nurse record")
     hid = data.get("hospital_id")
     if not hid:
         raise HTTPException(status_code=400, detail="Nurse has no hospital_id")
@@ -56,7 +66,7 @@ def list_treatments(accident_id: str) -> List[Dict[str, Any]]:
     supabase = get_supabase()
     r = (
         supabase.table(TABLE)
-        .select("*")
+        .select(TREATMENT_LIST.select)
         .eq("accident_id", accident_id)
         .order("treatment_no")
         .execute()
@@ -1,8 +1,14 @@
 import os
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from fastapi import HTTPException
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from dotenv import load_dotenv
+from app.utils.metrics import register_metrics
 
 load_dotenv()
 
@@ -11,14 +17,119 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
 
+# Opt-in: embed the user's hospital assignment in issued tokens so request
+# handlers can skip the staff-table lookup. Bumping the claims version makes
+# every hospital claim issued before the bump untrusted (e.g. after bulk
+# staff reassignments); those tokens fall back to the DB lookup.
+HOSPITAL_CLAIMS_ENABLED = os.getenv("JWT_HOSPITAL_CLAIMS", "false").lower() in ("1", "true", "yes")
+HOSPITAL_CLAIMS_VERSION = int(os.getenv("JWT_HOSPITAL_CLAIMS_VERSION", 1))
+# A claim is trusted for this many seconds after issue (like a cached
+# assignment), so an assignment changed through another worker is picked up
+# within that time; older tokens fall back to the cached/DB lookup.
+HOSPITAL_CLAIMS_MAX_AGE = float(os.getenv("JWT_HOSPITAL_CLAIMS_MAX_AGE", 600))
+
+# user_id -> time.time() of the last assignment change seen by this process;
+# hospital claims issued up to then are not trusted
+_claims_revoked_at = {}
+_claims_revoked_lock = threading.Lock()
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt burns tens of milliseconds of CPU per call. It runs on its own small
+# executor so a wave of logins cannot take over the request threadpool; when
+# more than BCRYPT_MAX_PENDING calls are already waiting, new ones get a 503.
+BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", 2))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", 64))
+
+_hash_executor = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(BCRYPT_MAX_WORKERS + BCRYPT_MAX_PENDING)
+_hash_stats_lock = threading.Lock()
+_hash_stats = {
+    "completed": 0,
+    "failed": 0,  # the hash/verify call raised
+    "cancelled": 0,  # cancelled while still queued
+    "rejected": 0,
+    "in_flight": 0,
+    "started": 0,  # jobs that left the queue; the queue time average is over these
+    "queue_time_total_ms": 0.0,
+    "queue_time_max_ms": 0.0,
+}
+
+
+def _password_hashing_metrics() -> dict:
+    with _hash_stats_lock:
+        stats = dict(_hash_stats)
+    stats["queue_time_avg_ms"] = (
+        stats["queue_time_total_ms"] / stats["started"] if stats["started"] else 0.0
+    )
+    stats["max_workers"] = BCRYPT_MAX_WORKERS
+    stats["max_pending"] = BCRYPT_MAX_PENDING
+    return stats
+
+
+register_metrics("password_hashing", _password_hashing_metrics)
+
+
+async def _run_password_job(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        with _hash_stats_lock:
+            _hash_stats["rejected"] += 1
+        raise HTTPException(status_code=503, detail="Server is busy, please try again shortly.")
+
+    submitted_at = time.perf_counter()
+
+    def job():
+        waited_ms = (time.perf_counter() - submitted_at) * 1000
+        with _hash_stats_lock:
+            _hash_stats["started"] += 1
+            _hash_stats["queue_time_total_ms"] += waited_ms
+            _hash_stats["queue_time_max_ms"] = max(_hash_stats["queue_time_max_ms"], waited_ms)
+        return fn(*args)
+
+    with _hash_stats_lock:
+        _hash_stats["in_flight"] += 1
+    try:
+        future = _hash_executor.submit(job)
+    except BaseException:
+        _release_password_slot(None)
+        raise
+    # The slot is held until the job itself is done (or cancelled while still
+    # queued), not until the awaiting request goes away: a disconnected client
+    # must not let more jobs in than the executor has room for.
+    future.add_done_callback(_release_password_slot)
+    return await asyncio.wrap_future(future)
+
+
+def _release_password_slot(future) -> None:
+    _hash_slots.release()
+    outcome = None  # not submitted at all
+    if future is not None:
+        if future.cancelled():
+            outcome = "cancelled"
+        elif future.exception() is not None:
+            outcome = "failed"
+        else:
+            outcome = "completed"
+    with _hash_stats_lock:
+        _hash_stats["in_flight"] -= 1
+        if outcome:
+            _hash_stats[outcome] += 1
+
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+async def hash_password_async(password: str) -> str:
+    """hash_password on the dedicated bcrypt executor."""
+    return await _run_password_job(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the dedicated bcrypt executor."""
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
 def create_access_token(data: dict):
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = data.copy()
@@ -30,3 +141,47 @@ def create_refresh_token(data: dict):
     to_encode = data.copy()
     to_encode.update({"exp": expire, "type": "refresh"})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def hospital_claims(hospital_id, hospital_name=None) -> dict:
+    """Token claims describing the user's hospital (empty when the feature is off)."""
+    if not HOSPITAL_CLAIMS_ENABLED or not hospital_id:
+        return {}
+    return {
+        "hospital": {"id": str(hospital_id), "name": hospital_name},
+        "hcv": HOSPITAL_CLAIMS_VERSION,
+        "iat": int(time.time()),
+    }
+
+def revoke_hospital_claims(user_id) -> None:
+    """Stop trusting the hospital claims of tokens already issued to a user."""
+    if not user_id:
+        return
+    now = time.time()
+    with _claims_revoked_lock:
+        _claims_revoked_at[str(user_id)] = now
+        # Revocations older than the max claim age no longer matter
+        for uid in [u for u, at in _claims_revoked_at.items() if now - at > HOSPITAL_CLAIMS_MAX_AGE]:
+            del _claims_revoked_at[uid]
+
+def hospital_id_from_claims(payload: dict):
+    """
+    hospital_id carried by a verified token payload, or None when the token has
+    no hospital claim, the claim version is outdated, the claim is older than
+    HOSPITAL_CLAIMS_MAX_AGE or was revoked, or the feature is off.
+    """
+    if not HOSPITAL_CLAIMS_ENABLED or not payload:
+        return None
+    if payload.get("hcv") != HOSPITAL_CLAIMS_VERSION:
+        return None
+    issued_at = payload.get("iat")
+    if not isinstance(issued_at, (int, float)) or time.time() - issued_at > HOSPITAL_CLAIMS_MAX_AGE:
+        return None
+    with _claims_revoked_lock:
+        revoked_at = _claims_revoked_at.get(str(payload.get("sub")))
+    if revoked_at is not None and issued_at <= revoked_at:
+        return None
+    claim = payload.get("hospital")
+    if not isinstance(claim, dict):
+        return None
+    return claim.get("id") or None
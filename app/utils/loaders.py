@@ -0,0 +1,171 @@
+# app/utils/loaders.py
+"""
+Request-scoped batching loaders for small lookup rows
+(User.role, Nurse/Doctor/Hospital_Administrator.hospital_id, Hospital.name).
+
+Every HTTP request gets its own set of loaders (see RequestLoaderMiddleware).
+A loader remembers every row it has fetched, so the same row is never read
+twice within one request, and missing keys are always fetched together with
+one `in_()` query per table.
+"""
+import asyncio
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.db import get_supabase, get_async_supabase
+
+Row = Optional[Dict[str, Any]]
+
+
+class RowLoader:
+    """Batching, deduplicating loader for one table keyed by a single column."""
+
+    def __init__(self, table: str, key_column: str, columns: str):
+        self.table = table
+        self.key_column = key_column
+        self.columns = columns
+        self._rows: Dict[str, Row] = {}
+        self._lock = threading.Lock()
+        self._queue: Dict[str, asyncio.Future] = {}
+        self._dispatch_task: Optional[asyncio.Task] = None
+
+    def prime(self, key: str, row: Row) -> None:
+        """Seed the loader with a row that was fetched elsewhere."""
+        with self._lock:
+            self._rows.setdefault(str(key), row)
+
+    def _missing(self, keys: Iterable[str]) -> List[str]:
+        with self._lock:
+            return [k for k in dict.fromkeys(keys) if k not in self._rows]
+
+    def _store(self, keys: List[str], rows: List[Dict[str, Any]]) -> None:
+        found = {}
+        for row in rows:
+            found.setdefault(str(row.get(self.key_column)), row)
+        with self._lock:
+            for k in keys:
+                self._rows.setdefault(k, found.get(k))
+
+    def _pick(self, keys: List[str]) -> Dict[str, Row]:
+        with self._lock:
+            return {k: self._rows.get(k) for k in keys}
+
+    # ---- sync ----
+    def load_many(self, keys: Iterable[Any]) -> Dict[str, Row]:
+        keys = [str(k) for k in keys if k]
+        missing = self._missing(keys)
+        if missing:
+            resp = (
+                get_supabase().table(self.table)
+                .select(self.columns)
+                .in_(self.key_column, missing)
+                .execute()
+            )
+            self._store(missing, resp.data or [])
+        return self._pick(keys)
+
+    def load(self, key: Any) -> Row:
+        if not key:
+            return None
+        return self.load_many([key]).get(str(key))
+
+    # ---- async ----
+    async def aload_many(self, keys: Iterable[Any]) -> Dict[str, Row]:
+        keys = [str(k) for k in keys if k]
+        await asyncio.gather(*(self.aload(k) for k in dict.fromkeys(keys)))
+        return self._pick(keys)
+
+    async def aload(self, key: Any) -> Row:
+        """
+        Load one row. Keys requested in the same event-loop tick are
+        collected and fetched with a single `in_()` query.
+        """
+        if not key:
+            return None
+        key = str(key)
+        with self._lock:
+            if key in self._rows:
+                return self._rows[key]
+        future = self._queue.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._queue:
+                loop.call_soon(self._schedule_dispatch)
+            future = loop.create_future()
+            self._queue[key] = future
+        return await future
+
+    def _schedule_dispatch(self) -> None:
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._dispatch_task = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        queue, self._queue = self._queue, {}
+        keys = list(queue)
+        try:
+            supabase = await get_async_supabase()
+            resp = await (
+                supabase.table(self.table)
+                .select(self.columns)
+                .in_(self.key_column, keys)
+                .execute()
+            )
+            self._store(keys, resp.data or [])
+        except Exception as e:
+            for future in queue.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        rows = self._pick(keys)
+        for key, future in queue.items():
+            if not future.done():
+                future.set_result(rows.get(key))
+
+
+class RequestLoaders:
+    """The set of loaders shared by everything that runs inside one request."""
+
+    def __init__(self):
+        self.users = RowLoader("User", "user_id", "user_id, role, name")
+        self.nurses = RowLoader("Nurse", "user_id", "user_id, hospital_id")
+        self.doctors = RowLoader("Doctor", "user_id", "user_id, hospital_id")
+        self.admins = RowLoader("Hospital_Administrator", "user_id", "user_id, hospital_id")
+        self.hospitals = RowLoader("Hospital", "hospital_id", "hospital_id, name")
+
+    def staff(self, role: Optional[str]) -> Optional[RowLoader]:
+        """Staff-table loader for a role, or None for roles without a hospital."""
+        return {
+            "nurse": self.nurses,
+            "doctor": self.doctors,
+            "hospital_administrator": self.admins,
+        }.get(role)
+
+
+_request_loaders: ContextVar[Optional[RequestLoaders]] = ContextVar("request_loaders", default=None)
+
+
+def get_loaders() -> RequestLoaders:
+    """
+    Loaders of the current request. Outside a request (scripts, background
+    work) a fresh set is returned, so nothing is remembered between calls.
+    """
+    loaders = _request_loaders.get()
+    return loaders if loaders is not None else RequestLoaders()
+
+
+class RequestLoaderMiddleware:
+    """ASGI middleware that gives every HTTP request its own RequestLoaders."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_loaders.set(RequestLoaders())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_loaders.reset(token)
@@ -0,0 +1,17 @@
+# app/utils/metrics.py
+"""
+Registry of in-process counters (cache hit rates, executor queue times, ...)
+exposed by the /_metrics route.
+"""
+from typing import Callable, Dict
+
+_providers: Dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics(name: str, provider: Callable[[], dict]) -> None:
+    """Register a zero-argument callable returning a dict of current values."""
+    _providers[name] = provider
+
+
+def metrics_snapshot() -> Dict[str, dict]:
+    return {name: provider() for name, provider in _providers.items()}
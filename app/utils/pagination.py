@@ -0,0 +1,386 @@
+# app/utils/pagination.py
+"""
+Keyset (cursor) scanning for PostgREST tables.
+
+Instead of `.range(offset, offset + n - 1)` every page asks for the rows
+*after* the last key seen, so each page is an index seek (no growing offset
+to skip) and concurrent inserts/deletes cannot shift rows between pages.
+
+`build_query` is a zero-argument callable returning a fresh filtered query,
+e.g. `lambda: supabase.table("Hospital_Patient").select("patient_id").eq("hospital_id", hid)`,
+because supabase-py query builders are mutated by each filter call.
+The key column (and tie-breaker, if any) must be part of the selected columns.
+prefetch_keyset_pages() runs a full scan over a UUID key several pages at a time.
+"""
+import asyncio
+import base64
+import json
+import math
+import re
+import os
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 1000  # PostgREST max rows per request on Supabase
+
+# Parallel full scans (prefetch_keyset_pages): concurrent requests per scan and
+# the most UUID key ranges the rest of the table may be split into
+PREFETCH_WORKERS = int(os.getenv("SCAN_PREFETCH_WORKERS", "4"))
+PREFETCH_PARTITIONS = int(os.getenv("SCAN_PREFETCH_PARTITIONS", "128"))
+# Target fill of one key range, as a fraction of a page, so most ranges need one request
+PREFETCH_RANGE_FILL = 0.8
+# Pages a partition may fetch ahead of the consumer
+PREFETCH_AHEAD = 2
+
+Rows = List[Dict[str, Any]]
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Opaque, URL-safe cursor for an API response (e.g. {"after": last_id})."""
+    raw = json.dumps(position, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
+
+
+_PLAIN_COLUMN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def quote_column(column: str) -> str:
+    """
+    Quote column names PostgREST cannot take bare (spaces or other special
+    characters, e.g. "incident at date") for select lists, filters and order.
+    """
+    if _PLAIN_COLUMN.fullmatch(column) or (len(column) > 1 and column.startswith('"') and column.endswith('"')):
+        return column
+    return '"' + column.replace('"', '\\"') + '"'
+
+
+def _after(
+    query, key_column: str, last_key: Any, tiebreak_column: Optional[str], last_tiebreak: Any, descending: bool,
+    nullable: bool = False,
+):
+    op = "lt" if descending else "gt"
+    key = quote_column(key_column)
+    if tiebreak_column is None:
+        return query.lt(key, last_key) if descending else query.gt(key, last_key)
+    tie = quote_column(tiebreak_column)
+    if nullable and last_key is None:
+        # NULL keys sort last: only NULL-key rows past the tiebreak remain
+        query = query.is_(key, "null")
+        return query.lt(tie, last_tiebreak) if descending else query.gt(tie, last_tiebreak)
+    after = f"{key}.{op}.{last_key},and({key}.eq.{last_key},{tie}.{op}.{last_tiebreak})"
+    if nullable:
+        after += f",{key}.is.null"
+    return query.or_(after)
+
+
+def _ordered_page(
+    query, key_column: str, tiebreak_column: Optional[str], descending: bool, page_size: int, nullable: bool = False
+):
+    query = query.order(quote_column(key_column), desc=descending, nullsfirst=False if nullable else None)
+    if tiebreak_column is not None:
+        query = query.order(quote_column(tiebreak_column), desc=descending)
+    return query.limit(page_size)
+
+
+def keyset_page(
+    build_query: Callable[[], Any],
+    key_column: str,
+    *,
+    after: Any = None,
+    after_tiebreak: Any = None,
+    tiebreak_column: Optional[str] = None,
+    descending: bool = False,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    nullable: bool = False,
+) -> Rows:
+    """
+    Fetch a single page of rows following the (after, after_tiebreak) cursor.
+    `nullable` pages a key column holding NULLs (with a tiebreak_column):
+    NULL keys sort last, and a NULL `after` with an `after_tiebreak` is a
+    cursor among them.
+    """
+    query = build_query()
+    if after is not None or (nullable and after_tiebreak is not None):
+        query = _after(query, key_column, after, tiebreak_column, after_tiebreak, descending, nullable)
+    resp = _ordered_page(query, key_column, tiebreak_column, descending, page_size, nullable).execute()
+    return resp.data or []
+
+
+def keyset_pages(
+    build_query: Callable[[], Any],
+    key_column: str,
+    *,
+    tiebreak_column: Optional[str] = None,
+    descending: bool = False,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    after: Any = None,
+) -> Iterator[Rows]:
+    """
+    Yield every page of the query in key order. Use a unique key (primary key),
+    or a non-unique key such as created_on together with a unique tiebreak_column.
+    `after` resumes a unique-key scan after that key.
+    """
+    last_key, last_tiebreak = after, None
+    while True:
+        rows = keyset_page(
+            build_query,
+            key_column,
+            after=last_key,
+            after_tiebreak=last_tiebreak,
+            tiebreak_column=tiebreak_column,
+            descending=descending,
+            page_size=page_size,
+        )
+        if not rows:
+            return
+        yield rows
+        last_key = rows[-1].get(key_column)
+        if tiebreak_column is not None:
+            last_tiebreak = rows[-1].get(tiebreak_column)
+        if last_key is None:
+            return  # NULL keys cannot be paged past
+
+
+async def akeyset_page(
+    build_query: Callable[[], Any],
+    key_column: str,
+    *,
+    after: Any = None,
+    after_tiebreak: Any = None,
+    tiebreak_column: Optional[str] = None,
+    descending: bool = False,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    nullable: bool = False,
+) -> Rows:
+    """Async variant of keyset_page for queries built on the async client."""
+    query = build_query()
+    if after is not None or (nullable and after_tiebreak is not None):
+        query = _after(query, key_column, after, tiebreak_column, after_tiebreak, descending, nullable)
+    resp = await _ordered_page(query, key_column, tiebreak_column, descending, page_size, nullable).execute()
+    return resp.data or []
+
+
+async def akeyset_pages(
+    build_query: Callable[[], Any],
+    key_column: str,
+    *,
+    tiebreak_column: Optional[str] = None,
+    descending: bool = False,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    after: Any = None,
+) -> AsyncIterator[Rows]:
+    """Async variant of keyset_pages for queries built on the async client."""
+    last_key, last_tiebreak = after, None
+    while True:
+        rows = await akeyset_page(
+            build_query,
+            key_column,
+            after=last_key,
+            after_tiebreak=last_tiebreak,
+            tiebreak_column=tiebreak_column,
+            descending=descending,
+            page_size=page_size,
+        )
+        if not rows:
+            return
+        yield rows
+        last_key = rows[-1].get(key_column)
+        if tiebreak_column is not None:
+            last_tiebreak = rows[-1].get(tiebreak_column)
+        if last_key is None:
+            return
+
+
+# ---------------------------------------------------------------------------
+# Parallel prefetch for full scans on UUID primary keys
+# ---------------------------------------------------------------------------
+#
+# The first page is read normally. If it is full, one more request reads the
+# highest key, and the keys between the first page and that one are cut into
+# equal ranges; every range is keyset-scanned on its own, several ranges at a
+# time, and pages are yielded range by range, so callers still see the rows
+# in key order. The last range is open-ended, for rows inserted meanwhile.
+# How densely the first page packs its keys estimates the remaining row
+# count without a count="exact" query (a full scan server-side). The ranges
+# are sized by that estimate (PREFETCH_RANGE_FILL of a page each), so keys
+# clustered in part of the key space do not turn into empty range requests.
+
+def _uuid_ranges(
+    first: Any, after: Any, highest: Any, page_rows: int, max_partitions: int
+) -> Optional[List[Tuple[str, Optional[str]]]]:
+    """
+    (exclusive lower, inclusive upper) UUID bounds covering keys > after, for
+    a first page of page_rows keys from `first` to `after` and a highest key.
+    """
+    try:
+        start, low, high = (uuid.UUID(str(key)).int for key in (first, after, highest))
+    except (TypeError, ValueError):
+        return None
+    span = high - low
+    remaining = (page_rows - 1) * span / max(low - start, 1)
+    partitions = min(max_partitions, span, math.ceil(remaining / (page_rows * PREFETCH_RANGE_FILL)))
+    if partitions < 2:
+        return None
+    cuts = [low + span * i // partitions for i in range(partitions)]
+    uppers = [str(uuid.UUID(int=c)) for c in cuts[1:]] + [None]
+    return [(str(uuid.UUID(int=c)), upper) for c, upper in zip(cuts, uppers)]
+
+
+def _bounded(build_query: Callable[[], Any], key_column: str, upper: Optional[str]) -> Callable[[], Any]:
+    if upper is None:
+        return build_query
+    return lambda: build_query().lte(quote_column(key_column), upper)
+
+
+class _RangeScan:
+    """Cursor and prefetched pages of one key range."""
+
+    def __init__(self, build_query: Callable[[], Any], lower: str):
+        self.build_query = build_query
+        self.cursor = lower
+        self.pages: deque = deque()
+        self.done = False
+
+    def accept(self, rows: Rows, key_column: str, page_size: int) -> None:
+        if rows:
+            self.pages.append(rows)
+            self.cursor = rows[-1].get(key_column)
+        # A short page ends the range: the full first page showed that the
+        # server does return page_size rows when there are that many
+        if len(rows) < page_size or self.cursor is None:
+            self.done = True
+
+
+def _wanted(ranges: List[_RangeScan], current: int, busy, workers: int) -> List[int]:
+    """Ranges to fetch next: the lowest ones first, within a window of `workers` ranges."""
+    wanted = []
+    for i in range(current, min(current + workers, len(ranges))):
+        scan = ranges[i]
+        if len(busy) + len(wanted) >= workers:
+            break
+        if i in busy or scan.done or len(scan.pages) >= PREFETCH_AHEAD:
+            continue
+        wanted.append(i)
+    return wanted
+
+
+def prefetch_keyset_pages(
+    build_query: Callable[[], Any],
+    key_column: str,
+    *,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    workers: int = PREFETCH_WORKERS,
+    partitions: int = PREFETCH_PARTITIONS,
+) -> Iterator[Rows]:
+    """
+    Like keyset_pages (ascending, unique UUID key) but fetches up to `workers`
+    pages concurrently. At most workers * PREFETCH_AHEAD pages are held ahead
+    of the consumer. Falls back to a sequential scan for non-UUID keys, small
+    results and when the server returns less than page_size rows per page.
+    """
+    first = keyset_page(build_query, key_column, page_size=page_size)
+    if not first:
+        return
+    yield first
+    last_key = first[-1].get(key_column)
+    if last_key is None:
+        return
+    bounds = None
+    if workers > 1 and len(first) == page_size:
+        highest = keyset_page(build_query, key_column, descending=True, page_size=1)
+        if highest:
+            bounds = _uuid_ranges(first[0].get(key_column), last_key, highest[0].get(key_column), page_size, partitions)
+    if not bounds:
+        yield from keyset_pages(build_query, key_column, page_size=page_size, after=last_key)
+        return
+
+    ranges = [_RangeScan(_bounded(build_query, key_column, upper), lower) for lower, upper in bounds]
+    busy: Dict[int, Any] = {}
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+    try:
+        current = 0
+        while current < len(ranges):
+            for i in _wanted(ranges, current, busy, workers):
+                scan = ranges[i]
+                busy[i] = pool.submit(
+                    keyset_page, scan.build_query, key_column, after=scan.cursor, page_size=page_size
+                )
+            scan = ranges[current]
+            if scan.pages:
+                yield scan.pages.popleft()
+            elif scan.done:
+                current += 1
+            else:
+                finished, _ = wait(busy.values(), return_when=FIRST_COMPLETED)
+                for i, future in list(busy.items()):
+                    if future in finished:
+                        del busy[i]
+                        ranges[i].accept(future.result(), key_column, page_size)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def aprefetch_keyset_pages(
+    build_query: Callable[[], Any],
+    key_column: str,
+    *,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    workers: int = PREFETCH_WORKERS,
+    partitions: int = PREFETCH_PARTITIONS,
+) -> AsyncIterator[Rows]:
+    """Async variant of prefetch_keyset_pages (concurrent requests on the async client)."""
+
+    first = await akeyset_page(build_query, key_column, page_size=page_size)
+    if not first:
+        return
+    yield first
+    last_key = first[-1].get(key_column)
+    if last_key is None:
+        return
+    bounds = None
+    if workers > 1 and len(first) == page_size:
+        highest = await akeyset_page(build_query, key_column, descending=True, page_size=1)
+        if highest:
+            bounds = _uuid_ranges(first[0].get(key_column), last_key, highest[0].get(key_column), page_size, partitions)
+    if not bounds:
+        async for rows in akeyset_pages(build_query, key_column, page_size=page_size, after=last_key):
+            yield rows
+        return
+
+    ranges = [_RangeScan(_bounded(build_query, key_column, upper), lower) for lower, upper in bounds]
+    busy: Dict[int, asyncio.Task] = {}
+    try:
+        current = 0
+        while current < len(ranges):
+            for i in _wanted(ranges, current, busy, workers):
+                busy[i] = asyncio.ensure_future(
+                    akeyset_page(ranges[i].build_query, key_column, after=ranges[i].cursor, page_size=page_size)
+                )
+            scan = ranges[current]
+            if scan.pages:
+                yield scan.pages.popleft()
+            elif scan.done:
+                current += 1
+            else:
+                finished, _ = await asyncio.wait(busy.values(), return_when=asyncio.FIRST_COMPLETED)
+                for i, task in list(busy.items()):
+                    if task in finished:
+                        del busy[i]
+                        ranges[i].accept(task.result(), key_column, page_size)
+    finally:
+        for task in busy.values():
+            task.cancel()
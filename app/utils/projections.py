@@ -0,0 +1,180 @@
+# app/utils/projections.py
+"""
+Declared column sets ("projections") for list and analytics queries.
+
+Services select `projection.select` instead of "*", so only the columns a use
+case needs travel over the wire and get JSON-decoded.
+
+Development check (PROJECTION_CHECK=1): rows consumed by Python code can be
+wrapped with `projection.track(rows)`. Reading a column that was never
+selected prints a warning right away; columns that were selected but never
+read show up under "projections" in /_metrics and are printed at exit.
+
+Schema check (PROJECTION_SCHEMA_CHECK, on by default): at startup the
+columns of every projection with a `table` are compared with the table
+columns PostgREST reports. A projection naming a column the table does not
+have (e.g. a model alias that drifted from the real column name) is logged
+and falls back to selecting "*", so its list queries keep working.
+"""
+import atexit
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from pydantic import BaseModel
+
+from app.utils.metrics import register_metrics
+from app.utils.pagination import quote_column
+
+PROJECTION_CHECK = os.getenv("PROJECTION_CHECK", "false").lower() in ("1", "true", "yes")
+PROJECTION_SCHEMA_CHECK = os.getenv("PROJECTION_SCHEMA_CHECK", "true").lower() in ("1", "true", "yes")
+
+_projections: Dict[str, "Projection"] = {}
+# {table: columns} as PostgREST last reported them (see record_schema)
+_table_columns: Dict[str, List[str]] = {}
+
+
+def model_columns(model: Type[BaseModel], exclude: Iterable[str] = ()) -> List[str]:
+    """Database column names (field alias, else field name) of a response model."""
+    exclude = set(exclude)
+    return [
+        field.alias or name
+        for name, field in model.model_fields.items()
+        if name not in exclude
+    ]
+
+
+class Projection:
+    """
+    A named set of columns of one table, plus optional embedded resources
+    such as "Hospital(name)". `key_columns` are selected for the scan itself
+    (keyset cursors) and are never reported as unread. `table` names the
+    table the columns belong to (None for RPC results), for the schema check.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        columns: Iterable[str],
+        embeds: Iterable[str] = (),
+        key_columns: Iterable[str] = (),
+        table: Optional[str] = None,
+    ):
+        self.name = name
+        self.table = table
+        self.key_columns = tuple(key_columns)
+        self.columns = tuple(dict.fromkeys((*self.key_columns, *columns)))
+        self.embeds = tuple(embeds)
+        self.select = ", ".join([quote_column(c) for c in self.columns] + list(self.embeds))
+        # Keys a row of this projection may have (embeds come back under their name)
+        self._keys = set(self.columns) | {e.split("(", 1)[0].strip() for e in self.embeds}
+        self._lock = threading.Lock()
+        self._read: set = set(self.key_columns)
+        self._unselected: set = set()
+        self._tracked_rows = 0
+        _projections[name] = self
+
+    def check_schema(self, table_columns: Iterable[str]) -> List[str]:
+        """
+        Columns of this projection missing from `table_columns`. When there
+        are any, the projection selects "*" (plus its embeds) from now on.
+        """
+        table_columns = set(table_columns)
+        missing = [c for c in self.columns if c not in table_columns]
+        if missing:
+            self.select = ", ".join(["*", *self.embeds])
+        return missing
+
+    def track(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Wrap rows to record which columns are read (no-op unless PROJECTION_CHECK)."""
+        if not PROJECTION_CHECK or not rows:
+            return rows
+        with self._lock:
+            self._tracked_rows += len(rows)
+        return [_TrackedRow(self, row) for row in rows]
+
+    def _note_read(self, key: Any) -> None:
+        if key in self._read or key in self._unselected:
+            return
+        with self._lock:
+            if key in self._keys:
+                self._read.add(key)
+                return
+            self._unselected.add(key)
+        print(f"⚠️ Projection '{self.name}': read of unselected column {key!r}")
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "selected": len(self._keys),
+                "tracked_rows": self._tracked_rows,
+                "unread": sorted(self._keys - self._read) if self._tracked_rows else [],
+                "unselected_reads": sorted(map(str, self._unselected)),
+            }
+
+
+class _TrackedRow(dict):
+    """dict that reports key reads to its Projection."""
+
+    __slots__ = ("_projection",)
+
+    def __init__(self, projection: Projection, row: Dict[str, Any]):
+        super().__init__(row)
+        self._projection = projection
+
+    def __getitem__(self, key):
+        self._projection._note_read(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self._projection._note_read(key)
+        return super().get(key, default)
+
+    def copy(self) -> "_TrackedRow":
+        """A copy whose reads are still reported."""
+        return _TrackedRow(self._projection, self)
+
+
+def check_projection_schema(table_columns: Dict[str, Iterable[str]]) -> Dict[str, List[str]]:
+    """
+    Check every projection with a table against {table: columns}; returns
+    {projection name: missing columns} for the ones that fell back to "*".
+    """
+    record_schema(table_columns)
+    problems = {}
+    for name, projection in _projections.items():
+        if projection.table is None:
+            continue
+        if projection.table not in table_columns:
+            print(f"⚠️ Projection '{name}': table {projection.table!r} not found in the schema")
+            continue
+        missing = projection.check_schema(table_columns[projection.table])
+        if missing:
+            problems[name] = missing
+            print(f"❌ Projection '{name}': {projection.table!r} has no column(s) {missing}, selecting * instead")
+    return problems
+
+
+def record_schema(table_columns: Dict[str, Iterable[str]]) -> None:
+    """Remember {table: columns} for schema_columns()."""
+    _table_columns.update({table: list(columns) for table, columns in table_columns.items()})
+
+
+def schema_columns(table: str) -> Optional[List[str]]:
+    """Columns of a table as the schema check read them, or None if it has not."""
+    return _table_columns.get(table)
+
+
+def projections_report() -> Dict[str, dict]:
+    return {name: p.report() for name, p in _projections.items()}
+
+
+def _print_unread() -> None:
+    for name, report in projections_report().items():
+        if report["unread"]:
+            print(f"⚠️ Projection '{name}': selected but never read: {report['unread']}")
+
+
+if PROJECTION_CHECK:
+    register_metrics("projections", projections_report)
+    atexit.register(_print_unread)
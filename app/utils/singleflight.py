@@ -0,0 +1,120 @@
+# app/utils/singleflight.py
+"""
+Request coalescing ("single flight") for expensive, idempotent computations.
+
+Concurrent callers asking for the same key share one in-flight computation:
+the first caller runs it, the others wait and receive the same result (or
+exception). Nothing is kept once the computation finishes; pair with a
+cache for reuse over time.
+
+    _flights = SingleFlight("analytics")
+    result = _flights.do(key, compute, filters)          # threads (sync routes)
+    result = await _flights.ado(key, compute_async, f)   # event loop (async routes)
+
+Per-group counts (calls, executions, coalesced, errors) are reported under
+"singleflight" in /_metrics.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.utils.metrics import register_metrics
+
+_groups: Dict[str, "SingleFlight"] = {}
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with equal keys (thread and asyncio variants)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        _groups[name] = self
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """fn(*args, **kwargs), shared with other threads calling do() with the same key."""
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def ado(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Async variant of do(): awaits one shared task per key and event loop."""
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        with self._lock:
+            self.calls += 1
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = loop.create_task(fn(*args, **kwargs))
+                self._tasks[task_key] = task
+                self.executions += 1
+                task.add_done_callback(lambda t: self._finished(task_key, t))
+            else:
+                self.coalesced += 1
+        # shield: a caller that goes away (client disconnect) does not cancel
+        # the computation the other callers are waiting for
+        return await asyncio.shield(task)
+
+    def _finished(self, task_key: Hashable, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._tasks.get(task_key) is task:
+                del self._tasks[task_key]
+            if task.cancelled() or task.exception() is not None:
+                self.errors += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "in_flight": len(self._calls) + len(self._tasks),
+            }
+
+
+def singleflight_report() -> Dict[str, dict]:
+    return {name: group.stats() for name, group in _groups.items()}
+
+
+register_metrics("singleflight", singleflight_report)
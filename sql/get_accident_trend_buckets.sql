@@ -0,0 +1,47 @@
+-- Accident trend buckets for GET /govDash/trendsAll (TRENDS_MODE=rpc).
+--
+-- Returns one row per (bucket_type, bucket) instead of one row per accident:
+--   bucket_type = 'month'   bucket = 'YYYY-MM'
+--   bucket_type = 'year'    bucket = 'YYYY'
+--   bucket_type = 'weekday' bucket = 'Monday' .. 'Sunday'
+-- with the number of accidents and of serious ones (Severity = 'S').
+-- Like the Python path, rows whose "incident at date" is empty or not an
+-- ISO date (YYYY-MM-DD or YYYYMMDD) are skipped.
+--
+-- Apply in the Supabase SQL editor (or psql); call with
+--   supabase.rpc("get_accident_trend_buckets", {}).execute()
+
+create or replace function try_iso_date(value text)
+returns date
+language plpgsql
+immutable
+as $$
+begin
+  if value is null or value !~ '^(\d{4}-\d{2}-\d{2}|\d{8})$' then
+    return null;
+  end if;
+  return value::date;
+exception when others then
+  return null;  -- e.g. 2023-02-30
+end;
+$$;
+
+create or replace function get_accident_trend_buckets()
+returns table (bucket_type text, bucket text, total bigint, serious bigint)
+language sql
+stable
+as $$
+  with dated as (
+    select try_iso_date("incident at date"::text) as day,
+           "Severity" = 'S' as is_serious
+    from "Accident Record"
+  )
+  select 'month', to_char(day, 'YYYY-MM'), count(*), count(*) filter (where is_serious)
+  from dated where day is not null group by 2
+  union all
+  select 'year', extract(year from day)::int::text, count(*), count(*) filter (where is_serious)
+  from dated where day is not null group by 2
+  union all
+  select 'weekday', to_char(day, 'FMDay'), count(*), count(*) filter (where is_serious)
+  from dated where day is not null group by 2
+$$;
@@ -0,0 +1,417 @@
+"""
+In-memory stand-in for the Supabase client in offline tests
+
+FakeSupabase holds tables as lists of dicts and answers the query-builder
+calls the services make (select with embeds, eq/neq/gt/gte/lt/lte/in_/is_,
+or_ with and(...) groups, order, limit, single, insert/update/delete, rpc).
+Filters compare like PostgREST does on text: numbers are compared as
+numbers, everything else as strings (ISO dates and UUIDs sort correctly).
+
+    db = FakeSupabase({"Hospital": [...]}, embeds={"Patient": ("patient_id", "patient_id")})
+    monkeypatch.setattr(service_module, "get_supabase", lambda: db)
+    async def fake_async(): return db.aio()
+    monkeypatch.setattr(service_module, "get_async_supabase", fake_async)
+
+`db.requests` records (table, filters) of every executed query.
+analytics_rpc stands in for the get_accident_analytics_data function and
+seeded_supabase builds random patients, hospital links and accident records
+around it.
+"""
+import copy
+import random
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.services.accident_analytics_service import NOT_SHARED
+
+
+class FakeResponse:
+    def __init__(self, data, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _unquote(column: str) -> str:
+    column = column.strip()
+    if len(column) > 1 and column.startswith('"') and column.endswith('"'):
+        return column[1:-1].replace('\\"', '"')
+    return column
+
+
+def _split_top(text: str, sep: str = ",") -> List[str]:
+    """Split on `sep` outside parentheses and double quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == sep and depth == 0 and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _text(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _ordered(row_value, filter_value) -> Tuple[Any, Any]:
+    """Both sides as numbers when the row holds a number, else as text."""
+    if isinstance(row_value, (int, float)) and not isinstance(row_value, bool):
+        return row_value, float(filter_value)
+    return _text(row_value), _text(filter_value)
+
+
+def _matches(row: Dict[str, Any], column: str, op: str, value) -> bool:
+    actual = row.get(_unquote(column))
+    if op == "is":
+        return actual is None if _text(value) in (None, "null") else _text(actual) == _text(value)
+    if op == "in":
+        return _text(actual) in {_text(v) for v in value}
+    if op == "eq":
+        return actual is not None and _text(actual) == _text(value)
+    if op == "neq":
+        return actual is not None and _text(actual) != _text(value)
+    if actual is None:
+        return False
+    left, right = _ordered(actual, value)
+    return {"gt": left > right, "gte": left >= right, "lt": left < right, "lte": left <= right}[op]
+
+
+def _or_condition(expr: str) -> Callable[[Dict[str, Any]], bool]:
+    """Parse one or_()/and() term, e.g. 'a.gt.1' or 'and(a.eq.1,b.gt.2)'."""
+    for group, combine in (("and(", all), ("or(", any)):
+        if expr.startswith(group) and expr.endswith(")"):
+            terms = [_or_condition(t) for t in _split_top(expr[len(group):-1])]
+            return lambda row, terms=terms, combine=combine: combine(t(row) for t in terms)
+    if expr.startswith('"'):
+        end = expr.index('"', 1)
+        column, rest = expr[:end + 1], expr[end + 2:]
+    else:
+        column, rest = expr.split(".", 1)
+    op, value = rest.split(".", 1)
+    if op == "in":
+        value = [_unquote(v) for v in _split_top(value.strip("()"))]
+    return lambda row: _matches(row, column, op, value)
+
+
+class FakeQuery:
+    def __init__(self, db: "FakeSupabase", table: str, is_async: bool, rows: Optional[List[Dict[str, Any]]] = None):
+        self.db = db
+        self.table = table
+        self.is_async = is_async
+        self.rows = rows  # fixed result rows (an rpc call) instead of a table
+        self.columns = "*"
+        self.filters: List[Tuple[str, ...]] = []
+        self.conditions: List[Callable[[Dict[str, Any]], bool]] = []
+        self.orders: List[Tuple[str, bool, bool]] = []
+        self.row_limit: Optional[int] = None
+        self.offset = 0
+        self.single_row = None  # None, "single" or "maybe"
+        self.action = "select"
+        self.payload = None
+
+    # ---- builder ----
+    def select(self, columns: str = "*", **_kwargs):
+        self.columns = columns
+        return self
+
+    def _filter(self, column: str, op: str, value):
+        self.filters.append((_unquote(column), op, value))
+        self.conditions.append(lambda row: _matches(row, column, op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._filter(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "lte", value)
+
+    def in_(self, column, values):
+        return self._filter(column, "in", list(values))
+
+    def is_(self, column, value):
+        return self._filter(column, "is", value)
+
+    def or_(self, expr: str, **_kwargs):
+        self.filters.append(("or", expr))
+        self.conditions.append(_or_condition(f"or({expr})"))
+        return self
+
+    def order(self, column: str, desc: bool = False, nullsfirst: Optional[bool] = None, **_kwargs):
+        # PostgreSQL puts NULLs last ascending and first descending by default
+        self.orders.append((_unquote(column), desc, desc if nullsfirst is None else nullsfirst))
+        return self
+
+    def limit(self, count: int, **_kwargs):
+        self.row_limit = count
+        return self
+
+    def range(self, start: int, end: int, **_kwargs):
+        self.offset, self.row_limit = start, end - start + 1
+        return self
+
+    def single(self):
+        self.single_row = "single"
+        return self
+
+    def maybe_single(self):
+        self.single_row = "maybe"
+        return self
+
+    def insert(self, payload, **_kwargs):
+        self.action, self.payload = "insert", payload
+        return self
+
+    def update(self, payload, **_kwargs):
+        self.action, self.payload = "update", payload
+        return self
+
+    def delete(self, **_kwargs):
+        self.action = "delete"
+        return self
+
+    # ---- execution ----
+    def execute(self):
+        if self.is_async:
+            async def run():
+                return self._run()
+            return run()
+        return self._run()
+
+    def _run(self) -> FakeResponse:
+        self.db.requests.append((self.table, list(self.filters)))
+        if self.action == "insert":
+            new = [dict(r) for r in (self.payload if isinstance(self.payload, list) else [self.payload])]
+            self.db.tables.setdefault(self.table, []).extend(new)
+            return FakeResponse(copy.deepcopy(new))
+        source = self.rows if self.rows is not None else self.db.tables.get(self.table, [])
+        matched = [row for row in source if all(c(row) for c in self.conditions)]
+        if self.action == "update":
+            for row in matched:
+                row.update(self.payload)
+            return FakeResponse(copy.deepcopy(matched))
+        if self.action == "delete":
+            self.db.tables[self.table] = [row for row in source if row not in matched]
+            return FakeResponse(copy.deepcopy(matched))
+        for column, desc, nulls_first in reversed(self.orders):
+            present = [r for r in matched if r.get(column) is not None]
+            missing = [r for r in matched if r.get(column) is None]
+            present.sort(key=lambda r: r[column], reverse=desc)
+            matched = missing + present if nulls_first else present + missing
+        matched = matched[self.offset:]
+        if self.row_limit is not None:
+            matched = matched[:self.row_limit]
+        data = [self.db._project(self.table, row, self.columns) for row in matched]
+        if self.single_row:
+            if len(data) != 1 and self.single_row == "single":
+                raise AssertionError(f"single() matched {len(data)} rows of {self.table}")
+            return FakeResponse(data[0] if data else None)
+        return FakeResponse(data)
+
+
+class FakeSupabase:
+    """
+    tables: {table name: [row dicts]}
+    embeds: {embedded table: (column of the queried row, column of the embedded row)}
+            for many-to-one embeds such as Patient(...) on "Accident Record"
+    rpcs:   {function name: callable(db, params) -> rows}
+    """
+
+    def __init__(self, tables: Dict[str, List[Dict[str, Any]]], embeds=None, rpcs=None, is_async: bool = False):
+        self.tables = tables
+        self.embeds = embeds or {}
+        self.rpcs = rpcs or {}
+        self.is_async = is_async
+        self.requests: List[Tuple[str, list]] = []
+
+    def aio(self) -> "FakeSupabase":
+        """The same data behind an async client (execute() returns a coroutine)."""
+        twin = FakeSupabase(self.tables, self.embeds, self.rpcs, is_async=True)
+        twin.requests = self.requests
+        return twin
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name, self.is_async)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> FakeQuery:
+        rows = self.rpcs[name](self, params or {})
+        return FakeQuery(self, f"rpc:{name}", self.is_async, rows=rows)
+
+    def _project(self, table: str, row: Dict[str, Any], columns: str) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for item in _split_top(columns):
+            if item == "*":
+                out.update(copy.deepcopy(row))
+                continue
+            alias = None
+            if ":" in item and not item.startswith('"'):
+                alias, item = item.split(":", 1)
+            if item.endswith(")") and "(" in item:
+                name, inner = item[:-1].split("(", 1)
+                name = name.split("!", 1)[0]
+                local, remote = self.embeds[name]
+                target = next((r for r in self.tables.get(name, []) if _text(r.get(remote)) == _text(row.get(local))), None)
+                out[alias or name] = self._project(name, target, inner) if target is not None else None
+            else:
+                column = _unquote(item)
+                out[alias or column] = copy.deepcopy(row.get(column))
+        return out
+
+
+ANALYTICS_COLUMNS = [
+    'time of collision', 'Collision with', 'Mode of traveling during accident', 'Category of Road',
+    'Discharge Outcome', 'Family monthly income before accident', 'Family monthly income after accident',
+    'Family current status', 'vehicle insured', 'vehicle insured type', 'Bystander expenditure per day',
+    'incident at date',
+]
+PATIENT_FIELDS = ['Date of Birth', 'Gender', 'Ethnicity', 'Education Qualification', 'Occupation']
+
+
+def analytics_rpc(db: FakeSupabase, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    get_accident_analytics_data for a hospital and incident date range (the
+    other filters are not emulated): accident rows of the hospital's
+    patients with the patient fields under patient_data.
+    """
+    patients = {p["patient_id"]: p for p in db.tables.get("Patient", [])}
+    linked = {
+        link["patient_id"] for link in db.tables.get("Hospital_Patient", [])
+        if params.get("p_hospital_id") is None or link["hospital_id"] == params["p_hospital_id"]
+    }
+    rows = []
+    for accident in db.tables.get("Accident Record", []):
+        incident_date = accident.get("incident at date")
+        if accident["patient_id"] not in linked:
+            continue
+        if params.get("p_start_date") and not (incident_date and incident_date >= params["p_start_date"]):
+            continue
+        if params.get("p_end_date") and not (incident_date and incident_date <= params["p_end_date"]):
+            continue
+        patient = patients.get(accident["patient_id"])
+        row = {c: accident.get(c) for c in ANALYTICS_COLUMNS}
+        row["accident_id"] = accident["accident_id"]
+        row["patient_data"] = {f: patient.get(f) for f in PATIENT_FIELDS} if patient else None
+        row["Patient"] = {"Gender": patient.get("Gender")} if patient else None
+        rows.append(row)
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Seeded hospital data
+# ---------------------------------------------------------------------------
+
+PATIENT_VALUES = {
+    "Gender": ["Male", "Female", None],
+    "Ethnicity": ["Sinhala", "Tamil", "Moor", "Burgher", None],
+    "Education Qualification": ["O/L", "A/L", None],
+    "Occupation": ["Farmer", "Driver", "Student", None],
+}
+ACCIDENT_VALUES = {
+    "time of collision": ["08:15", "14:30", "9:45 PM", None],
+    "Collision with": ["Car", "Bus", "Lorry", NOT_SHARED, None],
+    "Mode of traveling during accident": ["Motorbike", "Pedestrian", "Bus"],
+    "Category of Road": ["A", "B", "Minor", NOT_SHARED, None],
+    "Discharge Outcome": ["Home", "Transferred", "Death", None],
+    "Family monthly income before accident": ["10000-15000", "20000", None],
+    "Family monthly income after accident": ["5000-10000", "Above 50000", None],
+    "Family current status": ["Same", "Worse"],
+    "vehicle insured": ["Yes", "No"],
+    "vehicle insured type": ["Full", "Third party"],
+    "Bystander expenditure per day": ["0", "150", "300"],
+}
+UNLINKED_PATIENT = "p-unlinked"  # patient_id of accidents with no Patient row and no hospital
+
+
+def fake_patient(rng: random.Random, patient_id: str) -> Dict[str, Any]:
+    record = {
+        "patient_id": patient_id,
+        "Date of Birth": rng.choice(
+            [None, "bad", f"{rng.randint(1940, 2020)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"]
+        ),
+    }
+    record.update({field: rng.choice(values) for field, values in PATIENT_VALUES.items()})
+    return record
+
+
+def fake_accident(rng: random.Random, accident_id: str, patient_id: str) -> Dict[str, Any]:
+    record = {
+        "accident_id": accident_id,
+        "patient_id": patient_id,
+        "incident at date": rng.choice(
+            [None, f"20{rng.randint(18, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"]
+        ),
+    }
+    record.update({column: rng.choice(values) for column, values in ACCIDENT_VALUES.items()})
+    return record
+
+
+def seeded_supabase(
+    seed: int,
+    *,
+    hospitals: Sequence[str] = ("h1", "h2"),
+    patients: int = 8,
+    accidents: int = 30,
+    shared: int = 1,
+    unlinked: int = 0,
+    regions: Optional[Dict[str, Optional[str]]] = None,
+) -> FakeSupabase:
+    """
+    Patients p000, p001, ... linked to `hospitals` in turn; the first `shared`
+    patients are also linked to the next hospital in the list. Accident
+    records a0000, a0001, ... go to the patients in turn, except the last
+    `unlinked`, which belong to UNLINKED_PATIENT. `regions` ({hospital_id:
+    Region}) adds a Hospital table; hospitals only listed there have no patients.
+    """
+    rng = random.Random(seed)
+    patient_rows = [fake_patient(rng, f"p{i:03d}") for i in range(patients)]
+    links = [
+        {"patient_id": p["patient_id"], "hospital_id": hospitals[i % len(hospitals)]}
+        for i, p in enumerate(patient_rows)
+    ]
+    links += [
+        {"patient_id": p["patient_id"], "hospital_id": hospitals[(i + 1) % len(hospitals)]}
+        for i, p in enumerate(patient_rows[:shared])
+    ]
+    accident_rows = [
+        fake_accident(
+            rng,
+            f"a{i:04d}",
+            patient_rows[i % patients]["patient_id"] if i < accidents - unlinked else UNLINKED_PATIENT,
+        )
+        for i in range(accidents)
+    ]
+    tables = {"Patient": patient_rows, "Hospital_Patient": links, "Accident Record": accident_rows}
+    if regions is not None:
+        tables["Hospital"] = [
+            {"hospital_id": hospital_id, "name": f"Hospital {hospital_id}", "Region": region}
+            for hospital_id, region in regions.items()
+        ]
+    return FakeSupabase(
+        tables,
+        embeds={"Patient": ("patient_id", "patient_id")},
+        rpcs={"get_accident_analytics_data": analytics_rpc},
+    )
@@ -0,0 +1,161 @@
+"""
+GET /accidents/export, offline against tests/fake_supabase.py
+
+Every format must stream each matching record once with all columns of the
+table (not only the AccidentRecordOut ones) plus its injuries and treatments.
+"""
+import asyncio
+import csv
+import io
+import json
+import random
+import uuid
+
+import pyarrow.parquet as pq
+import pytest
+
+from app.services import accident_export_service as export
+from app.services.accident_export_service import export_accident_records_service
+from app.utils import projections
+from tests.fake_supabase import FakeSupabase
+
+NURSES = [{"user_id": "nurse-a", "hospital_id": "h1"}, {"user_id": "nurse-b", "hospital_id": "h2"}]
+# "vehicle insured type" is a table column the response model does not have
+TABLE_COLUMNS = ["accident_id", "patient_id", "managed_by", "Severity", "Completed",
+                 "incident at date", "vehicle insured", "vehicle insured type"]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    rng = random.Random(14)
+    accidents = [
+        {
+            "accident_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "patient_id": f"p{i % 7}",
+            "managed_by": rng.choice(NURSES)["user_id"],
+            "Severity": rng.choice(["S", "M", None]),
+            "Completed": rng.random() < 0.5,
+            "incident at date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "vehicle insured": rng.choice(["Yes", "No"]),
+            "vehicle insured type": rng.choice(["Full", "Third party", None]),
+        }
+        for i in range(57)
+    ]
+    injuries = [{"accident_id": a["accident_id"], "injury_no": n, "site_of_injury": "Head"}
+                for a in accidents[::3] for n in (1, 2)]
+    treatments = [{"accident_id": a["accident_id"], "treatment_no": 1, "treatment_type": "Surgery"}
+                  for a in accidents[::4]]
+    fake = FakeSupabase({
+        "Accident Record": accidents, "Nurse": [dict(n) for n in NURSES],
+        "Injury": injuries, "Treatment": treatments,
+    })
+
+    async def get_async_supabase():
+        return fake.aio()
+
+    monkeypatch.setattr(export, "get_async_supabase", get_async_supabase)
+    monkeypatch.setattr(export, "EXPORT_PAGE_SIZE", 10)
+    monkeypatch.setattr(projections, "_table_columns", {"Accident Record": TABLE_COLUMNS})
+    return fake
+
+
+def _export(export_format, **filters) -> bytes:
+    async def collect():
+        return b"".join([chunk async for chunk in export_accident_records_service(export_format, **filters)])
+    return asyncio.run(collect())
+
+
+def _expected(db, hospital_nurses=None, completed=None):
+    return sorted(
+        r["accident_id"] for r in db.tables["Accident Record"]
+        if (hospital_nurses is None or r["managed_by"] in hospital_nurses)
+        and (completed is None or r["Completed"] == completed)
+    )
+
+
+def _ndjson(data):
+    return [json.loads(line) for line in data.decode().splitlines()]
+
+
+def _csv(data):
+    rows = list(csv.reader(io.StringIO(data.decode())))
+    return rows[0], [dict(zip(rows[0], row)) for row in rows[1:]]
+
+
+def _parquet(data):
+    table = pq.read_table(io.BytesIO(data))
+    return table.schema.names, table.to_pylist()
+
+
+def test_ndjson(db):
+    records = _ndjson(_export("ndjson"))
+    assert [r["accident_id"] for r in records] == _expected(db)
+    assert all(set(TABLE_COLUMNS + ["injuries", "treatments"]) == set(r) for r in records)
+    by_id = {r["accident_id"]: r for r in records}
+    for injury in db.tables["Injury"]:
+        assert injury["injury_no"] in [i["injury_no"] for i in by_id[injury["accident_id"]]["injuries"]]
+
+
+def test_csv(db):
+    header, rows = _csv(_export("csv"))
+    assert header == TABLE_COLUMNS + ["injuries", "treatments"]
+    assert [r["accident_id"] for r in rows] == _expected(db)
+    source = {r["accident_id"]: r for r in db.tables["Accident Record"]}
+    assert all(r["vehicle insured type"] == (source[r["accident_id"]]["vehicle insured type"] or "") for r in rows)
+
+
+def test_parquet(db):
+    names, rows = _parquet(_export("parquet"))
+    assert names == TABLE_COLUMNS + ["injuries", "treatments"]
+    assert [r["accident_id"] for r in rows] == _expected(db)
+    source = {r["accident_id"]: r for r in db.tables["Accident Record"]}
+    assert all(r["Completed"] is source[r["accident_id"]]["Completed"] for r in rows)
+    assert sum(len(json.loads(r["injuries"])) for r in rows) == len(db.tables["Injury"])
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv", "parquet"])
+def test_hospital_and_completed_filters(db, export_format):
+    data = _export(export_format, hospital_id="h1", completed=True)
+    ids = {
+        "ndjson": lambda: [r["accident_id"] for r in _ndjson(data)],
+        "csv": lambda: [r["accident_id"] for r in _csv(data)[1]],
+        "parquet": lambda: [r["accident_id"] for r in _parquet(data)[1]],
+    }[export_format]()
+    expected = _expected(db, hospital_nurses={"nurse-a"}, completed=True)
+    assert expected and ids == expected
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv", "parquet"])
+def test_hospital_without_nurses_exports_no_rows(db, export_format):
+    data = _export(export_format, hospital_id="h9")
+    if export_format == "csv":
+        assert _csv(data) == (TABLE_COLUMNS + ["injuries", "treatments"], [])
+    elif export_format == "parquet":
+        assert _parquet(data) == (TABLE_COLUMNS + ["injuries", "treatments"], [])
+    else:
+        assert data == b""
+
+
+def test_unknown_schema_selects_everything(db, monkeypatch):
+    def unavailable():
+        raise RuntimeError("no schema")
+
+    monkeypatch.setattr(projections, "_table_columns", {})
+    monkeypatch.setattr(export, "fetch_table_columns", unavailable)
+    header, rows = _csv(_export("csv"))
+    assert header == TABLE_COLUMNS + ["injuries", "treatments"]
+    assert [r["accident_id"] for r in rows] == _expected(db)
+
+
+def test_schema_is_read_on_the_first_export(db, monkeypatch):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"Accident Record": TABLE_COLUMNS}
+
+    monkeypatch.setattr(projections, "_table_columns", {})
+    monkeypatch.setattr(export, "fetch_table_columns", fetch)
+    _export("ndjson")
+    _export("ndjson")
+    assert calls == [1]
@@ -174,7 +174,7 @@ class TestAccidentFunctions:
                                   headers=test_config.headers, timeout=15)
             
             if response.status_code == 200:
-                accidents = response.json()
+                accidents = response.json()["items"]
                 print(f"  ✅ Retrieved {len(accidents)} accident records")
                 
                 if accidents:
@@ -209,7 +209,46 @@ class TestAccidentFunctions:
                 
         except Exception as e:
             print(f"  ❌ Error retrieving all accidents: {e}")
-    
+
+    def test_accident_list_pagination(self):
+        """Test following next_cursor: no record twice, none skipped at page boundaries"""
+        print("📑 Testing Accident List Pagination")
+
+        if not test_config.setup_auth_for_user_type("doctor"):
+            print("  ⚠️ Skipping - authentication failed")
+            return
+
+        # One big page is the reference the small pages must add up to
+        response = requests.get(f"{test_config.base_url}/accidents/", params={"limit": 20},
+                                headers=test_config.headers, timeout=15)
+        assert response.status_code == 200, response.text
+        expected = [a["accident_id"] for a in response.json()["items"]]
+
+        paged, cursor = [], None
+        while len(paged) < len(expected):
+            params = {"limit": 3}
+            if cursor:
+                params["cursor"] = cursor
+            response = requests.get(f"{test_config.base_url}/accidents/", params=params,
+                                    headers=test_config.headers, timeout=15)
+            assert response.status_code == 200, response.text
+            page = response.json()
+            assert len(page["items"]) <= 3
+            paged.extend(a["accident_id"] for a in page["items"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+        paged = paged[:len(expected)]
+        assert len(paged) == len(set(paged)), "a record was returned twice"
+        assert paged == expected, "pages skipped or reordered records"
+        print(f"  ✅ {len(paged)} records over pages of 3 match one page of 20")
+
+        response = requests.get(f"{test_config.base_url}/accidents/", params={"cursor": "not-a-cursor"},
+                                headers=test_config.headers, timeout=15)
+        assert response.status_code == 400
+        print("  ✅ Malformed cursor rejected")
+
     def test_get_accident_by_id(self):
         """Test retrieving specific accident by ID"""
         print("🔍 Testing Get Accident By ID")
@@ -224,7 +263,7 @@ class TestAccidentFunctions:
                                        headers=test_config.headers, timeout=10)
             
             if list_response.status_code == 200:
-                accidents = list_response.json()
+                accidents = list_response.json()["items"]
                 
                 if accidents:
                     test_accident_id = accidents[0]["accident_id"]
@@ -271,7 +310,7 @@ class TestAccidentFunctions:
                                        headers=test_config.headers, timeout=10)
             
             if list_response.status_code == 200:
-                accidents = list_response.json()
+                accidents = list_response.json()["items"]
                 
                 if accidents:
                     # Find an accident that's not completed and managed by current user
@@ -338,7 +377,7 @@ class TestAccidentFunctions:
                                        headers=test_config.headers, timeout=10)
             
             if list_response.status_code == 200:
-                accidents = list_response.json()
+                accidents = list_response.json()["items"]
                 
                 if accidents:
                     # Get patient ID from first accident
@@ -451,17 +490,20 @@ if __name__ == "__main__":
         
         print("\n3. Testing All Accident Records Retrieval")
         test_accidents.test_get_all_accident_records()
-        
-        print("\n4. Testing Individual Accident Retrieval")
+
+        print("\n4. Testing Accident List Pagination")
+        test_accidents.test_accident_list_pagination()
+
+        print("\n5. Testing Individual Accident Retrieval")
         test_accidents.test_get_accident_by_id()
-        
-        print("\n5. Testing Accident Record Editing")
+
+        print("\n6. Testing Accident Record Editing")
         test_accidents.test_edit_accident_record()
-        
-        print("\n6. Testing Accidents By Patient")
+
+        print("\n7. Testing Accidents By Patient")
         test_accidents.test_get_accidents_by_patient()
-        
-        print("\n7. Testing Permissions & Security")
+
+        print("\n8. Testing Permissions & Security")
         test_accidents.test_accident_permissions_and_security()
         
         print("\n🎉 Accident function tests completed!")
@@ -0,0 +1,121 @@
+"""
+GET /accidents/ keyset pagination, offline against tests/fake_supabase.py
+
+Following next_cursor from the first page to the last must return every
+matching record exactly once, newest first (created_on desc, accident_id
+desc, records without created_on last), whatever the page size and even when
+records are inserted or deleted between two page requests.
+"""
+import asyncio
+import random
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import accident_service
+from app.services.accident_service import list_accident_records_page_service_async
+from app.utils.pagination import encode_cursor
+from tests.fake_supabase import FakeSupabase
+
+NURSES = [
+    {"user_id": "nurse-a", "hospital_id": "h1"},
+    {"user_id": "nurse-b", "hospital_id": "h1"},
+    {"user_id": "nurse-c", "hospital_id": "h2"},
+]
+
+
+def _accidents(count: int = 23, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        {
+            "accident_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "patient_id": f"p{i % 9}",
+            "managed_by": rng.choice(NURSES)["user_id"],
+            "Severity": rng.choice(["Mild", "Moderate", "Severe"]),
+            "incident at date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "Completed": rng.random() < 0.5,
+            # few distinct days, so pages break inside a day; some records have none
+            "created_on": rng.choice([None, "2024-01-05", "2024-02-11", "2024-02-12", "2024-03-30"]),
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeSupabase({"Accident Record": _accidents(), "Nurse": [dict(n) for n in NURSES]})
+
+    async def get_async_supabase():
+        return fake.aio()
+
+    monkeypatch.setattr(accident_service, "get_async_supabase", get_async_supabase)
+    return fake
+
+
+def _newest_first(rows):
+    return [r["accident_id"] for r in sorted(rows, key=lambda r: (r["created_on"] or "", r["accident_id"]), reverse=True)]
+
+
+def _all_pages(limit: int, between_pages=None, **filters):
+    """accident_ids of every page, following next_cursor, and the page count."""
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = asyncio.run(list_accident_records_page_service_async(limit=limit, cursor=cursor, **filters))
+        assert len(page["items"]) <= limit
+        ids.extend(item["accident_id"] for item in page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, pages
+        if between_pages:
+            between_pages(ids)
+
+
+@pytest.mark.parametrize("limit", [1, 3, 5, 22, 23, 24, 500])
+def test_pages_return_each_record_once(db, limit):
+    expected = _newest_first(db.tables["Accident Record"])
+    ids, pages = _all_pages(limit)
+    assert len(ids) == len(set(ids)), "a record was returned twice"
+    assert ids == expected, "a record was skipped at a page boundary"
+    assert pages == max(1, -(-len(expected) // limit))
+
+
+def test_filters_apply_on_every_page(db):
+    expected = _newest_first(
+        r for r in db.tables["Accident Record"]
+        if r["managed_by"] in ("nurse-a", "nurse-b") and r["Severity"] == "Severe"
+    )
+    assert expected
+    ids, _ = _all_pages(2, hospital_id="h1", severity="Severe")
+    assert ids == expected
+
+
+def test_writes_between_pages_do_not_shift_rows(db):
+    rows = db.tables["Accident Record"]
+    original = _newest_first(rows)
+    first_id = "00000000-0000-4000-8000-000000000000"
+    deleted = []
+
+    def write(seen):
+        # A record before the cursor appears and one already returned disappears:
+        # with offset paging both would shift the next page by one row
+        if not deleted:
+            rows.append({**rows[0], "accident_id": first_id, "created_on": "2099-01-01"})  # sorts before every page
+            deleted.append(seen[0])
+            rows[:] = [r for r in rows if r["accident_id"] != seen[0]]
+
+    ids, _ = _all_pages(4, between_pages=write)
+    assert ids == original
+
+
+def test_hospital_without_nurses_is_empty(db):
+    page = asyncio.run(list_accident_records_page_service_async(hospital_id="h9"))
+    assert page == {"items": [], "next_cursor": None}
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor({"after": "5f0c6c2e-1d2b-4c57-9b1e-0a4f6a1f6e20"})])
+def test_malformed_cursor_is_rejected(db, cursor):
+    with pytest.raises(HTTPException) as err:
+        asyncio.run(list_accident_records_page_service_async(cursor=cursor))
+    assert err.value.status_code == 400
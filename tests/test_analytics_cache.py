@@ -0,0 +1,88 @@
+"""
+Analytics result cache, offline against tests/fake_supabase.py
+
+Results are cached per hospital generation: a write to a hospital's records
+bumps its generation, so the next read misses and recomputes, even when the
+write lands while a read is still computing.
+"""
+import asyncio
+import random
+
+import pytest
+
+from app.models.analytics import AccidentAnalyticsFilters
+from app.services import accident_analytics_service as service
+from app.services.accident_analytics_service import (
+    _analytics_cache,
+    _generations,
+    get_comprehensive_analytics_with_summary_service_async,
+)
+from app.services.analytics_counters import AccidentChange
+from tests.fake_supabase import fake_accident, seeded_supabase
+
+H1_ONLY = "p000"  # patients alternate between h1 and h2; none is shared
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = seeded_supabase(17, shared=0)
+
+    async def get_async_supabase():
+        return fake.aio()
+
+    monkeypatch.setattr(service, "get_async_supabase", get_async_supabase)
+    monkeypatch.setattr(service, "ANALYTICS_COUNTERS", False)
+    _analytics_cache.clear()
+    yield fake
+    _analytics_cache.clear()
+
+
+def _analytics(hospital_id):
+    return asyncio.run(get_comprehensive_analytics_with_summary_service_async(AccidentAnalyticsFilters(hospital_id=hospital_id)))
+
+
+def _rpc_calls(db):
+    return sum(table.startswith("rpc:") for table, _ in db.requests)
+
+
+def _write(db, accident_id="a-new", patient_id=H1_ONLY):
+    change = AccidentChange(db, patient_id)
+    db.tables["Accident Record"].append(fake_accident(random.Random(1), accident_id, patient_id))
+    change.commit(accident_id)
+
+
+def test_read_is_cached_until_a_write(db):
+    first = _analytics("h1")
+    assert _analytics("h1") is first
+    assert _rpc_calls(db) == 1
+
+    generation = _generations["h1"]
+    _write(db)
+    assert _generations["h1"] == generation + 1
+
+    after = _analytics("h1")
+    assert after is not first
+    assert _rpc_calls(db) == 2
+    assert after["total_records_processed"] == first["total_records_processed"] + 1
+
+
+def test_write_leaves_other_hospitals_cached(db):
+    other = _analytics("h2")
+    _write(db)
+    assert _analytics("h2") is other
+
+
+def test_write_during_a_read_is_not_hidden_by_it(db, monkeypatch):
+    fetch = service._get_filtered_accident_data_async
+
+    async def fetch_then_write(supabase, filters):
+        rows = await fetch(supabase, filters)
+        _write(db)  # lands after the read's data fetch, before its result is cached
+        return rows
+
+    monkeypatch.setattr(service, "_get_filtered_accident_data_async", fetch_then_write)
+    stale = _analytics("h1")
+    monkeypatch.setattr(service, "_get_filtered_accident_data_async", fetch)
+    fresh = _analytics("h1")
+    assert fresh is not stale
+    assert fresh["total_records_processed"] == stale["total_records_processed"] + 1
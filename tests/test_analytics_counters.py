@@ -0,0 +1,151 @@
+"""
+Analytics counter deltas vs a full recount, offline against tests/fake_supabase.py
+
+Each test builds a hospital's HospitalCounters and FilterOptionCounters from
+a scan, runs a write wrapped in AccidentChange/TransferChange, and checks
+that the counters kept by deltas equal counters built from a fresh scan.
+"""
+import asyncio
+import random
+
+import pytest
+
+from app.services import analytics_counters as counters
+from app.services.analytics_counters import (
+    AccidentChange,
+    FilterOptionCounters,
+    HospitalCounters,
+    TransferChange,
+    hospital_filter_options,
+    hospital_sections_async,
+)
+from tests.fake_supabase import analytics_rpc, fake_accident, seeded_supabase
+
+# p000 is at h1 and h2, the other even patients at h1 only, the odd ones at h2
+SHARED, H1_ONLY = "p000", "p002"
+
+
+@pytest.fixture
+def db():
+    fake = seeded_supabase(119)
+    for store in counters._stores:
+        store.clear()
+    yield fake
+    for store in counters._stores:
+        store.clear()
+
+
+def _record(db, patient_id):
+    return next(r for r in db.tables["Accident Record"] if r["patient_id"] == patient_id)
+
+
+def _track(db, *hospital_ids):
+    """Build both counters of the hospitals, as their first dashboard reads do."""
+    for hospital_id in hospital_ids:
+        asyncio.run(hospital_sections_async(db.aio(), hospital_id))
+        hospital_filter_options(db, hospital_id)
+        assert hospital_id in counters._counters and hospital_id in counters._filter_options
+
+
+def _assert_match_recount(db, *hospital_ids):
+    for hospital_id in hospital_ids:
+        rows = analytics_rpc(db, {"p_hospital_id": hospital_id})
+        kept = counters._counters[hospital_id]
+        fresh = HospitalCounters.from_rows(rows)
+        assert not kept.stale
+        assert kept.drift(fresh) == []
+        assert kept.sections() == fresh.sections()
+        kept_options = counters._filter_options[hospital_id]
+        assert not kept_options.stale
+        assert kept_options.drift(FilterOptionCounters.from_rows(rows)) == []
+        assert kept_options.options() == FilterOptionCounters.from_rows(rows).options()
+
+
+def test_create(db):
+    _track(db, "h1", "h2")
+    change = AccidentChange(db, SHARED)
+    db.tables["Accident Record"].append(fake_accident(random.Random(1), "a-new", SHARED))
+    change.commit("a-new")
+    _assert_match_recount(db, "h1", "h2")
+
+
+def test_edit(db):
+    _track(db, "h1", "h2")
+    record = _record(db, SHARED)
+    change = AccidentChange(db, SHARED, record["accident_id"])
+    record.update({
+        "Collision with": "Train",
+        "Category of Road": "Expressway",
+        "incident at date": "2025-01-01",
+        "time of collision": "23:10",
+        "Bystander expenditure per day": "999",
+    })
+    change.commit(record["accident_id"])
+    _assert_match_recount(db, "h1", "h2")
+    assert "Train" in counters._filter_options["h1"].options()["collision_types"]
+
+
+def test_delete(db):
+    only_expressway = _record(db, SHARED)
+    only_expressway["Category of Road"] = "Expressway"
+    _track(db, "h1", "h2")
+    change = AccidentChange(db, SHARED, only_expressway["accident_id"])
+    db.tables["Accident Record"].remove(only_expressway)
+    change.commit(only_expressway["accident_id"])
+    _assert_match_recount(db, "h1", "h2")
+    assert "Expressway" not in counters._filter_options["h2"].options()["road_categories"]
+
+
+def test_transfer_approval_adds_the_patients_accidents(db):
+    _track(db, "h1", "h2")
+    change = TransferChange(db, _record(db, H1_ONLY)["accident_id"], "h1", "h2")
+    assert change.newly_linked
+    db.tables["Hospital_Patient"].append({"patient_id": H1_ONLY, "hospital_id": "h2"})
+    change.commit()
+    _assert_match_recount(db, "h1", "h2")
+
+
+def test_transfer_to_an_already_linked_hospital_changes_nothing(db):
+    _track(db, "h2")
+    before = counters._counters["h2"].sections()
+    change = TransferChange(db, _record(db, SHARED)["accident_id"], "h1", "h2")
+    assert not change.newly_linked
+    change.commit()
+    assert counters._counters["h2"].sections() == before
+    _assert_match_recount(db, "h2")
+
+
+def test_counters_built_during_the_write_are_dropped(db):
+    _track(db, "h1")
+    change = AccidentChange(db, SHARED)  # h2 has no counters yet
+    db.tables["Accident Record"].append(fake_accident(random.Random(2), "a-new", SHARED))
+    _track(db, "h2")  # built after the insert: already counts a-new
+    change.commit("a-new")
+    _assert_match_recount(db, "h1")
+    assert "h2" not in counters._counters and "h2" not in counters._filter_options
+    _track(db, "h2")
+    _assert_match_recount(db, "h2")
+
+
+def test_counters_rebuilt_during_the_write_are_dropped(db):
+    _track(db, "h1")
+    record = _record(db, H1_ONLY)
+    change = AccidentChange(db, H1_ONLY, record["accident_id"])
+    record["Collision with"] = "Train"
+    counters._counters.pop("h1")
+    _track(db, "h1")  # rebuilt after the edit: the delta would count it twice
+    change.commit(record["accident_id"])
+    assert "h1" not in counters._counters
+    # The filter options were not rebuilt, so they took the delta
+    assert counters._filter_options["h1"].drift(
+        FilterOptionCounters.from_rows(analytics_rpc(db, {"p_hospital_id": "h1"}))
+    ) == []
+
+
+def test_untracked_hospitals_read_nothing(db):
+    record = _record(db, H1_ONLY)
+    change = AccidentChange(db, H1_ONLY, record["accident_id"])
+    assert change.held == {} and change.before == []
+    db.requests.clear()
+    change.commit(record["accident_id"])
+    assert not any(table == "Accident Record" for table, _ in db.requests)
@@ -0,0 +1,85 @@
+"""
+Analytics engines parity: legacy per-section functions vs the single-pass
+AnalyticsAccumulator vs the Polars engine, on deterministic fixtures
+
+The fixtures mix well-formed rows with the messy values the RPC returns in
+practice (missing patients, unparseable times and incomes, the
+"not willing to share" marker, timestamps in date columns).
+"""
+import random
+
+import pytest
+
+from app.services import accident_analytics_service as service
+from app.services.accident_analytics_polars import polars_analytics_sections, sections_mismatch
+from app.services.accident_analytics_service import NOT_SHARED, TIME_NOT_RECALLED, _aggregate, _analytics_result
+from tests.legacy_analytics import legacy_analytics_sections
+
+
+def _record(rng: random.Random):
+    pick = rng.choice
+    patient = pick([None, {}, {
+        "Date of Birth": pick([None, "1990-05-01", "2010-01-01", "bad", "1950-12-31T00:00:00Z", "2001-02-28"]),
+        "Gender": pick([None, "Male", "Female"]),
+        "Ethnicity": pick([None, "Sinhala", "Tamil"]),
+        "Education Qualification": pick([None, "O/L", "A/L"]),
+        "Occupation": pick([None, "Farmer", "Driver"]),
+    }])
+    return {
+        "time of collision": pick([None, "14:30", "2:15 PM", "12:05 AM", "12:30 PM", TIME_NOT_RECALLED, "noon", "x:10"]),
+        "Collision with": pick([None, "Car", "Bus", "Lorry", NOT_SHARED]),
+        "Mode of traveling during accident": pick([None, "", "Motorbike", "Pedestrian"]),
+        "Category of Road": pick([None, "A", "B", NOT_SHARED]),
+        "patient_data": patient,
+        "Patient": pick([None, {}, {"Gender": None}, {"Gender": "Male"}]),
+        "Discharge Outcome": pick([None, "Home", "Transferred", "Death"]),
+        "Family monthly income before accident": pick([None, NOT_SHARED, "10000-15000", "Above 50000", "below 5000", "20000", "abc"]),
+        "Family monthly income after accident": pick([None, NOT_SHARED, "10000-15000", "Above 50000", "below 5000", "20000", "7.5-9.25"]),
+        "Family current status": pick([None, "Same", NOT_SHARED]),
+        "vehicle insured": pick([None, "Yes", "No", NOT_SHARED]),
+        "vehicle insured type": pick([None, "Full", NOT_SHARED]),
+        "Bystander expenditure per day": pick([None, "0", "100", "250.5", "abc"]),
+        "incident at date": pick([None, f"2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", "2024-02-29T10:00:00Z"]),
+    }
+
+
+FIXTURES = [(seed, size) for seed, size in enumerate([0, 1, 2, 7, 50, 400, 2000])]
+
+
+def _fixture(seed: int, size: int):
+    rng = random.Random(seed)
+    return [_record(rng) for _ in range(size)]
+
+
+def _comparable(sections):
+    """The response body of _build_analytics_with_summary without its timestamps."""
+    result = _analytics_result(sections)
+    analytics = result["comprehensive_analytics"].model_dump()
+    analytics.pop("generated_at")
+    summary = dict(result["summary"])
+    summary.pop("generated_at")
+    return analytics, summary
+
+
+@pytest.mark.parametrize("seed,size", FIXTURES)
+def test_accumulator_matches_legacy(seed, size):
+    data = _fixture(seed, size)
+    assert _comparable(_aggregate(data).sections()) == _comparable(legacy_analytics_sections(data))
+
+
+@pytest.mark.parametrize("seed,size", FIXTURES)
+def test_polars_matches_legacy(seed, size):
+    data = _fixture(seed, size)
+    legacy = legacy_analytics_sections(data)
+    polars = polars_analytics_sections(data)
+    # Sums may be taken in another order, so floats are compared with a tolerance
+    assert sections_mismatch(legacy, polars) == []
+    assert sections_mismatch(_aggregate(data).sections(), polars) == []
+
+
+@pytest.mark.parametrize("engine", ["python", "polars"])
+def test_configured_engine_matches_legacy(monkeypatch, engine):
+    data = _fixture(99, 1000)
+    monkeypatch.setattr(service, "ANALYTICS_ENGINE", engine)
+    monkeypatch.setattr(service, "ANALYTICS_ENGINE_VALIDATE", False)
+    assert sections_mismatch(legacy_analytics_sections(data), service._analytics_sections(data)) == []
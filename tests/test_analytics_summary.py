@@ -0,0 +1,52 @@
+"""
+/analytics/summary, offline against tests/fake_supabase.py
+
+The summary-only pipeline (projected RPC read + SummaryAccumulator) must give
+the KPI numbers the legacy summary statistics computed from full rows.
+"""
+import asyncio
+from datetime import date
+
+import pytest
+
+from app.services import accident_analytics_service as service
+from app.services.accident_analytics_service import _analytics_cache, get_accident_summary_service_async
+from tests.fake_supabase import analytics_rpc, seeded_supabase
+from tests.legacy_analytics import _get_summary_statistics
+
+
+@pytest.fixture(params=[18, 118])
+def db(request, monkeypatch):
+    fake = seeded_supabase(request.param, patients=40, accidents=400, shared=5)
+
+    async def get_async_supabase():
+        return fake.aio()
+
+    monkeypatch.setattr(service, "get_async_supabase", get_async_supabase)
+    monkeypatch.setattr(service, "ANALYTICS_COUNTERS", False)
+    monkeypatch.setattr(service, "_rpc_projection_supported", True)
+    _analytics_cache.clear()
+    yield fake
+    _analytics_cache.clear()
+
+
+@pytest.mark.parametrize("hospital_id", ["h1", "h2", "h9"])
+@pytest.mark.parametrize("start_date,end_date", [
+    (None, None),
+    (date(2020, 1, 1), None),
+    (date(2019, 6, 1), date(2022, 6, 30)),
+])
+def test_summary_matches_legacy(db, hospital_id, start_date, end_date):
+    summary = asyncio.run(get_accident_summary_service_async(hospital_id, start_date, end_date))
+    rows = analytics_rpc(db, {
+        "p_hospital_id": hospital_id,
+        "p_start_date": start_date.isoformat() if start_date else None,
+        "p_end_date": end_date.isoformat() if end_date else None,
+    })
+    legacy = _get_summary_statistics(rows)
+    assert {k: v for k, v in summary.items() if k != "generated_at"} == {
+        "total_accidents": legacy["total_records"],
+        "peak_accident_hour": legacy["peak_hour"],
+        "most_common_collision": legacy["common_collision"],
+        "avg_income_impact": legacy["avg_income_change"],
+    }
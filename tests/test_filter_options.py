@@ -0,0 +1,62 @@
+"""
+/filters/options, offline against tests/fake_supabase.py: the single RPC read
+(the default) and the kept value counts (FILTER_OPTIONS_COUNTERS) must both
+equal the options read batch by batch from the hospital's patients
+(tests/legacy_analytics.py).
+"""
+import pytest
+
+from app.services import accident_analytics_service as service
+from app.services import analytics_counters as counters
+from app.services.accident_analytics_service import _filter_options_from_records, get_filter_options_service
+from app.services.analytics_counters import AccidentChange, hospital_filter_options
+from tests.fake_supabase import seeded_supabase
+from tests.legacy_analytics import legacy_filter_options
+
+HOSPITALS = ["h1", "h2", "h3"]  # h3 has no patients
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # several in_() batches of 100 patients; the first 20 are at both hospitals
+    fake = seeded_supabase(25, hospitals=("h1", "h2"), patients=260, accidents=700, shared=20)
+    monkeypatch.setattr(service, "get_supabase", lambda: fake)
+    for store in counters._stores:
+        store.clear()
+    yield fake
+    for store in counters._stores:
+        store.clear()
+
+
+@pytest.mark.parametrize("hospital_id", HOSPITALS)
+def test_single_read_matches_batched_query(db, hospital_id):
+    assert _filter_options_from_records(db, hospital_id) == legacy_filter_options(db, hospital_id)
+
+
+@pytest.mark.parametrize("hospital_id", HOSPITALS)
+def test_counters_match_batched_query(db, hospital_id):
+    assert hospital_filter_options(db, hospital_id) == legacy_filter_options(db, hospital_id)
+
+
+def test_counters_match_after_an_edit(db):
+    hospital_filter_options(db, "h1")
+    record = next(r for r in db.tables["Accident Record"] if r["patient_id"] in
+                  {l["patient_id"] for l in db.tables["Hospital_Patient"] if l["hospital_id"] == "h1"})
+    change = AccidentChange(db, record["patient_id"], record["accident_id"])
+    record.update({"Collision with": "Tractor", "incident at date": "2030-01-01"})
+    change.commit(record["accident_id"])
+    assert hospital_filter_options(db, "h1") == legacy_filter_options(db, "h1")
+
+
+def test_default_reads_once_and_keeps_nothing(db, monkeypatch):
+    monkeypatch.setattr(service, "FILTER_OPTIONS_COUNTERS", False)
+    options = get_filter_options_service("h1")
+    assert [table for table, _ in db.requests] == ["rpc:get_accident_analytics_data"]
+    assert options == legacy_filter_options(db, "h1")
+    assert "h1" not in counters._filter_options
+
+
+def test_setting_serves_the_counters(db, monkeypatch):
+    monkeypatch.setattr(service, "FILTER_OPTIONS_COUNTERS", True)
+    assert get_filter_options_service("h1") == legacy_filter_options(db, "h1")
+    assert "h1" in counters._filter_options
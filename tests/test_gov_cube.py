@@ -0,0 +1,95 @@
+"""
+Gov dashboard cube vs the live scans, offline against tests/fake_supabase.py
+
+The cube's breakdowns must equal _comprehensive_analytics1 and its trends
+_accident_trends_scan on the same records, for any date range and severity.
+"""
+import random
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.gov_dash import AccidentAnalyticsFilters1
+from app.services import govDash_service, gov_cube
+from app.services.govDash_service import _accident_trends_scan, _comprehensive_analytics1
+from tests.fake_supabase import FakeSupabase
+
+CATEGORIES = {
+    "time of collision": ["Morning", "Evening", "Night", None],
+    "Collision with": ["Car", "Bus", "Lorry", None],
+    "Road Condition": ["Good", "Poor"],
+    "Road Type": ["Straight", "Bend", None],
+    "Category of Road": ["A", "B", "Minor"],
+    "Alcohol Consumption": ["Yes", "No", ""],
+    "Illicit Drugs": ["No"],
+    "Time taken to reach hospital": ["<1h", "1-3h", None],
+    "Bystander expenditure per day": ["0", "150"],
+    "Discharge Outcome": ["Home", "Transferred", "Death"],
+    "First aid given at seen": ["Yes", "No"],
+    "Mode of traveling during accident": ["Motorbike", "Pedestrian", "Bus"],
+}
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    rng = random.Random(22)
+    hospitals = [{"hospital_id": f"h{i}", "Region": region} for i, region in enumerate(["North", "South", None])]
+    nurses = [{"user_id": f"n{i}", "hospital_id": f"h{i % 3}"} for i in range(6)]
+    start = date(2022, 1, 1)
+    accidents = []
+    # More than one page, so the scans split the key space into ranges
+    for _ in range(2300):
+        record = {
+            "accident_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "incident at date": rng.choice([None, (start + timedelta(days=rng.randint(0, 900))).isoformat()]),
+            "Severity": rng.choice(["S", "M", "S", None]),
+            "managed_by": rng.choice([n["user_id"] for n in nurses] + ["someone-else"]),
+        }
+        record.update({column: rng.choice(values) for column, values in CATEGORIES.items()})
+        accidents.append(record)
+    fake = FakeSupabase({"Hospital": hospitals, "Nurse": nurses, "Accident Record": accidents})
+    monkeypatch.setattr(gov_cube, "get_supabase", lambda: fake)
+    monkeypatch.setattr(govDash_service, "get_supabase", lambda: fake)
+    monkeypatch.setattr(gov_cube, "GOV_CUBE", True)
+    monkeypatch.setattr(gov_cube, "GOV_CUBE_PATH", str(tmp_path / "cube.parquet"))
+    monkeypatch.setattr(gov_cube, "_cube", None)
+    return fake
+
+
+@pytest.mark.parametrize("start_date,end_date,severity", [
+    ("2022-01-01", "2024-12-31", "S"),
+    ("2022-01-01", "2024-12-31", "M"),
+    ("2022-03-15", "2022-03-15", "S"),
+    ("2023-02-01", "2023-06-30", "M"),
+    ("2025-01-01", "2025-12-31", "S"),
+])
+def test_breakdown_matches_scan(db, start_date, end_date, severity):
+    cube = gov_cube.build_cube()
+    filters = AccidentAnalyticsFilters1(start_date=start_date, end_date=end_date, severity=severity)
+    assert cube.breakdown(start_date, end_date, severity) == _comprehensive_analytics1(filters).results
+
+
+def test_trends_match_scan(db):
+    cube = gov_cube.build_cube()
+    assert cube.trends() == _accident_trends_scan()
+
+
+def test_persisted_cube_answers_the_same(db, tmp_path):
+    built = gov_cube.build_cube()
+    assert [p.name for p in tmp_path.iterdir()] == ["cube.parquet"]  # no temp file left behind
+    loaded = gov_cube.load_cube()
+    assert loaded.source == "parquet"
+    assert loaded.breakdown("2022-01-01", "2024-12-31", "S") == built.breakdown("2022-01-01", "2024-12-31", "S")
+    assert loaded.trends() == built.trends()
+
+
+def test_cube_older_than_max_age_is_not_served(db, monkeypatch):
+    cube = gov_cube.build_cube()
+    monkeypatch.setattr(gov_cube, "GOV_CUBE_MAX_AGE", 60)
+    assert gov_cube.current_cube() is cube
+    cube.built_at -= 61
+    assert gov_cube.current_cube() is None
+    # The dashboard then answers from the table
+    filters = AccidentAnalyticsFilters1(start_date="2022-01-01", end_date="2024-12-31", severity="S")
+    assert govDash_service.get_comprehensive_analytics_service1(filters).results == _comprehensive_analytics1(filters).results
@@ -0,0 +1,87 @@
+"""
+Gov analytics rollup, offline against tests/fake_supabase.py
+
+Every hospital in the rollup must have the analytics its own /analytics
+would compute, the rollup must not modify the rows it reads, and it is
+cached apart from the hospital analytics.
+"""
+import pytest
+
+from app.services import gov_rollup_service
+from app.services.accident_analytics_service import _aggregate, _analytics_cache, _analytics_result, invalidate_analytics_cache
+from app.services.analytics_counters import ANALYTICS_ROW, _as_analytics_row
+from app.services.gov_rollup_service import get_analytics_rollup_service
+from tests.fake_supabase import analytics_rpc, seeded_supabase
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # h4 has no patients; the last 12 records have no patient row and no hospital
+    fake = seeded_supabase(
+        24,
+        hospitals=("h1", "h2", "h3"),
+        patients=12,
+        accidents=150,
+        shared=2,
+        unlinked=12,
+        regions={"h1": "North", "h2": "North", "h3": None, "h4": "South"},
+    )
+    monkeypatch.setattr(gov_rollup_service, "get_supabase", lambda: fake)
+    gov_rollup_service._rollup_cache.clear()
+    yield fake
+    gov_rollup_service._rollup_cache.clear()
+
+
+def _comparable(analytics):
+    dumped = analytics.model_dump()
+    dumped.pop("generated_at")
+    return dumped
+
+
+def _expected(db, hospital_id=None, **dates):
+    rows = analytics_rpc(db, {"p_hospital_id": hospital_id, **dates})
+    return _comparable(_analytics_result(_aggregate(rows).sections())["comprehensive_analytics"])
+
+
+def test_hospitals_match_their_own_analytics(db):
+    rollup = get_analytics_rollup_service()
+    hospitals = {h.hospital_id: h for region in rollup.regions for h in region.hospitals}
+    assert set(hospitals) == {"h1", "h2", "h3", "h4"}
+    for hospital_id, hospital in hospitals.items():
+        assert _comparable(hospital.analytics) == _expected(db, hospital_id)
+    assert rollup.national.total_records == 150
+    assert {r.region for r in rollup.regions} == {"North", "South", "Unknown"}
+
+
+def test_duplicate_links_count_once(db):
+    links = db.tables["Hospital_Patient"]
+    links += [dict(link) for link in links[:3]]
+    rollup = get_analytics_rollup_service()
+    for hospital in (h for region in rollup.regions for h in region.hospitals):
+        assert _comparable(hospital.analytics) == _expected(db, hospital.hospital_id)
+
+
+def test_date_range(db):
+    from datetime import date
+    rollup = get_analytics_rollup_service(date(2021, 3, 1), date(2022, 6, 30))
+    h1 = next(h for region in rollup.regions for h in region.hospitals if h.hospital_id == "h1")
+    assert _comparable(h1.analytics) == _expected(db, "h1", p_start_date="2021-03-01", p_end_date="2022-06-30")
+
+
+def test_analytics_row_leaves_the_row_alone():
+    patient = {"Date of Birth": "1990-01-01", "Gender": "Female"}
+    for row in ({"accident_id": "a1", "Patient": patient}, ANALYTICS_ROW.track([{"accident_id": "a1", "Patient": [patient]}])[0]):
+        before = dict(row)
+        record = _as_analytics_row(row)
+        assert dict(row) == before
+        assert record["patient_data"] == patient
+        assert record["Patient"] == {"Gender": "Female"}
+        assert type(record) is type(row)
+
+
+def test_rollup_cache_is_separate_and_invalidated(db):
+    first = get_analytics_rollup_service()
+    assert get_analytics_rollup_service() is first
+    assert not any(key[2] == "rollup" for key in list(_analytics_cache._data))
+    invalidate_analytics_cache("h2")
+    assert get_analytics_rollup_service() is not first
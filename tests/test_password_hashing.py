@@ -0,0 +1,46 @@
+"""
+Password hashing executor metrics: completed, failed and cancelled jobs are
+counted apart, and the queue time average only covers jobs that started.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils import auth
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    monkeypatch.setattr(auth, "_hash_executor", ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(auth, "_hash_stats", {key: type(value)() for key, value in auth._hash_stats.items()})
+    return auth._hash_stats
+
+
+def _fail():
+    raise ValueError("bad hash")
+
+
+def test_outcomes_are_counted_apart(stats):
+    release = threading.Event()
+
+    async def scenario():
+        assert await auth._run_password_job(lambda: "ok") == "ok"
+        with pytest.raises(ValueError):
+            await auth._run_password_job(_fail)
+        blocker = asyncio.ensure_future(auth._run_password_job(release.wait))
+        queued = asyncio.ensure_future(auth._run_password_job(lambda: "never"))
+        await asyncio.sleep(0.05)
+        queued.cancel()  # still waiting behind the blocker: the job is cancelled too
+        await asyncio.sleep(0.05)
+        release.set()
+        await blocker
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+
+    asyncio.run(scenario())
+    metrics = auth._password_hashing_metrics()
+    assert (metrics["completed"], metrics["failed"], metrics["cancelled"]) == (2, 1, 1)
+    assert metrics["started"] == 3 and metrics["in_flight"] == 0
+    assert metrics["queue_time_avg_ms"] == pytest.approx(metrics["queue_time_total_ms"] / 3)
@@ -0,0 +1,87 @@
+"""
+prefetch_keyset_pages / aprefetch_keyset_pages, offline against tests/fake_supabase.py
+
+Whatever the key distribution, a prefetched scan must return every row
+exactly once and in key order, like keyset_pages does.
+"""
+import asyncio
+import random
+import uuid
+
+import pytest
+
+from app.utils.pagination import aprefetch_keyset_pages, prefetch_keyset_pages
+from tests.fake_supabase import FakeSupabase
+
+PAGE = 50
+
+
+def _uuids(count: int, bits: int = 128, high: bool = False, seed: int = 10):
+    rng = random.Random(seed)
+    keys = {rng.getrandbits(bits) for _ in range(count)}
+    return [str(uuid.UUID(int=((1 << 128) - 1 - k) if high else k)) for k in keys]
+
+
+KEYS = {
+    "uniform": _uuids(1200),
+    "one_page": _uuids(PAGE),
+    "less_than_a_page": _uuids(PAGE - 7),
+    "empty": [],
+    "clustered_low": _uuids(1200, bits=100),
+    "clustered_high": _uuids(1200, bits=100, high=True),
+    "int": list(range(1, 700)),
+    "text": [f"a{i:04d}" for i in range(700)],
+}
+
+
+def _db(keys):
+    rows = [{"id": key, "value": i} for i, key in enumerate(keys)]
+    random.Random(3).shuffle(rows)
+    return FakeSupabase({"T": rows})
+
+
+def _scan(db, **kwargs):
+    build_query = lambda: db.table("T").select("id,value")
+    return [row["id"] for page in prefetch_keyset_pages(build_query, "id", page_size=PAGE, **kwargs) for row in page]
+
+
+def _ascan(db, **kwargs):
+    client = db.aio()
+
+    async def run():
+        build_query = lambda: client.table("T").select("id,value")
+        return [row["id"] async for page in aprefetch_keyset_pages(build_query, "id", page_size=PAGE, **kwargs) for row in page]
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("scan", [_scan, _ascan])
+@pytest.mark.parametrize("name", list(KEYS))
+def test_every_row_once_in_key_order(scan, name):
+    db = _db(KEYS[name])
+    assert scan(db) == sorted(KEYS[name])
+
+
+@pytest.mark.parametrize("scan", [_scan, _ascan])
+def test_uniform_keys_are_read_in_ranges(scan):
+    db = _db(KEYS["uniform"])
+    scan(db)
+    ranged = [filters for _, filters in db.requests if any(f[1:2] == ("lte",) for f in filters)]
+    assert len(ranged) >= 2
+    # about one request per page, plus the first page and the highest key
+    assert len(db.requests) <= 2 * len(KEYS["uniform"]) // PAGE
+
+
+@pytest.mark.parametrize("scan", [_scan, _ascan])
+@pytest.mark.parametrize("name", ["clustered_low", "clustered_high"])
+def test_clustered_keys_do_not_multiply_requests(scan, name):
+    db = _db(KEYS[name])
+    assert scan(db, partitions=128) == sorted(KEYS[name])
+    assert len(db.requests) <= 2 * len(KEYS[name]) // PAGE
+
+
+@pytest.mark.parametrize("scan", [_scan, _ascan])
+def test_one_worker_scans_sequentially(scan):
+    db = _db(KEYS["uniform"])
+    assert scan(db, workers=1) == sorted(KEYS["uniform"])
+    assert len(db.requests) == len(KEYS["uniform"]) // PAGE + 1
@@ -0,0 +1,92 @@
+"""
+Projected analytics RPC reads: only a rejected column selection turns the
+selection off; other PostgREST errors reach the caller.
+"""
+import asyncio
+
+import pytest
+from postgrest.exceptions import APIError
+
+from app.models.analytics import AccidentAnalyticsFilters
+from app.services import accident_analytics_service as service
+from app.services.accident_analytics_service import SUMMARY_COLUMNS, _get_projected_data, _get_projected_data_async
+from tests.fake_supabase import FakeResponse
+
+ROWS = [{"accident_id": "a1", "Collision with": "Car"}]
+
+
+class _Rpc:
+    def __init__(self, client, projected: bool = False):
+        self.client = client
+        self.projected = projected
+
+    def select(self, _columns):
+        return _Rpc(self.client, projected=True)
+
+    def execute(self):
+        self.client.calls.append("projected" if self.projected else "full")
+        error = self.client.errors.pop(0) if self.projected and self.client.errors else None
+
+        def run():
+            if error:
+                raise error
+            return FakeResponse(ROWS)
+
+        if self.client.is_async:
+            async def arun():
+                return run()
+            return arun()
+        return run()
+
+
+class StubSupabase:
+    """rpc(...).select(...) raises the queued errors; the full rpc call succeeds."""
+
+    def __init__(self, *errors, is_async: bool = False):
+        self.errors = list(errors)
+        self.is_async = is_async
+        self.calls = []
+
+    def rpc(self, _name, _params):
+        return _Rpc(self)
+
+
+@pytest.fixture(autouse=True)
+def projection_supported(monkeypatch):
+    monkeypatch.setattr(service, "_rpc_projection_supported", True)
+
+
+FILTERS = AccidentAnalyticsFilters(hospital_id="h1")
+
+
+@pytest.mark.parametrize("code", ["42703", "PGRST100"])
+def test_rejected_selection_falls_back_for_good(code, capsys):
+    supabase = StubSupabase(APIError({"code": code, "message": "column does not exist"}))
+    assert _get_projected_data(supabase, FILTERS, SUMMARY_COLUMNS) == ROWS
+    assert supabase.calls == ["projected", "full"]
+    assert service._rpc_projection_supported is False
+    assert "does not accept a column selection" in capsys.readouterr().out
+    _get_projected_data(supabase, FILTERS, SUMMARY_COLUMNS)
+    assert supabase.calls[-1] == "full"
+
+
+@pytest.mark.parametrize("code", ["57014", "PGRST301", None])
+def test_other_errors_propagate_and_keep_the_selection(code):
+    supabase = StubSupabase(APIError({"code": code, "message": "statement timeout"}))
+    with pytest.raises(APIError):
+        _get_projected_data(supabase, FILTERS, SUMMARY_COLUMNS)
+    assert service._rpc_projection_supported is True
+    assert _get_projected_data(supabase, FILTERS, SUMMARY_COLUMNS) == ROWS
+    assert supabase.calls == ["projected", "projected"]
+
+
+def test_async_variant():
+    supabase = StubSupabase(APIError({"code": "57014", "message": "statement timeout"}), is_async=True)
+    with pytest.raises(APIError):
+        asyncio.run(_get_projected_data_async(supabase, FILTERS, SUMMARY_COLUMNS))
+    assert service._rpc_projection_supported is True
+
+    supabase = StubSupabase(APIError({"code": "42703", "message": "column does not exist"}), is_async=True)
+    assert asyncio.run(_get_projected_data_async(supabase, FILTERS, SUMMARY_COLUMNS)) == ROWS
+    assert supabase.calls == ["projected", "full"]
+    assert service._rpc_projection_supported is False
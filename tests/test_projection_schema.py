@@ -0,0 +1,76 @@
+"""
+Projection columns vs the table schema
+
+The offline tests check the schema check itself. test_projections_match_schema
+compares every registered projection with the live schema PostgREST reports:
+
+    SUPABASE_URL=... SUPABASE_KEY=... python -m pytest tests/test_projection_schema.py
+
+and is skipped without those variables.
+"""
+import os
+
+import pytest
+
+from app.utils.pagination import quote_column
+from app.utils.projections import Projection, _projections, check_projection_schema
+
+
+@pytest.fixture
+def isolated_projections():
+    """Run with only the projections the test registers."""
+    saved = dict(_projections)
+    _projections.clear()
+    yield
+    _projections.clear()
+    _projections.update(saved)
+
+
+class TestQuoteColumn:
+    def test_plain_names_stay_bare(self):
+        assert quote_column("accident_id") == "accident_id"
+        assert quote_column("Severity") == "Severity"
+
+    def test_special_characters_are_quoted(self):
+        assert quote_column("incident at date") == '"incident at date"'
+        assert quote_column("Investigation-Done") == '"Investigation-Done"'
+        assert quote_column("a.b") == '"a.b"'
+
+    def test_quoted_names_are_left_alone(self):
+        assert quote_column('"incident at date"') == '"incident at date"'
+
+
+class TestSchemaCheck:
+    def test_matching_projection_keeps_its_columns(self, isolated_projections):
+        p = Projection("t.ok", ["hospital distance from home", "Severity"], key_columns=["accident_id"], table="T")
+        assert check_projection_schema({"T": ["accident_id", "Severity", "hospital distance from home", "x"]}) == {}
+        assert p.select == 'accident_id, "hospital distance from home", Severity'
+
+    def test_drifted_column_falls_back_to_star(self, isolated_projections):
+        p = Projection("t.drift", ["Investigation Done", "side"], embeds=["Hospital(name)"], table="Injury")
+        problems = check_projection_schema({"Injury": ["investigation_done", "side"]})
+        assert problems == {"t.drift": ["Investigation Done"]}
+        assert p.select == "*, Hospital(name)"
+
+    def test_rpc_and_unknown_tables_are_skipped(self, isolated_projections):
+        rpc = Projection("t.rpc", ["anything"])
+        unknown = Projection("t.unknown", ["anything"], table="Missing")
+        assert check_projection_schema({"T": ["x"]}) == {}
+        assert rpc.select == unknown.select == "anything"
+
+
+@pytest.mark.skipif(
+    not (os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_KEY")),
+    reason="SUPABASE_URL / SUPABASE_KEY not set",
+)
+def test_projections_match_schema():
+    import app.main  # noqa: F401  registers every service's projections
+    from app.db import fetch_table_columns
+
+    table_columns = fetch_table_columns()
+    for name, projection in list(_projections.items()):
+        if projection.table is None:
+            continue
+        assert projection.table in table_columns, f"{name}: no table {projection.table!r}"
+        missing = [c for c in projection.columns if c not in set(table_columns[projection.table])]
+        assert not missing, f"{name}: {projection.table!r} has no column(s) {missing}"
@@ -0,0 +1,117 @@
+"""
+SingleFlight: concurrent calls with the same key run the function once and
+all receive its result (or its exception); nothing is kept afterwards.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+
+CALLERS = 8
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "callers did not arrive"
+        time.sleep(0.001)
+
+
+def _run_threads(flights, fn):
+    """CALLERS threads call do() with one key; returns their results or exceptions."""
+    def call():
+        try:
+            return flights.do("key", fn)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        return [f.result() for f in [pool.submit(call) for _ in range(CALLERS)]]
+
+
+@pytest.mark.parametrize("fails", [False, True])
+def test_do_runs_once_for_concurrent_callers(fails):
+    flights = SingleFlight("test-do")
+    runs = []
+
+    def compute():
+        runs.append(1)
+        # Hold the flight open until every other caller has joined it
+        _wait_for(lambda: flights.stats()["calls"] == CALLERS)
+        if fails:
+            raise ValueError("compute failed")
+        return object()
+
+    results = _run_threads(flights, compute)
+    assert len(runs) == 1
+    assert all(r is results[0] for r in results)
+    assert isinstance(results[0], ValueError) == fails
+    stats = flights.stats()
+    assert (stats["executions"], stats["coalesced"], stats["in_flight"]) == (1, CALLERS - 1, 0)
+    assert stats["errors"] == (1 if fails else 0)
+
+
+@pytest.mark.parametrize("fails", [False, True])
+def test_ado_runs_once_for_concurrent_callers(fails):
+    flights = SingleFlight("test-ado")
+    runs = []
+
+    async def compute():
+        runs.append(1)
+        while flights.stats()["calls"] < CALLERS:
+            await asyncio.sleep(0)
+        if fails:
+            raise ValueError("compute failed")
+        return object()
+
+    async def scenario():
+        return await asyncio.gather(
+            *(flights.ado("key", compute) for _ in range(CALLERS)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert len(runs) == 1
+    assert all(r is results[0] for r in results)
+    assert isinstance(results[0], ValueError) == fails
+    stats = flights.stats()
+    assert (stats["executions"], stats["coalesced"], stats["in_flight"]) == (1, CALLERS - 1, 0)
+
+
+def test_different_keys_and_later_calls_run_again():
+    flights = SingleFlight("test-keys")
+    release = threading.Event()
+    runs = []
+
+    def compute(key):
+        runs.append(key)
+        release.wait(5)
+        return key
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(flights.do, key, compute, key) for key in ("a", "b")]
+        _wait_for(lambda: len(runs) == 2)  # both ran: different keys do not wait for each other
+        release.set()
+        assert [f.result() for f in futures] == ["a", "b"]
+    assert flights.do("a", compute, "a") == "a"
+    assert sorted(runs) == ["a", "a", "b"]
+
+
+def test_cancelled_ado_caller_does_not_cancel_the_others():
+    flights = SingleFlight("test-cancel")
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        first = asyncio.ensure_future(flights.ado("key", compute))
+        second = asyncio.ensure_future(flights.ado("key", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
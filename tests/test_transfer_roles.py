@@ -0,0 +1,47 @@
+"""
+Role and hospital of a transfer user, offline against tests/fake_supabase.py:
+the staff tables are read in order and the lookup stops at the first match.
+"""
+import asyncio
+
+import pytest
+
+from app.services.transfer_service import _get_user_role_and_hospital, _get_user_role_and_hospital_async
+from app.utils import loaders
+from tests.fake_supabase import FakeSupabase
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeSupabase({
+        "User": [
+            {"user_id": "admin-1", "role": "hospital_administrator", "name": "A"},
+            {"user_id": "nurse-1", "role": "nurse", "name": "N"},
+            {"user_id": "other-1", "role": "doctor", "name": "D"},
+        ],
+        "Hospital_Administrator": [{"user_id": "admin-1", "hospital_id": "h1"}],
+        "Nurse": [{"user_id": "nurse-1", "hospital_id": "h2"}],
+    })
+
+    async def get_async_supabase():
+        return fake.aio()
+
+    monkeypatch.setattr(loaders, "get_supabase", lambda: fake)
+    monkeypatch.setattr(loaders, "get_async_supabase", get_async_supabase)
+    return fake
+
+
+@pytest.mark.parametrize("lookup", [
+    _get_user_role_and_hospital,
+    lambda user_id: asyncio.run(_get_user_role_and_hospital_async(user_id)),
+])
+@pytest.mark.parametrize("user_id,expected,tables", [
+    ("admin-1", ("hospital_administrator", "h1"), {"Hospital_Administrator", "User"}),
+    ("nurse-1", ("nurse", "h2"), {"Hospital_Administrator", "Nurse", "User"}),
+    ("other-1", ("doctor", None), {"Hospital_Administrator", "Nurse", "User"}),
+])
+def test_stops_at_the_first_staff_row(db, lookup, user_id, expected, tables):
+    assert lookup(user_id) == expected
+    read = [table for table, _ in db.requests]
+    assert set(read) == tables and len(read) == len(tables)
+